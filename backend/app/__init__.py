@@ -31,4 +31,13 @@ def create_app():
     from app.api.errors import register_error_handlers
     register_error_handlers(app)
     
+    # Register management commands
+    from app.cli import register_cli
+    register_cli(app)
+    
+    # Keep the in-memory live state current if requested; only the process
+    # holding the ingest lock in Redis ingests (see IngestLeader)
+    if app.config.get('ADSB_SOURCE', 'rest') != 'rest' or app.config.get('ADSB_POLL_INTERVAL'):
+        flights.adsb_service.start_ingest(app)
+    
     return app
\ No newline at end of file
@@ -0,0 +1,184 @@
+"""
+Read-through response caching for GET routes
+
+    @bp.route('/aircraft/<int:aircraft_id>', methods=['GET'])
+    @cached('aircraft', ttl=300)
+    def get_aircraft_detail(aircraft_id):
+        ...
+
+The response is cached under a key derived from the URL arguments and the
+query string in a versioned CacheService namespace, so writers drop every
+cached response of a route family with cache_service.invalidate_namespace().
+The namespace may also be derived from the URL arguments, so writers can
+drop the responses of a single resource:
+
+    @cached(lambda airport_code: f"atc-airport:{airport_code}", ttl=30)
+
+A cached response stays fresh for ttl seconds and may then be served stale
+for stale_ttl more. Expensive keys are protected against stampedes:
+
+- Single flight: a miss is recomputed only by the worker that takes the
+  key's Redis lock; the others wait for the result, taking over if the
+  lock holder fails, and compute it themselves after CACHE_ROUTE_LOCK_WAIT
+  seconds.
+- Stale-while-revalidate: once a response is stale, the lock holder
+  recomputes it while every other request is served the stale copy.
+- Probabilistic early refresh (XFetch): while still fresh, a request may
+  recompute ahead of expiry with a probability that grows as expiry nears
+  and with how long the response took to compute, so popular keys are
+  usually renewed before they ever go stale.
+
+Responses carry an X-Cache header of HIT, STALE or MISS. Only responses with
+a status in statuses are cached; errors raised with abort() are not.
+"""
+import base64
+import hashlib
+import logging
+import math
+import random
+import time
+from functools import wraps
+from flask import Response, make_response, request
+from config import Config
+from app.services.cache_service import cache_service
+
+logger = logging.getLogger(__name__)
+
+
+def _cache_key(namespace, view_args, query_args, vary):
+    """Derive the cache key of a request from the URL arguments, query string and varied headers"""
+    if query_args is None:
+        query = sorted(request.args.items(multi=True))
+    else:
+        query = sorted((name, value) for name in query_args for value in request.args.getlist(name))
+    parts = repr((sorted(view_args.items()), query, [request.headers.get(header, '') for header in vary]))
+    return cache_service.namespaced(namespace, f"{request.endpoint}:{hashlib.sha1(parts.encode('utf-8')).hexdigest()}")
+
+
+def _to_entry(response, started, finished, ttl):
+    """Build the cache entry of a response; the body is base64 text so every cache serializer can store it"""
+    return {
+        'body': base64.b64encode(response.get_data()).decode('ascii'),
+        'status': response.status_code,
+        'content_type': response.content_type,
+        'delta': finished - started,
+        'expires': finished + ttl
+    }
+
+
+def _to_response(entry, state):
+    """Rebuild a Flask response from a cache entry"""
+    response = Response(base64.b64decode(entry['body']), status=entry['status'], content_type=entry['content_type'])
+    response.headers['X-Cache'] = state
+    return response
+
+
+def _should_refresh_early(entry, now, beta):
+    """XFetch: recompute a fresh entry early with probability rising towards its expiry"""
+    return now - entry['delta'] * beta * math.log(1.0 - random.random()) >= entry['expires']
+
+
+def cached(namespace, ttl=60, stale_ttl=None, query_args=None, vary=(), statuses=(200,), beta=None):
+    """
+    Cache a GET route's responses in Redis through CacheService
+
+    Args:
+        namespace: CacheService namespace; invalidate_namespace(namespace) drops every response.
+                   A callable is called with the view's URL arguments to name the namespace
+        ttl: Seconds a response is served as fresh
+        stale_ttl: Seconds after ttl a response may still be served while it is
+                   being recomputed (defaults to Config.CACHE_ROUTE_STALE_TTL)
+        query_args: Query parameters that select the response; None uses all of them
+        vary: Request headers that select the response, e.g. ('Accept',)
+        statuses: Response status codes that are cached
+        beta: XFetch aggressiveness, 0 disables early refresh (defaults to Config.CACHE_XFETCH_BETA)
+
+    Returns:
+        callable: Decorator
+    """
+    stale_ttl = stale_ttl if stale_ttl is not None else Config.CACHE_ROUTE_STALE_TTL
+    beta = beta if beta is not None else Config.CACHE_XFETCH_BETA
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET':
+                return view(*args, **kwargs)
+
+            try:
+                scope = namespace(**kwargs) if callable(namespace) else namespace
+                key = _cache_key(scope, kwargs, query_args, vary)
+            except Exception as e:
+                logger.error(f"Error deriving cache key: {str(e)}")
+                return view(*args, **kwargs)
+
+            def compute(lock=None):
+                """Run the view, store a cacheable response and release the lock"""
+                try:
+                    started = time.time()
+                    response = make_response(view(*args, **kwargs))
+                    finished = time.time()
+                    if response.status_code in statuses and not response.direct_passthrough:
+                        cache_service.set(key, _to_entry(response, started, finished, ttl), ttl=ttl + stale_ttl)
+                    response.headers['X-Cache'] = 'MISS'
+                    return response
+                finally:
+                    _release(lock)
+
+            now = time.time()
+            entry = cache_service.get(key)
+            if entry is not None:
+                fresh = now < entry['expires']
+                if fresh and not (beta and _should_refresh_early(entry, now, beta)):
+                    return _to_response(entry, 'HIT')
+                lock = _acquire(key)
+                if lock is None:
+                    return _to_response(entry, 'HIT' if fresh else 'STALE')
+                return compute(lock)
+
+            lock = _acquire(key)
+            if lock is None:
+                # Another worker is computing this response: wait for it rather than pile on
+                deadline = time.monotonic() + Config.CACHE_ROUTE_LOCK_WAIT
+                while lock is None and time.monotonic() < deadline:
+                    time.sleep(0.05)
+                    entry = cache_service.get(key)
+                    if entry is not None:
+                        return _to_response(entry, 'HIT')
+                    lock = _acquire(key)  # Free again if the other worker failed or just finished
+                entry = cache_service.get(key) if lock else None
+                if entry is not None:
+                    _release(lock)
+                    return _to_response(entry, 'HIT')
+            return compute(lock)
+
+        return wrapper
+
+    return decorator
+
+
+def _acquire(key):
+    """
+    Take the single-flight lock of a cache key without blocking
+
+    Returns:
+        Lock or None: The held lock, or None if another worker holds it. When
+                      Redis is unreachable an unheld placeholder is returned so
+                      the caller computes the response itself.
+    """
+    try:
+        lock = cache_service.redis_client.lock(f"{key}:lock", timeout=Config.CACHE_ROUTE_LOCK_TIMEOUT)
+        return lock if lock.acquire(blocking=False) else None
+    except Exception as e:
+        logger.error(f"Error acquiring cache lock: {str(e)}")
+        return False
+
+
+def _release(lock):
+    """Release a lock taken by _acquire, ignoring one that expired meanwhile"""
+    if not lock:
+        return
+    try:
+        lock.release()
+    except Exception as e:
+        logger.error(f"Error releasing cache lock: {str(e)}")
@@ -2,6 +2,9 @@ from flask import jsonify, request, Blueprint
 from app.models import Aircraft, Flight
 from app.schemas import AircraftSchema
 from app.services import ADSBService
+from app.services.cache_service import cache_service
+from app.api.caching import cached
+from app.utils.icao import icao_to_int
 from extensions import db
 
 # Create a separate blueprint for aircraft routes
@@ -47,6 +50,7 @@ def get_aircraft_list():
 
 
 @bp.route('/aircraft/<int:aircraft_id>', methods=['GET'])
+@cached('aircraft', ttl=300)
 def get_aircraft_detail(aircraft_id):
     """Get detailed information about a specific aircraft"""
     aircraft = Aircraft.query.get_or_404(aircraft_id)
@@ -62,7 +66,7 @@ def create_aircraft():
         data = schema.load(request.json)
         
         # Check if aircraft already exists
-        existing_aircraft = Aircraft.query.filter_by(icao_code=data['icao_code']).first()
+        existing_aircraft = Aircraft.query.filter_by(icao_int=icao_to_int(data['icao_code'])).first()
         if existing_aircraft:
             return jsonify({'error': 'Aircraft with this ICAO code already exists'}), 400
         
@@ -93,6 +97,7 @@ def update_aircraft(aircraft_id):
             setattr(aircraft, field, value)
         
         db.session.commit()
+        cache_service.invalidate_namespace('aircraft')
         
         return jsonify(aircraft.to_dict())
         
@@ -113,6 +118,7 @@ def delete_aircraft(aircraft_id):
     
     db.session.delete(aircraft)
     db.session.commit()
+    cache_service.invalidate_namespace('aircraft')
     
     return jsonify({'message': 'Aircraft deleted successfully'})
 
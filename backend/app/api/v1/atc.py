@@ -6,6 +6,9 @@ bp = Blueprint('atc', __name__)
 
 from app.models import ATCMessage, Flight, User
 from app.services import ATCService
+from app.services.atc_service import airport_cache_namespace
+from app.services.cache_service import cache_service
+from app.api.caching import cached
 from extensions import db, socketio
 
 
@@ -128,6 +131,8 @@ def update_atc_message(message_id):
             message.priority_level = data['priority_level']
         
         db.session.commit()
+        if message.airport_code:
+            cache_service.invalidate_namespace(airport_cache_namespace(message.airport_code))
         
         return jsonify(message.to_dict())
         
@@ -177,6 +182,7 @@ def get_flight_atc_messages(flight_id):
 
 
 @bp.route('/atc/airport/<airport_code>/messages', methods=['GET'])
+@cached(airport_cache_namespace, ttl=30)
 def get_airport_atc_messages(airport_code):
     """Get all ATC messages for a specific airport"""
     # Get messages using the service
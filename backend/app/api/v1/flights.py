@@ -1,8 +1,19 @@
-from flask import jsonify, request, Blueprint
+from functools import wraps
+from flask import jsonify, make_response, request, Blueprint, Response
 from app.models import Flight, Aircraft
 from app.schemas import FlightSchema
 from app.services import ADSBService
+from app.services.cache_service import cache_service
+from app.api.caching import cached
+from app.utils.columnar_codec import (
+    COLUMNAR_MIMETYPE, MSGPACK_MIMETYPE, LIVE_FIELDS, TRACK_FIELDS,
+    encode_columnar, encode_msgpack, negotiate
+)
+from app.utils.icao import icao_to_int
+from app.utils.track_simplification import simplify_track
 from extensions import db
+from datetime import datetime, timezone
+import calendar
 
 # Create a separate blueprint for flights routes
 bp = Blueprint('flights', __name__)
@@ -12,6 +23,7 @@ adsb_service = ADSBService()
 
 
 @bp.route('/flights', methods=['GET'])
+@cached('flights', ttl=15)
 def get_flights_list():
     """Get a paginated list of flights"""
     page = request.args.get('page', 1, type=int)
@@ -76,6 +88,7 @@ def create_flight():
         flight = Flight(**data)
         db.session.add(flight)
         db.session.commit()
+        cache_service.invalidate_namespace('flights')
         
         return jsonify(flight.to_dict()), 201
         
@@ -99,6 +112,7 @@ def update_flight(flight_id):
             setattr(flight, field, value)
         
         db.session.commit()
+        cache_service.invalidate_namespace('flights')
         
         return jsonify(flight.to_dict())
         
@@ -110,10 +124,14 @@ def update_flight(flight_id):
 @bp.route('/flights/<int:flight_id>', methods=['DELETE'])
 def delete_flight(flight_id):
     """Delete a flight record"""
+    from app.services.position_partitions import position_storage
+    
     flight = Flight.query.get_or_404(flight_id)
     
+    position_storage.delete_flights([flight.id])
     db.session.delete(flight)
     db.session.commit()
+    cache_service.invalidate_namespace('flights')
     
     return jsonify({'message': 'Flight deleted successfully'})
 
@@ -135,7 +153,6 @@ def search_flights():
         query = query.filter(Flight.arrival_airport == arrival_airport.upper())
     if date:
         # Filter by date (convert string to date object)
-        from datetime import datetime
         try:
             date_obj = datetime.strptime(date, '%Y-%m-%d').date()
             query = query.filter(
@@ -156,13 +173,107 @@ def search_flights():
     })
 
 
+def _parse_bbox(value):
+    """Parse a 'south,west,north,east' string into a tuple of floats, or None if invalid"""
+    try:
+        south, west, north, east = (float(part) for part in value.split(','))
+    except (AttributeError, ValueError):
+        return None
+    if not (-90 <= south <= north <= 90 and -180 <= west <= 180 and -180 <= east <= 180):
+        return None
+    return south, west, north, east
+
+
+def _parse_timestamp(value):
+    """
+    Parse an ISO 8601 timestamp into a naive UTC datetime, as positions are stored
+
+    Timestamps without an offset are taken as UTC.
+
+    Raises:
+        ValueError: If the value is not an ISO 8601 timestamp
+    """
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _epoch(value):
+    """Convert a naive UTC datetime to epoch seconds"""
+    return calendar.timegm(value.utctimetuple()) if value else None
+
+
+def _binary_response(columns, fields, response_format):
+    """Encode columns in the negotiated binary format"""
+    if response_format == 'msgpack':
+        return Response(encode_msgpack(columns, fields), mimetype=MSGPACK_MIMETYPE)
+    return Response(encode_columnar(columns, fields), mimetype=COLUMNAR_MIMETYPE)
+
+
+def _vary_on_accept(view):
+    """Mark every response of a content-negotiated route, JSON and errors included, as varying on Accept"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        response = make_response(view(*args, **kwargs))
+        response.vary.add('Accept')
+        return response
+    return wrapper
+
+
 @bp.route('/flights/active', methods=['GET'])
+@_vary_on_accept
 def get_active_flights():
-    """Get all currently active flights"""
+    """
+    Get all currently active flights, optionally only those inside bbox=south,west,north,east
+    
+    The worker elected to ingest ADS-B data answers from its in-memory live
+    store; other workers answer from SQL, which trails by up to
+    LIVE_STATE_FLUSH_INTERVAL seconds.
+    
+    With extrapolate=1, live positions are dead-reckoned to the current time.
+    zoom= opts in to thinning for zoomed-out maps: below SPATIAL_FULL_DETAIL_ZOOM,
+    live results keep the 2 ** zoom most recently seen aircraft per grid cell.
+    """
+    bbox = None
+    if 'bbox' in request.args:
+        bbox = _parse_bbox(request.args.get('bbox'))
+        if bbox is None:
+            return jsonify({'error': 'Invalid bbox. Use bbox=south,west,north,east in degrees.'}), 400
+    zoom = request.args.get('zoom', type=int)
+    extrapolate = request.args.get('extrapolate', '').lower() in ('1', 'true', 'yes')
+    response_format = negotiate(request.accept_mimetypes)
+    
+    # Serve from the in-memory live store when this process is ingesting ADS-B data
+    if len(adsb_service.live_store):
+        if response_format != 'json':
+            columns = adsb_service.live_store.query_columns(bbox, zoom, extrapolate=extrapolate)
+            return _binary_response(columns, LIVE_FIELDS, response_format)
+        flights = adsb_service.live_store.query(bbox, zoom, extrapolate=extrapolate)
+        return jsonify({
+            'flights': flights,
+            'count': len(flights)
+        })
+    
     # Get active flights (not landed or cancelled)
-    active_flights = Flight.query.filter(
+    query = Flight.query.filter(
         Flight.status.in_(['active', 'scheduled'])
-    ).all()
+    )
+    if bbox is not None:
+        south, west, north, east = bbox
+        query = query.filter(Flight.latitude.between(south, north))
+        if west <= east:
+            query = query.filter(Flight.longitude.between(west, east))
+        else:
+            query = query.filter(db.or_(Flight.longitude >= west, Flight.longitude <= east))
+    active_flights = query.all()
+    
+    if response_format != 'json':
+        columns = {name: [getattr(flight, name) for flight in active_flights] for name in LIVE_FIELDS
+                   if name not in ('icao_code', 'last_position_update')}
+        columns['icao_code'] = [flight.aircraft.icao_code for flight in active_flights]
+        columns['last_position_update'] = [_epoch(flight.last_position_update) for flight in active_flights]
+        return _binary_response(columns, LIVE_FIELDS, response_format)
     
     return jsonify({
         'flights': [flight.to_dict() for flight in active_flights],
@@ -170,19 +281,88 @@ def get_active_flights():
     })
 
 
+@bp.route('/flights/active/bbox', methods=['GET'])
+def get_active_flights_in_bbox():
+    """Get live flights inside a bounding box given as bbox=south,west,north,east"""
+    if 'bbox' not in request.args:
+        return jsonify({'error': 'Invalid bbox. Use bbox=south,west,north,east in degrees.'}), 400
+    return get_active_flights()
+
+
 @bp.route('/flights/<string:icao_code>/positions', methods=['GET'])
+@_vary_on_accept
 def get_flight_positions(icao_code):
-    """Get position history for a flight identified by ICAO code"""
-    from app.models import FlightPosition
+    """
+    Get position history for a flight identified by ICAO code
+    
+    Optional query parameters:
+        since: Only return positions at or after this ISO 8601 timestamp
+        until: Only return positions at or before this ISO 8601 timestamp
+        tolerance: Simplify the track so it deviates at most this many meters
+        max_points: Return at most this many points, keeping the most significant ones
+    
+    Send Accept: application/vnd.flightfrd.columnar (or application/x-msgpack)
+    for a compact columnar encoding instead of JSON.
+    """
+    from app.services.position_partitions import position_storage
+    
+    tolerance = request.args.get('tolerance', type=float)
+    max_points = request.args.get('max_points', type=int)
     
-    # Get the flight by ICAO code through its aircraft
-    flight = Flight.query.join(Aircraft).filter(Aircraft.icao_code == icao_code).first_or_404()
+    window = {}
+    for name in ('since', 'until'):
+        value = request.args.get(name, '', type=str)
+        try:
+            window[name] = _parse_timestamp(value) if value else None
+        except ValueError:
+            return jsonify({'error': f"Invalid {name}. Use an ISO 8601 timestamp."}), 400
+    if tolerance is not None and tolerance < 0:
+        return jsonify({'error': 'tolerance must not be negative'}), 400
+    if max_points is not None and max_points < 2:
+        return jsonify({'error': 'max_points must be at least 2'}), 400
+    icao_int = icao_to_int(icao_code)
+    if icao_int is None:
+        return jsonify({'error': 'Invalid ICAO code. Use six hexadecimal characters.'}), 400
+    
+    # Get the most recent flight by ICAO code through its aircraft
+    flight = Flight.query.join(Aircraft).filter(Aircraft.icao_int == icao_int)\
+                         .order_by(Flight.id.desc()).first_or_404()
+    
+    # Get position history in time order; only partitions overlapping the requested window are read
+    rows = position_storage.select(flight.id, since=window['since'], until=window['until'])
+    total = len(rows)
     
-    # Get position history
-    positions = FlightPosition.query.filter_by(flight_id=flight.id).all()
+    if tolerance is not None or max_points is not None:
+        keep = simplify_track(
+            [row.latitude for row in rows],
+            [row.longitude for row in rows],
+            tolerance=tolerance,
+            max_points=max_points
+        )
+        rows = [rows[index] for index in keep.tolist()]
+    
+    response_format = negotiate(request.accept_mimetypes)
+    if response_format != 'json':
+        columns = {name: [getattr(row, name) for row in rows] for name in TRACK_FIELDS if name != 'timestamp'}
+        columns['timestamp'] = [_epoch(row.timestamp) for row in rows]
+        response = _binary_response(columns, TRACK_FIELDS, response_format)
+        response.headers['X-Flight-Id'] = str(flight.id)
+        response.headers['X-Total-Count'] = str(total)
+        return response
+    
+    positions = [{
+        'flight_id': flight.id,
+        'latitude': row.latitude,
+        'longitude': row.longitude,
+        'altitude': row.altitude,
+        'ground_speed': row.ground_speed,
+        'heading': row.heading,
+        'timestamp': row.timestamp.isoformat()
+    } for row in rows]
     
     return jsonify({
         'flight_id': flight.id,
-        'positions': [pos.to_dict() for pos in positions],
-        'count': len(positions)
-    })
\ No newline at end of file
+        'positions': positions,
+        'count': len(positions),
+        'total': total
+    })
@@ -7,6 +7,8 @@ bp = Blueprint('images', __name__)
 
 from app.models import Image, Aircraft, User
 from app.services import ImageService
+from app.services.cache_service import cache_service
+from app.api.caching import cached
 from extensions import db
 
 
@@ -118,6 +120,7 @@ def update_image(image_id):
             image.is_featured = data['is_featured']
         
         db.session.commit()
+        cache_service.invalidate_namespace('featured-image')
         
         return jsonify(image.to_dict())
         
@@ -133,6 +136,7 @@ def delete_image(image_id):
         success = image_service.delete_image(image_id)
         
         if success:
+            cache_service.invalidate_namespace('featured-image')
             return jsonify({'message': 'Image deleted successfully'})
         else:
             return jsonify({'error': 'Failed to delete image'}), 500
@@ -165,6 +169,7 @@ def approve_image(image_id):
         success = image_service.approve_image(image_id, approver_id)
         
         if success:
+            cache_service.invalidate_namespace('featured-image')
             image = Image.query.get_or_404(image_id)
             return jsonify(image.to_dict())
         else:
@@ -185,6 +190,7 @@ def set_featured_image(image_id):
         success = image_service.set_featured_image(image_id, image.aircraft_id)
         
         if success:
+            cache_service.invalidate_namespace('featured-image')
             return jsonify({'message': 'Featured image set successfully'})
         else:
             return jsonify({'error': 'Failed to set featured image'}), 500
@@ -217,6 +223,7 @@ def get_aircraft_images(aircraft_id):
 
 
 @bp.route('/images/featured/<int:aircraft_id>', methods=['GET'])
+@cached('featured-image', ttl=300, statuses=(200, 404))
 def get_featured_image(aircraft_id):
     """Get the featured image for an aircraft"""
     # Validate aircraft exists
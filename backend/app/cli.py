@@ -0,0 +1,104 @@
+import click
+from flask.cli import AppGroup
+
+
+positions_cli = AppGroup('positions', help='Manage flight position history storage.')
+adsb_cli = AppGroup('adsb', help='ADS-B ingest tools.')
+flights_cli = AppGroup('flights', help='Maintain flight records.')
+aircraft_cli = AppGroup('aircraft', help='Maintain aircraft records.')
+
+
+@positions_cli.command('migrate')
+def migrate_positions():
+    """Convert a plain PostgreSQL flight_positions table to daily partitions."""
+    from app.services.position_partitions import position_storage
+
+    if position_storage.migrate_to_partitions():
+        click.echo('flight_positions is now partitioned by day.')
+    else:
+        click.echo(f"Nothing to migrate (storage mode: {position_storage.mode()}).")
+
+
+@positions_cli.command('prune')
+@click.option('--days', type=int, default=None, help='Days of history to keep (defaults to POSITION_RETENTION_DAYS).')
+def prune_positions(days):
+    """Drop position partitions older than the retention period."""
+    from datetime import datetime, timedelta
+    from config import Config
+    from app.services.position_partitions import position_storage
+
+    days = days if days is not None else Config.POSITION_RETENTION_DAYS
+    result = position_storage.drop_before(datetime.utcnow() - timedelta(days=days))
+    click.echo(f"Dropped {len(result['dropped_partitions'])} partitions, deleted {result['deleted_rows']} rows.")
+
+
+@adsb_cli.command('replay')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['json', 'sbs', 'beast', 'avr']), default=None,
+              help='Capture format (guessed from the file extension by default).')
+@click.option('--batch-size', type=int, default=1000, help='Messages per ingest batch.')
+@click.option('--realtime', is_flag=True, help='Pace the replay by the capture timestamps.')
+@click.option('--timezone', default=None,
+              help='Receiver clock of SBS timestamps: local, an IANA name or receipt (defaults to ADSB_SOURCE_TIMEZONE).')
+def replay_capture(path, fmt, batch_size, realtime, timezone):
+    """Replay a recorded capture through the ingest pipeline and report throughput."""
+    from app.api.v1.flights import adsb_service
+    from app.services.sources import FileReplaySource
+
+    source = FileReplaySource(path, fmt=fmt, batch_size=batch_size, realtime=realtime,
+                              timezone=timezone)
+    summary = adsb_service.ingest_source(source)
+    click.echo(
+        f"Replayed {source.messages} messages as {summary['states']} states in {summary['batches']} batches "
+        f"({summary['new']} new, {summary['updated']} updated, {summary['unchanged']} unchanged, "
+        f"{summary['duplicates']} duplicate, {summary['out_of_order']} out of order) "
+        f"in {summary['elapsed']:.2f}s: {summary['states_per_second']:.0f} states/s"
+    )
+
+
+@flights_cli.command('backfill-airports')
+@click.option('--batch-size', type=int, default=500, help='Flights per batch.')
+def backfill_airports(batch_size):
+    """Resolve missing departure/arrival airports from stored positions."""
+    from app.services.airport_index import airport_index, backfill_flight_airports
+
+    summary = backfill_flight_airports(airport_index, batch_size=batch_size)
+    click.echo(
+        f"Scanned {summary['flights']} flights: {summary['departures']} departure and "
+        f"{summary['arrivals']} arrival airports resolved."
+    )
+
+
+@aircraft_cli.command('import-registry')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--batch-size', type=int, default=5000, help='Rows per upsert batch.')
+def import_registry(path, batch_size):
+    """Load an aircraft registry CSV (e.g. OpenSky aircraftDatabase.csv) into aircraft."""
+    from app.services.aircraft_registry import AircraftRegistryImporter
+
+    summary = AircraftRegistryImporter(batch_size=batch_size).import_file(path)
+    click.echo(
+        f"Upserted {summary['upserted']} aircraft from {summary['rows']} rows "
+        f"({summary['skipped']} skipped) in {summary['batches']} batches, {summary['elapsed']:.1f}s"
+    )
+
+
+@aircraft_cli.command('migrate-icao')
+@click.option('--batch-size', type=int, default=5000, help='Aircraft per backfill batch.')
+def migrate_icao(batch_size):
+    """Add and fill the integer ICAO column, merging aircraft that differ only in code case."""
+    from app.services.aircraft_registry import migrate_icao_int
+
+    summary = migrate_icao_int(batch_size=batch_size)
+    click.echo(
+        f"Backfilled {summary['backfilled']} aircraft, merged {summary['merged']} duplicates, "
+        f"lower-cased {summary['lowercased']} codes."
+    )
+
+
+def register_cli(app):
+    """Attach the management commands to the application"""
+    app.cli.add_command(positions_cli)
+    app.cli.add_command(adsb_cli)
+    app.cli.add_command(flights_cli)
+    app.cli.add_command(aircraft_cli)
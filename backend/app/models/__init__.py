@@ -1,7 +1,7 @@
 from .aircraft import Aircraft
-from .flight import Flight
+from .flight import Flight, FlightPosition
 from .image import Image
 from .atc_message import ATCMessage
 from .user import User
 
-__all__ = ['Aircraft', 'Flight', 'Image', 'ATCMessage', 'User']
\ No newline at end of file
+__all__ = ['Aircraft', 'Flight', 'FlightPosition', 'Image', 'ATCMessage', 'User']
\ No newline at end of file
@@ -1,13 +1,16 @@
 from extensions import db
 from datetime import datetime
 from sqlalchemy import UniqueConstraint
+from sqlalchemy.orm import validates
+from app.utils.icao import icao_to_int, normalize_icao
 
 
 class Aircraft(db.Model):
     __tablename__ = 'aircraft'
 
     id = db.Column(db.Integer, primary_key=True)
-    icao_code = db.Column(db.String(6), nullable=False, index=True)  # ICAO hex code
+    icao_code = db.Column(db.String(6), nullable=False, index=True)  # ICAO hex code, lower-case
+    icao_int = db.Column(db.Integer, unique=True, index=True)  # Same address as a 24-bit integer
     registration = db.Column(db.String(10), unique=True)  # e.g., N12345
     airline = db.Column(db.String(100))  # Airline name
     model = db.Column(db.String(100))  # Aircraft model
@@ -30,6 +33,13 @@ class Aircraft(db.Model):
         UniqueConstraint('icao_code', name='unique_icao_code'),
     )
 
+    @validates('icao_code')
+    def _set_icao_int(self, key, icao_code):
+        """Store the canonical code and keep icao_int in step with it"""
+        icao_code = normalize_icao(icao_code) or icao_code
+        self.icao_int = icao_to_int(icao_code)
+        return icao_code
+
     def __repr__(self):
         return f'<Aircraft {self.icao_code} - {self.registration}>'
 
@@ -16,7 +16,7 @@ class Flight(db.Model):
     arrival_time = db.Column(db.DateTime)  # Scheduled arrival
     actual_departure = db.Column(db.DateTime)  # Actual departure
     actual_arrival = db.Column(db.DateTime)  # Actual arrival
-    status = db.Column(db.String(20), default='scheduled')  # scheduled, active, landed, cancelled
+    status = db.Column(db.String(20), default='scheduled')  # scheduled, active, landed, lost, cancelled
     origin_country = db.Column(db.String(100))  # Origin country
     destination_country = db.Column(db.String(100))  # Destination country
     altitude = db.Column(db.Integer)  # Current altitude in feet
@@ -101,4 +101,7 @@ class FlightPosition(db.Model):
 
 
 # Create composite index for efficient flight tracking
-Index('idx_flight_position_time', FlightPosition.flight_id, FlightPosition.timestamp.desc())
\ No newline at end of file
+Index('idx_flight_position_time', FlightPosition.flight_id, FlightPosition.timestamp.desc())
+
+# Open-flight lookup by aircraft during ADS-B ingest
+Index('idx_flight_aircraft_status', Flight.aircraft_id, Flight.status)
\ No newline at end of file
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field, validator
 from typing import Optional
 from datetime import date
+from app.utils.icao import normalize_icao
 
 
 class AircraftSchema(BaseModel):
@@ -21,9 +22,10 @@ class AircraftSchema(BaseModel):
     def validate_icao_code(cls, v):
         if not v or len(v) != 6:
             raise ValueError('ICAO code must be exactly 6 characters')
-        if not all(c in '0123456789ABCDEFabcdef' for c in v):
+        icao_code = normalize_icao(v)
+        if icao_code is None:
             raise ValueError('ICAO code must contain only hexadecimal characters')
-        return v.upper()
+        return icao_code
 
     @validator('registration')
     def validate_registration(cls, v):
@@ -34,7 +36,7 @@ class AircraftSchema(BaseModel):
     class Config:
         schema_extra = {
             "example": {
-                "icao_code": "A2CDEF",
+                "icao_code": "a2cdef",
                 "registration": "N123AB",
                 "airline": "American Airlines",
                 "model": "Boeing 737-800",
@@ -0,0 +1,321 @@
+import logging
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from config import Config
+from extensions import db
+from app.models import Aircraft, Flight
+from app.services.aircraft_registry import aircraft_index
+from app.services.airport_index import airport_index
+from app.services.flight_lifecycle import LANDING, TAKEOFF
+from app.services.live_state_store import EPOCH
+from app.utils.icao import icao_to_int, int_to_icao
+
+
+# Statuses of a flight that is still open (see FlightLifecycleTracker for how legs are closed)
+OPEN_FLIGHT_STATUSES = ('scheduled', 'active')
+
+# Flight columns refreshed from every state vector
+FLIGHT_STATE_FIELDS = (
+    'callsign', 'latitude', 'longitude', 'altitude', 'ground_speed', 'heading',
+    'vertical_rate', 'on_ground', 'squawk', 'baro_altitude', 'true_track',
+    'last_position_update'
+)
+
+
+def normalize_state(state, received_at=None):
+    """
+    Convert a raw OpenSky state vector into a dict keyed by Flight column names
+
+    The upstream time_position and last_contact fields (epoch seconds) are
+    kept for the fusion stage, and last_position_update is taken from
+    time_position when the vector carries one. The address is carried both
+    as the canonical lower-case icao_code and as the 24-bit icao_int that
+    the in-memory stages key on.
+
+    Args:
+        state: State vector list as returned by /states/all
+        received_at: Timestamp to record as the position update time when the
+                     vector has no time_position
+
+    Returns:
+        dict: Normalized state, or None if the vector has no valid ICAO code
+    """
+    icao_int = icao_to_int(state[0].strip()) if state[0] else None
+    if icao_int is None:
+        return None
+
+    time_position = state[3]
+    if time_position:
+        last_position_update = EPOCH + timedelta(seconds=time_position)
+    else:
+        last_position_update = received_at or datetime.utcnow()
+
+    return {
+        'icao_code': int_to_icao(icao_int),
+        'icao_int': icao_int,
+        'callsign': state[1].strip() if state[1] else None,
+        'origin_country': state[2] if state[2] else None,
+        'time_position': time_position,
+        'last_contact': state[4],
+        'longitude': state[5],
+        'latitude': state[6],
+        'altitude': state[7],
+        'on_ground': state[8],
+        'ground_speed': state[9],
+        'heading': state[10],
+        'vertical_rate': state[11],
+        'baro_altitude': state[13],
+        'squawk': state[14] if state[14] else None,
+        'true_track': state[10],  # Same as heading in this case
+        'last_position_update': last_position_update
+    }
+
+
+class ADSBIngestor:
+    """
+    Set-based writer that applies a whole ADS-B snapshot to the database
+
+    Aircraft are resolved from the in-process ICAO index, and open flights
+    and unknown aircraft with one IN query per chunk. Missing rows are
+    created with bulk inserts, updates are applied as a single executemany
+    UPDATE and the snapshot is committed once.
+    """
+
+    def __init__(self, chunk_size=None):
+        self.chunk_size = chunk_size or Config.ADSB_INGEST_CHUNK_SIZE
+        self.logger = logging.getLogger(__name__)
+
+    def ingest(self, states, lifecycle=None):
+        """
+        Upsert aircraft and flight rows for a snapshot of normalized states
+
+        With a lifecycle tracker, pending takeoffs and landings are applied:
+        a landing closes the open flight (status 'landed', actual_arrival), a
+        takeoff sets actual_departure or, if the open flight had already
+        departed, closes it and opens a new leg. Parked aircraft (landed and
+        not yet departed again) do not get a new flight. Departure and
+        arrival airports are resolved from the position of the transition
+        (or of a flight opened on the ground) with the airport index.
+
+        Args:
+            states: Iterable of dicts produced by normalize_state
+            lifecycle: Optional FlightLifecycleTracker
+
+        Returns:
+            dict: Counts, per-phase timings (seconds) and the flight of each aircraft,
+                  keyed by icao_int
+        """
+        timings = {}
+        started = time.perf_counter()
+        now = datetime.utcnow()
+
+        # Keep only the latest state per aircraft
+        by_icao = {}
+        for state in states:
+            by_icao[state['icao_int']] = state
+
+        transitions = lifecycle.take_transitions(by_icao) if lifecycle is not None else {}
+        legs_closed = 0
+
+        try:
+            phase = time.perf_counter()
+            aircraft_ids = self._resolve_aircraft(list(by_icao))
+            timings['resolve_aircraft'] = time.perf_counter() - phase
+
+            phase = time.perf_counter()
+            missing = [icao for icao in by_icao if icao not in aircraft_ids]
+            if missing:
+                self._insert_aircraft([by_icao[icao] for icao in missing], now)
+                aircraft_ids.update(self._resolve_aircraft(missing))
+            timings['insert_aircraft'] = time.perf_counter() - phase
+
+            phase = time.perf_counter()
+            open_flights = self._resolve_open_flights(list(aircraft_ids.values()))
+            timings['resolve_flights'] = time.perf_counter() - phase
+
+            new_flights = []
+            updates = []
+            for icao, state in by_icao.items():
+                aircraft_id = aircraft_ids.get(icao)
+                if aircraft_id is None:
+                    continue
+
+                row = {field: state[field] for field in FLIGHT_STATE_FIELDS}
+                row['updated_at'] = now
+
+                flight = open_flights.get(aircraft_id)
+                event, event_time, event_position = transitions.get(icao, (None, None, None))
+                airport = airport_index.nearest_code(*event_position) if event_position else None
+                if flight is not None and event == LANDING:
+                    row.update(status='landed', actual_arrival=event_time)
+                    if airport:
+                        row['arrival_airport'] = airport
+                    flight['status'] = 'landed'
+                    legs_closed += 1
+                elif flight is not None and event == TAKEOFF:
+                    if flight['actual_departure'] is None:
+                        row['actual_departure'] = event_time
+                        if airport:
+                            row['departure_airport'] = airport
+                    else:
+                        # Departed again without a landing being seen: close the old leg
+                        updates.append({'id': flight['id'], 'status': 'landed', 'updated_at': now})
+                        del open_flights[aircraft_id]
+                        flight = None
+                        legs_closed += 1
+
+                if flight is None:
+                    if event != TAKEOFF and lifecycle is not None and lifecycle.is_parked(icao):
+                        continue
+                    if event != TAKEOFF and state['on_ground']:
+                        airport = airport_index.nearest_code(state['latitude'], state['longitude'])
+                    row.update(
+                        aircraft_id=aircraft_id,
+                        origin_country=state['origin_country'],
+                        status='active',
+                        actual_departure=event_time if event == TAKEOFF else None,
+                        departure_airport=airport if event == TAKEOFF or state['on_ground'] else None,
+                        created_at=now
+                    )
+                    new_flights.append(row)
+                else:
+                    row['id'] = flight['id']
+                    updates.append(row)
+
+            phase = time.perf_counter()
+            if new_flights:
+                db.session.bulk_insert_mappings(Flight, new_flights)
+                open_flights.update(self._resolve_open_flights([row['aircraft_id'] for row in new_flights]))
+            timings['insert_flights'] = time.perf_counter() - phase
+
+            phase = time.perf_counter()
+            if updates:
+                db.session.bulk_update_mappings(Flight, updates)
+            timings['update_flights'] = time.perf_counter() - phase
+
+            phase = time.perf_counter()
+            db.session.commit()
+            timings['commit'] = time.perf_counter() - phase
+
+        except Exception as e:
+            self.logger.error(f"Error ingesting ADS-B snapshot: {str(e)}")
+            db.session.rollback()
+            if lifecycle is not None:
+                lifecycle.restore_transitions(transitions)
+            # IDs of aircraft created in the rolled back transaction may be cached
+            aircraft_index.invalidate()
+            raise
+
+        flights = {}
+        for icao in by_icao:
+            flight = open_flights.get(aircraft_ids.get(icao))
+            if flight is not None:
+                flights[icao] = flight
+
+        timings['total'] = time.perf_counter() - started
+
+        return {
+            'states': len(by_icao),
+            'aircraft_created': len(missing),
+            'flights_created': len(new_flights),
+            'flights_updated': len(updates),
+            'legs_closed': legs_closed,
+            'skipped': len(by_icao) - len(flights),
+            'flights': flights,
+            'timings': timings
+        }
+
+    def _chunks(self, items):
+        """Yield successive chunks of at most chunk_size items"""
+        for start in range(0, len(items), self.chunk_size):
+            yield items[start:start + self.chunk_size]
+
+    def _resolve_aircraft(self, icao_ints):
+        """
+        Look up aircraft IDs for a list of 24-bit ICAO addresses
+
+        Addresses missing from the ICAO index are looked up in the database
+        (on the indexed icao_int column) and added to the index when found.
+
+        Args:
+            icao_ints: List of integer ICAO addresses
+
+        Returns:
+            dict: Mapping of ICAO address to aircraft ID
+        """
+        aircraft_ids = aircraft_index.lookup(icao_ints)
+        misses = [icao for icao in icao_ints if icao not in aircraft_ids]
+
+        found = {}
+        for chunk in self._chunks(misses):
+            rows = db.session.execute(
+                select(Aircraft.icao_int, Aircraft.id).where(Aircraft.icao_int.in_(chunk))
+            )
+            found.update(rows.all())
+        if found:
+            aircraft_index.add(found)
+            aircraft_ids.update(found)
+        return aircraft_ids
+
+    def _insert_aircraft(self, states, now):
+        """
+        Bulk insert aircraft rows for previously unseen ICAO codes
+
+        Only the ICAO code is known at this point; registration, model and
+        type come from the registry import (see AircraftRegistryImporter).
+        On PostgreSQL and SQLite the insert uses ON CONFLICT DO NOTHING so that
+        rows created concurrently by another worker are silently kept.
+
+        Args:
+            states: Normalized states of the aircraft to create
+            now: Creation timestamp
+        """
+        rows = [{
+            'icao_code': state['icao_code'],
+            'icao_int': state['icao_int'],
+            'created_at': now,
+            'updated_at': now
+        } for state in states]
+
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'postgresql':
+            insert = postgresql.insert
+        elif dialect == 'sqlite':
+            insert = sqlite.insert
+        else:
+            db.session.bulk_insert_mappings(Aircraft, rows)
+            return
+
+        db.session.execute(insert(Aircraft).on_conflict_do_nothing(), rows)
+
+    def _resolve_open_flights(self, aircraft_ids):
+        """
+        Look up the most recent open flight of each aircraft
+
+        Args:
+            aircraft_ids: List of aircraft IDs
+
+        Returns:
+            dict: Mapping of aircraft ID to a dict with the flight's id, aircraft_id,
+                  flight_number, status and actual_departure
+        """
+        flights = {}
+        for chunk in self._chunks(aircraft_ids):
+            # Served by idx_flight_aircraft_status; closed legs are never scanned
+            rows = db.session.execute(
+                select(Flight.aircraft_id, Flight.id, Flight.flight_number, Flight.status, Flight.actual_departure)
+                .where(Flight.aircraft_id.in_(chunk))
+                .where(Flight.status.in_(OPEN_FLIGHT_STATUSES))
+                .order_by(Flight.id)
+            )
+            for aircraft_id, flight_id, flight_number, status, actual_departure in rows:
+                flights[aircraft_id] = {
+                    'id': flight_id,
+                    'aircraft_id': aircraft_id,
+                    'flight_number': flight_number,
+                    'status': status,
+                    'actual_departure': actual_departure
+                }
+        return flights
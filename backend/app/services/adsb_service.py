@@ -1,8 +1,28 @@
 import requests
 import logging
+import threading
+import time
 from datetime import datetime, timedelta
-from extensions import db, redis_client
-from app.models import Aircraft, Flight
+from flask import current_app
+from sqlalchemy import case, update
+from config import Config
+from extensions import db, socketio
+from app.models import Flight
+from app.services.adsb_ingest import ADSBIngestor, normalize_state
+from app.services.airport_index import airport_index
+from app.services.cache_service import cache_service
+from app.services.flight_lifecycle import FlightLifecycleTracker, GROUND
+from app.services.ingest_leader import ingest_leader
+from app.services.live_state_store import EPOCH, live_state_store, live_state_flusher, live_position_emitter
+from app.services.poll_scheduler import AdaptivePollScheduler
+from app.services.position_writer import PositionWriter
+from app.services.shard_poller import ShardPoller, region_shards
+from app.services.sources import create_source
+from app.services.snapshot_diff import SnapshotDiffer
+from app.services.state_fusion import StateFusion
+from app.services.upstream_client import adsb_upstream
+from app.utils.json_stream import StateVectorStream
+from app.utils.icao import ints_to_icao
 from app.utils.validators import validate_icao_code
 
 
@@ -12,22 +32,35 @@ class ADSBService:
     """
     
     def __init__(self):
-        self.base_url = 'https://opensky-network.org/api'
+        self.upstream = adsb_upstream
+        self.base_url = self.upstream.base_url
         self.logger = logging.getLogger(__name__)
+        self.ingestor = ADSBIngestor()
+        self.live_store = live_state_store
+        self.position_writer = PositionWriter()
+        self.fusion = StateFusion()
+        self.differ = SnapshotDiffer()
+        self.lifecycle = FlightLifecycleTracker()
+        self.shard_poller = ShardPoller(self)
+        self.scheduler = None
+        self.last_ingest_stats = None
+        self.last_lost_sweep = None  # When open flights were last swept for signal loss
         
-    def fetch_current_states(self, icao_codes=None):
+    def fetch_current_states(self, icao_codes=None, stream=False):
         """
         Fetch current states of aircraft from ADS-B data
         
         Args:
             icao_codes: List of specific ICAO codes to fetch (optional)
+            stream: Parse the response incrementally and ingest it in batches of
+                    ADSB_STREAM_BATCH_SIZE states instead of loading the whole document
             
         Returns:
-            dict: Response from ADS-B API
+            dict: Response from ADS-B API, or in stream mode a summary with the
+                  snapshot time, the number of states and the diff counts
         """
         try:
-            # Build URL with optional icao codes filter
-            url = f"{self.base_url}/states/all"
+            # Build optional icao codes filter
             params = {}
             
             if icao_codes:
@@ -37,9 +70,12 @@ class ADSBService:
                 
                 params['icao24'] = ','.join(icao_codes)
             
-            # Make request to ADS-B API
-            response = requests.get(url, params=params)
-            response.raise_for_status()
+            # Make request to ADS-B API over the pooled upstream session
+            response = self.upstream.get('/states/all', params=params, stream=stream)
+            
+            if stream:
+                with response:
+                    return self._process_states_stream(response)
             
             data = response.json()
             
@@ -55,113 +91,426 @@ class ADSBService:
             self.logger.error(f"Unexpected error in fetch_current_states: {str(e)}")
             raise
 
+    def _process_states_stream(self, response):
+        """
+        Ingest a streamed /states/all response batch by batch
+        
+        Args:
+            response: requests.Response opened with stream=True
+            
+        Returns:
+            dict: Snapshot time, number of states and summed diff counts
+        """
+        states = StateVectorStream(response.iter_content(chunk_size=Config.ADSB_STREAM_CHUNK_SIZE),
+                                   batch_size=Config.ADSB_STREAM_BATCH_SIZE)
+        summary = {'time': None, 'count': 0, 'batches': 0, 'new': 0, 'updated': 0, 'unchanged': 0, 'stale': 0,
+                   'duplicates': 0, 'out_of_order': 0}
+        
+        for batch in states:
+            result = self._process_states_data({'states': batch}) or {}
+            summary['batches'] += 1
+            for key in ('new', 'updated', 'unchanged', 'stale', 'duplicates', 'out_of_order'):
+                summary[key] += result.get(key, 0)
+        
+        summary['time'] = states.time
+        summary['count'] = states.count
+        return summary
+
     def _process_states_data(self, data):
         """
         Process ADS-B states data and update database
         
         Args:
             data: Raw ADS-B states data
+            
+        Returns:
+            dict: Result of process_states, or None if there was nothing to process
         """
         if 'states' not in data or not data['states']:
-            return
-            
-        for state in data['states']:
-            # Extract aircraft information
-            icao_code = state[0].lower() if state[0] else None
-            callsign = state[1].strip() if state[1] else None
-            country = state[2] if state[2] else None
-            latitude = state[6] if state[6] is not None else None
-            longitude = state[5] if state[5] is not None else None
-            altitude = state[7] if state[7] is not None else None
-            velocity = state[9] if state[9] is not None else None
-            heading = state[10] if state[10] is not None else None
-            vertical_rate = state[11] if state[11] is not None else None
-            on_ground = state[8] if state[8] is not None else None
-            squawk = state[14] if state[14] else None
-            baro_altitude = state[13] if state[13] is not None else None
-            true_track = state[10] if state[10] is not None else None  # Same as heading in this case
-            last_position_update = datetime.utcnow()  # Using current time as proxy for actual timestamp
-            
-            # Find or create aircraft record
-            aircraft = Aircraft.query.filter_by(icao_code=icao_code).first()
-            if not aircraft:
-                aircraft = Aircraft(
-                    icao_code=icao_code,
-                    registration=callsign,
-                    airline=country,
-                    created_at=datetime.utcnow(),
-                    updated_at=datetime.utcnow()
-                )
-                db.session.add(aircraft)
-                db.session.flush()  # Get ID without committing
-            
-            # Find or update flight record
-            flight = Flight.query.filter_by(aircraft_id=aircraft.id).filter(Flight.status != 'landed').first()
-            if not flight:
-                flight = Flight(
-                    aircraft_id=aircraft.id,
-                    callsign=callsign,
-                    origin_country=country,
-                    status='active',
-                    created_at=datetime.utcnow(),
-                    updated_at=datetime.utcnow()
-                )
-                db.session.add(flight)
-            else:
-                # Update existing flight record
-                flight.callsign = callsign
-                flight.latitude = latitude
-                flight.longitude = longitude
-                flight.altitude = altitude
-                flight.ground_speed = velocity
-                flight.heading = heading
-                flight.vertical_rate = vertical_rate
-                flight.on_ground = on_ground
-                flight.squawk = squawk
-                flight.baro_altitude = baro_altitude
-                flight.true_track = true_track
-                flight.last_position_update = last_position_update
-                flight.updated_at = datetime.utcnow()
+            return None
+        
+        # Vectors without a time_position are dated by the snapshot time
+        received_at = EPOCH + timedelta(seconds=data['time']) if data.get('time') else datetime.utcnow()
+        states = [state for state in (normalize_state(raw, received_at) for raw in data['states']) if state]
+        
+        return self.process_states(states)
+
+    def process_states(self, states):
+        """
+        Ingest a snapshot of normalized states
+        
+        Reports are first fused per aircraft (out-of-order and duplicate
+        reports are dropped, fields merged across sources), then diffed
+        against the last published state of each aircraft; only new and
+        changed aircraft are written to the database, cached and pushed to
+        socket clients. Takeoffs and landings detected by the lifecycle
+        tracker are written with the aircraft's flight, and flights of
+        aircraft whose signal timed out are closed.
+        
+        Args:
+            states: List of dicts produced by normalize_state
             
+        Returns:
+            dict: Ingest statistics with per-phase timings, new/updated/unchanged/stale
+                  counts, the number of duplicate and out-of-order reports dropped and
+                  the ICAO addresses of new and updated aircraft ('changed_icao')
+        """
+        received = len(states)
+        states, fusion = self.fusion.fuse(states)
+        events = self.lifecycle.observe(states)
+        diff = self.differ.diff(states)
+        changed = diff.new + diff.updated
+        if events:
+            # A confirmed takeoff or landing is written even if the state barely moved
+            changed += [state for state in diff.unchanged if state['icao_int'] in events]
+            diff = diff._replace(unchanged=[state for state in diff.unchanged if state['icao_int'] not in events])
+        counts = {
+            'new': len(diff.new),
+            'updated': len(diff.updated),
+            'unchanged': len(diff.unchanged),
+            'stale': len(diff.stale),
+            'duplicates': fusion['duplicates'],
+            'out_of_order': fusion['out_of_order']
+        }
+        self.logger.info(
+            f"Snapshot of {received} reports: {counts['duplicates']} duplicate, {counts['out_of_order']} "
+            f"out of order; {counts['new']} new, {counts['updated']} updated, "
+            f"{counts['unchanged']} unchanged, {counts['stale']} stale"
+        )
+        counts['changed_icao'] = {state['icao_int'] for state in changed}
+        
+        # Unchanged aircraft only refresh their last-seen time in the live store
+        self.live_store.upsert(diff.unchanged, mark_dirty=False)
+        
+        # Serve reads from the live store straight away; SQL is written now or by the flusher
+        if Config.LIVE_STATE_FLUSH_INTERVAL > 0:
+            self.live_store.upsert(changed)
+            live_state_flusher.ensure_started(current_app._get_current_object(), self._write_states)
+            self._emit_changes(changed, diff.stale)
+            counts['legs_lost'] = self._close_lost_flights()
+            return {'states': len(states), 'queued': True, **counts}
+        
+        self.live_store.upsert(changed, mark_dirty=False)
+        self.live_store.evict_stale()
+        
+        result = {'states': len(states), **counts}
+        if changed:
+            try:
+                result.update(self._write_states(changed), states=len(states))
+            except Exception:
+                # Publish these aircraft again on the next poll
+                self.differ.forget(state['icao_int'] for state in changed)
+                raise
+        
+        self._emit_changes(changed, diff.stale)
+        result['legs_lost'] = self._close_lost_flights()
+        return result
+
+    def _close_lost_flights(self):
+        """
+        Close the open flights of aircraft not heard from within LIFECYCLE_SIGNAL_TIMEOUT
+        
+        Flights last seen on the ground are marked landed, flights lost in
+        the air are marked lost. Aircraft expired by the lifecycle tracker
+        are put back into it when the write fails, so the next call retries
+        them. The tracker only knows aircraft seen since this process
+        started, so flights it never saw are closed by _sweep_lost_flights.
+        
+        Returns:
+            int: Number of flights closed
+        """
+        closed = self._sweep_lost_flights()
+        lost = self.lifecycle.expire()
+        if not lost:
+            return closed
+        
+        now = datetime.utcnow()
+        rows = [{
+            'id': flight_id,
+            'status': 'landed' if phase == GROUND else 'lost',
+            'updated_at': now
+        } for _, flight_id, phase in lost]
+        
+        try:
+            db.session.bulk_update_mappings(Flight, rows)
             db.session.commit()
+        except Exception as e:
+            self.logger.error(f"Error closing lost flights: {str(e)}")
+            db.session.rollback()
+            self.lifecycle.restore_lost(lost)
+            return closed
+        
+        self.logger.info(f"Closed {len(rows)} flights after signal loss")
+        return closed + len(rows)
+
+    def _sweep_lost_flights(self):
+        """
+        Close active flights not updated within LIFECYCLE_SIGNAL_TIMEOUT
+        
+        Catches flights left open by a restart or by another process, at
+        most every LIFECYCLE_SWEEP_INTERVAL seconds. Ingest rewrites every
+        reporting aircraft at least every SNAPSHOT_REFRESH_INTERVAL, so an
+        old updated_at means the signal was lost. Flights last on the ground
+        are marked landed, the others lost.
+        
+        Returns:
+            int: Number of flights closed
+        """
+        now = datetime.utcnow()
+        if self.last_lost_sweep is not None and \
+                (now - self.last_lost_sweep).total_seconds() < Config.LIFECYCLE_SWEEP_INTERVAL:
+            return 0
+        self.last_lost_sweep = now
+        
+        cutoff = now - timedelta(seconds=Config.LIFECYCLE_SIGNAL_TIMEOUT)
+        try:
+            result = db.session.execute(
+                update(Flight)
+                .where(Flight.status == 'active', Flight.updated_at < cutoff)
+                .values(status=case((Flight.on_ground.is_(True), 'landed'), else_='lost'), updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+        except Exception as e:
+            self.logger.error(f"Error sweeping lost flights: {str(e)}")
+            db.session.rollback()
+            return 0
+        
+        if result.rowcount:
+            self.logger.info(f"Closed {result.rowcount} flights not updated since {cutoff.isoformat()}")
+        return result.rowcount
+
+    def _emit_changes(self, changed, stale):
+        """
+        Push changed and departed aircraft to clients of the /adsb namespace
+        
+        Args:
+            changed: Normalized states of new and updated aircraft
+            stale: ICAO addresses (icao_int) of aircraft that stopped reporting
+        """
+        try:
+            if changed:
+                aircraft = self.live_store.get_many(state['icao_int'] for state in changed)
+                socketio.emit('aircraft_update', aircraft, namespace='/adsb')
+            if stale:
+                socketio.emit('aircraft_removed', {'icao_codes': ints_to_icao(stale)}, namespace='/adsb')
+        except Exception as e:
+            self.logger.error(f"Error emitting aircraft updates: {str(e)}")
+
+    def _write_states(self, states):
+        """
+        Persist normalized states to the database and the Redis cache
+        
+        Args:
+            states: List of dicts produced by normalize_state
             
-            # Cache the data for quick retrieval
-            self._cache_flight_data(flight)
+        Returns:
+            dict: Ingest statistics with per-phase timings
+        """
+        by_icao = {state['icao_int']: state for state in states}
+        
+        result = self.ingestor.ingest(states, lifecycle=self.lifecycle)
+        self.live_store.set_flight_ids(result['flights'])
+        self.lifecycle.set_flight_ids(result['flights'])
+        
+        # Record position history, written in batches every POSITION_FLUSH_INTERVAL seconds
+        phase = time.perf_counter()
+        result['positions_queued'] = self.position_writer.extend(result['flights'], by_icao)
+        result['positions_written'] = self.position_writer.flush_if_due()
+        result['timings']['positions'] = time.perf_counter() - phase
+        
+        # Cache the data for quick retrieval
+        phase = time.perf_counter()
+        self._cache_flight_data(result['flights'], by_icao)
+        result['timings']['cache'] = time.perf_counter() - phase
+        
+        timings = ', '.join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in result['timings'].items())
+        self.logger.info(
+            f"Ingested {result['states']} states ({result['aircraft_created']} new aircraft, "
+            f"{result['flights_created']} new flights, {result['flights_updated']} updated, "
+            f"{result['legs_closed']} legs closed, "
+            f"{result['skipped']} skipped, {result['positions_queued']} positions queued, "
+            f"{result['positions_written']} written): {timings}"
+        )
+        self.last_ingest_stats = {key: value for key, value in result.items() if key != 'flights'}
+        
+        return result
 
-    def _cache_flight_data(self, flight):
+    def _cache_flight_data(self, flights, by_icao):
         """
         Cache flight data in Redis for quick retrieval
         
+        The whole snapshot is written with CacheService.set_many, i.e. one
+        pipelined round trip per CACHE_BATCH_SIZE flights, in the fixed
+        'flight' record layout (see app.utils.cache_codec).
+        
         Args:
-            flight: Flight object to cache
+            flights: Dict of ICAO address -> dict with the flight's id, aircraft_id, flight_number and status
+            by_icao: Dict of ICAO address -> normalized state the flight was updated from
         """
         try:
-            # Create cache key
-            cache_key = f"flight:{flight.id}"
-            
-            # Prepare data to cache
-            flight_data = {
-                'id': flight.id,
-                'flight_number': flight.flight_number,
-                'callsign': flight.callsign,
-                'aircraft_id': flight.aircraft_id,
-                'latitude': flight.latitude,
-                'longitude': flight.longitude,
-                'altitude': flight.altitude,
-                'ground_speed': flight.ground_speed,
-                'heading': flight.heading,
-                'on_ground': flight.on_ground,
-                'squawk': flight.squawk,
-                'status': flight.status,
-                'last_position_update': flight.last_position_update.isoformat() if flight.last_position_update else None
-            }
+            entries = {}
+            for icao, flight in flights.items():
+                state = by_icao[icao]
+                entries[f"flight:{flight['id']}"] = {
+                    'id': flight['id'],
+                    'flight_number': flight['flight_number'],
+                    'callsign': state['callsign'],
+                    'aircraft_id': flight['aircraft_id'],
+                    'latitude': state['latitude'],
+                    'longitude': state['longitude'],
+                    'altitude': state['altitude'],
+                    'ground_speed': state['ground_speed'],
+                    'heading': state['heading'],
+                    'on_ground': state['on_ground'],
+                    'squawk': state['squawk'],
+                    'status': flight['status'],
+                    'last_position_update': state['last_position_update'].isoformat() if state['last_position_update'] else None
+                }
             
             # Store in Redis with expiration (10 minutes)
-            redis_client.setex(cache_key, 600, str(flight_data))
+            if entries:
+                cache_service.set_many(entries, ttl=600, serializer='flight')
             
         except Exception as e:
             self.logger.error(f"Error caching flight data: {str(e)}")
 
+    def start_background_polling(self, app, interval=None):
+        """
+        Poll the ADS-B API from a daemon thread so this process keeps its live store current
+        
+        With ADSB_ADAPTIVE_POLLING the ADSB_REGION_SHARDS boxes are polled by
+        an AdaptivePollScheduler, which picks each region's cadence from its
+        change rate and the remaining upstream credits, instead of every
+        interval seconds.
+        
+        Args:
+            app: Flask application used to push an app context for each poll
+            interval: Seconds between polls (defaults to Config.ADSB_POLL_INTERVAL)
+        """
+        interval = interval or Config.ADSB_POLL_INTERVAL
+        airport_index.load()
+        if Config.ADSB_ADAPTIVE_POLLING:
+            self.scheduler = AdaptivePollScheduler(self.shard_poller, self.upstream.credits, region_shards())
+        
+        def poll():
+            while True:
+                delay = interval
+                try:
+                    with app.app_context():
+                        if self.scheduler is not None:
+                            delay = self.scheduler.run_once()
+                        elif Config.ADSB_REGION_SHARDS:
+                            self.shard_poller.poll_regions()
+                        else:
+                            self.fetch_current_states(stream=True)
+                except Exception as e:
+                    self.logger.error(f"Error in background ADS-B poll: {str(e)}")
+                time.sleep(delay)
+        
+        thread = threading.Thread(target=poll, daemon=True)
+        thread.start()
+        if self.scheduler is not None:
+            self.logger.info(f"Started adaptive ADS-B polling of {len(self.scheduler.regions)} regions")
+        else:
+            self.logger.info(f"Started background ADS-B polling every {interval}s")
+        return thread
+
+    def ingest_source(self, source, max_batches=None):
+        """
+        Feed every batch produced by a source adapter through process_states
+        
+        Args:
+            source: StateSource adapter (REST, SBS, Beast/AVR or file replay)
+            max_batches: Stop after this many batches (optional)
+            
+        Returns:
+            dict: Batch and state counts, summed diff counts and throughput
+        """
+        summary = {'batches': 0, 'states': 0, 'new': 0, 'updated': 0, 'unchanged': 0, 'stale': 0,
+                   'duplicates': 0, 'out_of_order': 0}
+        started = time.perf_counter()
+        
+        try:
+            for states in source.normalized_batches():
+                result = self.process_states(states)
+                summary['batches'] += 1
+                summary['states'] += len(states)
+                for key in ('new', 'updated', 'unchanged', 'stale', 'duplicates', 'out_of_order'):
+                    summary[key] += result.get(key, 0)
+                if max_batches and summary['batches'] >= max_batches:
+                    break
+        finally:
+            source.close()
+        
+        summary['elapsed'] = time.perf_counter() - started
+        summary['states_per_second'] = summary['states'] / summary['elapsed'] if summary['elapsed'] else 0.0
+        return summary
+
+    def start_source_listener(self, app, source_name=None):
+        """
+        Consume a streaming receiver feed (Config.ADSB_SOURCE) from a daemon thread
+        
+        The connection is re-established with exponential backoff (up to a
+        minute) whenever the feed drops.
+        
+        Args:
+            app: Flask application used to push an app context for the ingest
+            source_name: 'sbs', 'beast' or 'avr' (defaults to Config.ADSB_SOURCE)
+        """
+        airport_index.load()
+        
+        def listen():
+            delay = 1
+            while True:
+                try:
+                    with app.app_context():
+                        self.ingest_source(create_source(source_name))
+                    delay = 1
+                except Exception as e:
+                    self.logger.error(f"Error reading ADS-B source feed: {str(e)}")
+                time.sleep(delay)
+                delay = min(delay * 2, 60)
+        
+        thread = threading.Thread(target=listen, daemon=True)
+        thread.start()
+        self.logger.info(f"Started ADS-B {source_name or Config.ADSB_SOURCE} source listener")
+        return thread
+
+    def start_position_emitter(self):
+        """
+        Push dead-reckoned positions of moving aircraft to /adsb clients every
+        Config.LIVE_EXTRAPOLATION_INTERVAL seconds, between upstream updates
+        """
+        if not live_position_emitter.interval:
+            return
+        
+        def emit(positions):
+            socketio.emit('aircraft_positions', positions, namespace='/adsb')
+        
+        live_position_emitter.ensure_started(emit)
+
+    def start_ingest(self, app):
+        """
+        Keep the live state current from a single process of the deployment
+        
+        Every web worker calls this, but the receiver feed listener (ADSB_SOURCE
+        other than rest) or the background poller (ADSB_POLL_INTERVAL), and the
+        position emitter, only run in the process holding the ingest lock
+        (see IngestLeader). The other workers serve /flights/active from SQL.
+        
+        Args:
+            app: Flask application used to push app contexts for the ingest
+        """
+        def start():
+            if app.config.get('ADSB_SOURCE', 'rest') != 'rest':
+                self.start_source_listener(app)
+            else:
+                self.start_background_polling(app)
+            self.start_position_emitter()
+        
+        ingest_leader.ensure_started(start)
+
     def get_cached_flight(self, flight_id):
         """
         Retrieve cached flight data from Redis
@@ -173,13 +522,7 @@ class ADSBService:
             dict: Cached flight data or None if not found
         """
         try:
-            cache_key = f"flight:{flight_id}"
-            cached_data = redis_client.get(cache_key)
-            
-            if cached_data:
-                return eval(cached_data.decode('utf-8'))
-                
-            return None
+            return cache_service.get(f"flight:{flight_id}")
             
         except Exception as e:
             self.logger.error(f"Error retrieving cached flight data: {str(e)}")
@@ -205,16 +548,13 @@ class ADSBService:
             end_timestamp = int(end_time.timestamp())
             
             # Make request to historical ADS-B API
-            url = f"{self.base_url}/tracks/all"
             params = {
                 'icao24': icao_code.lower(),
                 'start': start_timestamp,
                 'end': end_timestamp
             }
             
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            
+            response = self.upstream.get('/tracks/all', params=params)
             return response.json()
             
         except requests.exceptions.RequestException as e:
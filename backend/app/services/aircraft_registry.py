@@ -0,0 +1,423 @@
+import csv
+import logging
+import threading
+import time
+from datetime import date, datetime
+import numpy as np
+from sqlalchemy import delete, func, inspect, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from extensions import db
+from app.models import Aircraft, Flight, Image
+from app.services.cache_service import cache_service
+from app.utils.icao import icao_to_int, icao_to_ints, int_to_icao
+
+
+# Registry CSV header (lower-cased) -> Aircraft column; OpenSky aircraftDatabase.csv names and our own are accepted
+REGISTRY_COLUMNS = {
+    'icao24': 'icao_code',
+    'icao_code': 'icao_code',
+    'registration': 'registration',
+    'model': 'model',
+    'typecode': 'type_code',
+    'type_code': 'type_code',
+    'serialnumber': 'serial_number',
+    'serial_number': 'serial_number',
+    'operator': 'operator',
+    'airline': 'airline',
+    'built': 'built_date',
+    'built_date': 'built_date',
+    'firstflightdate': 'first_flight_date',
+    'first_flight_date': 'first_flight_date',
+    'registered': 'registration_date',
+    'registration_date': 'registration_date',
+    'reguntil': 'registration_expiry',
+    'registration_expiry': 'registration_expiry',
+}
+
+# Used when the primary column is missing or empty
+FALLBACK_COLUMNS = {'owner': 'operator'}
+
+STRING_LIMITS = {'registration': 10, 'model': 100, 'type_code': 10, 'serial_number': 50,
+                 'operator': 100, 'airline': 100}
+DATE_FIELDS = ('built_date', 'first_flight_date', 'registration_date', 'registration_expiry')
+METADATA_FIELDS = tuple(STRING_LIMITS) + DATE_FIELDS
+
+
+def _parse_date(value):
+    """Parse the date part of an ISO-like string, or None"""
+    try:
+        return date.fromisoformat(value[:10])
+    except (TypeError, ValueError):
+        return None
+
+
+class AircraftRegistryImporter:
+    """
+    Bulk loader for aircraft registry CSV files
+
+    Rows are read as a stream and upserted into aircraft in batches keyed on
+    icao_code (ON CONFLICT DO UPDATE on PostgreSQL and SQLite). Registry
+    values overwrite stored ones, but empty registry fields never erase
+    data. Registrations are unique: a registration seen earlier in the file
+    is dropped from later rows, and stored aircraft holding a registration
+    that the registry assigns elsewhere lose it.
+    """
+
+    def __init__(self, batch_size=5000):
+        self.batch_size = batch_size
+        self.logger = logging.getLogger(__name__)
+
+    def import_file(self, path):
+        """
+        Import a registry CSV file
+
+        Args:
+            path: CSV with a header row (e.g. OpenSky's aircraftDatabase.csv)
+
+        Returns:
+            dict: Numbers of rows read, upserted and skipped, batches and elapsed seconds
+        """
+        started = time.perf_counter()
+        summary = {'rows': 0, 'upserted': 0, 'skipped': 0, 'batches': 0}
+        seen_registrations = set()
+        batch = {}
+
+        with open(path, newline='', encoding='utf-8', errors='replace') as handle:
+            reader = csv.reader(handle)
+            header = [name.strip().strip("'").lower() for name in next(reader, [])]
+            columns = [(index, REGISTRY_COLUMNS[name]) for index, name in enumerate(header) if name in REGISTRY_COLUMNS]
+            fallbacks = [(index, FALLBACK_COLUMNS[name]) for index, name in enumerate(header) if name in FALLBACK_COLUMNS]
+            if not any(field == 'icao_code' for _, field in columns):
+                raise ValueError("Registry file has no icao24/icao_code column")
+
+            for values in reader:
+                summary['rows'] += 1
+                row = self._row(values, columns, fallbacks)
+                if row is None:
+                    summary['skipped'] += 1
+                    continue
+
+                registration = row['registration']
+                if registration is not None:
+                    if registration in seen_registrations:
+                        row['registration'] = None
+                    else:
+                        seen_registrations.add(registration)
+
+                batch[row['icao_code']] = row  # A repeated ICAO code keeps its last row
+                if len(batch) >= self.batch_size:
+                    summary['upserted'] += self._upsert(list(batch.values()))
+                    summary['batches'] += 1
+                    batch = {}
+
+        if batch:
+            summary['upserted'] += self._upsert(list(batch.values()))
+            summary['batches'] += 1
+
+        summary['elapsed'] = time.perf_counter() - started
+        cache_service.invalidate_namespace('aircraft')
+        self.logger.info(
+            f"Imported {summary['upserted']} aircraft from {summary['rows']} registry rows "
+            f"({summary['skipped']} skipped) in {summary['elapsed']:.1f}s"
+        )
+        return summary
+
+    @staticmethod
+    def _row(values, columns, fallbacks):
+        """Convert one CSV record into an aircraft row, or None if it has no valid ICAO code"""
+        row = dict.fromkeys(METADATA_FIELDS)
+        for index, field in columns:
+            if index < len(values):
+                value = values[index].strip().strip("'").strip()
+                row[field] = value or None
+        for index, field in fallbacks:
+            if row.get(field) is None and index < len(values):
+                row[field] = values[index].strip().strip("'").strip() or None
+
+        icao_int = icao_to_int(row.pop('icao_code', None))
+        if icao_int is None:
+            return None
+        row['icao_code'] = int_to_icao(icao_int)
+        row['icao_int'] = icao_int
+
+        for field in DATE_FIELDS:
+            row[field] = _parse_date(row[field])
+        for field, limit in STRING_LIMITS.items():
+            value = row[field]
+            if value is not None and len(value) > limit:
+                # Over-long registrations are not valid marks; other text is truncated
+                row[field] = None if field == 'registration' else value[:limit]
+        if row['registration']:
+            row['registration'] = row['registration'].upper()
+        return row
+
+    def _upsert(self, rows):
+        """
+        Upsert one batch of aircraft rows and commit
+
+        Returns:
+            int: Number of rows written
+        """
+        now = datetime.utcnow()
+        for row in rows:
+            row['created_at'] = now
+            row['updated_at'] = now
+
+        try:
+            registrations = [row['registration'] for row in rows if row['registration']]
+            for start in range(0, len(registrations), 500):
+                # Free registrations the registry assigns to these aircraft; the upsert sets them again
+                db.session.execute(
+                    update(Aircraft)
+                    .where(Aircraft.registration.in_(registrations[start:start + 500]))
+                    .values(registration=None)
+                    .execution_options(synchronize_session=False)
+                )
+
+            dialect = db.session.get_bind().dialect.name
+            if dialect in ('postgresql', 'sqlite'):
+                insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+                # Core table insert: one executemany, where the ORM would split rows by their NULL columns
+                table = Aircraft.__table__
+                statement = insert(table)
+                statement = statement.on_conflict_do_update(
+                    index_elements=[table.c.icao_code],
+                    set_={
+                        **{field: func.coalesce(statement.excluded[field], table.c[field])
+                           for field in METADATA_FIELDS},
+                        'icao_int': statement.excluded.icao_int,
+                        'updated_at': statement.excluded.updated_at
+                    }
+                )
+                db.session.execute(statement, rows)
+            else:
+                self._upsert_generic(rows)
+
+            db.session.commit()
+
+        except Exception as e:
+            self.logger.error(f"Error importing aircraft registry batch: {str(e)}")
+            db.session.rollback()
+            raise
+
+        return len(rows)
+
+    @staticmethod
+    def _upsert_generic(rows):
+        """Upsert for dialects without ON CONFLICT: update existing rows, insert the rest"""
+        existing = dict(db.session.execute(
+            select(Aircraft.icao_code, Aircraft.id).where(Aircraft.icao_code.in_([row['icao_code'] for row in rows]))
+        ).all())
+        updates = []
+        inserts = []
+        for row in rows:
+            aircraft_id = existing.get(row['icao_code'])
+            if aircraft_id is None:
+                inserts.append(row)
+            else:
+                changes = {field: value for field, value in row.items()
+                           if value is not None and field not in ('icao_code', 'created_at')}
+                updates.append({'id': aircraft_id, **changes})
+        if updates:
+            db.session.bulk_update_mappings(Aircraft, updates)
+        if inserts:
+            db.session.bulk_insert_mappings(Aircraft, inserts)
+
+
+def migrate_icao_int(batch_size=5000):
+    """
+    Add and fill aircraft.icao_int on a database created before the column existed
+
+    The column is added if missing and filled from icao_code in ID-ordered
+    batches (codes that are not six hex digits stay NULL). Aircraft whose
+    codes differ only in case, e.g. one created upper-case through the API
+    and one lower-case by ingest, are merged into the oldest row: their
+    flights and images move to it and it takes over registry fields it
+    lacks. Codes are then lower-cased and the unique index on icao_int is
+    created. Safe to run again; each step skips work already done.
+
+    Args:
+        batch_size: Aircraft per backfill batch
+
+    Returns:
+        dict: Numbers of rows backfilled, merged away and lower-cased
+    """
+    logger = logging.getLogger(__name__)
+    table = Aircraft.__table__
+    summary = {'backfilled': 0, 'merged': 0, 'lowercased': 0}
+
+    try:
+        if 'icao_int' not in {column['name'] for column in inspect(db.session.connection()).get_columns('aircraft')}:
+            db.session.execute(text("ALTER TABLE aircraft ADD COLUMN icao_int INTEGER"))
+            db.session.commit()
+
+        last_id = 0
+        while True:
+            rows = db.session.execute(
+                select(table.c.id, table.c.icao_code)
+                .where(table.c.id > last_id, table.c.icao_int.is_(None))
+                .order_by(table.c.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            values = icao_to_ints([row.icao_code for row in rows]).tolist()
+            updates = [{'id': row.id, 'icao_int': value} for row, value in zip(rows, values) if value >= 0]
+            if updates:
+                db.session.bulk_update_mappings(Aircraft, updates)
+            db.session.commit()
+            summary['backfilled'] += len(updates)
+
+        duplicates = db.session.execute(
+            select(table.c.icao_int).where(table.c.icao_int.isnot(None))
+            .group_by(table.c.icao_int).having(func.count() > 1)
+        ).scalars().all()
+        for icao_int in duplicates:
+            rows = db.session.execute(
+                select(table).where(table.c.icao_int == icao_int).order_by(table.c.id)
+            ).mappings().all()
+            keeper, others = rows[0], rows[1:]
+            other_ids = [row['id'] for row in others]
+            filled = {field: next((row[field] for row in others if row[field] is not None), None)
+                      for field in METADATA_FIELDS if keeper[field] is None}
+            for model in (Flight, Image):
+                db.session.execute(
+                    update(model).where(model.aircraft_id.in_(other_ids)).values(aircraft_id=keeper['id'])
+                    .execution_options(synchronize_session=False)
+                )
+            # Core delete: the ORM cascade would take the moved flights with it
+            db.session.execute(delete(table).where(table.c.id.in_(other_ids)))
+            filled = {field: value for field, value in filled.items() if value is not None}
+            if filled:
+                db.session.execute(update(table).where(table.c.id == keeper['id']).values(**filled))
+            summary['merged'] += len(other_ids)
+        db.session.commit()
+
+        summary['lowercased'] = db.session.execute(
+            update(table)
+            .where(table.c.icao_int.isnot(None), table.c.icao_code != func.lower(table.c.icao_code))
+            .values(icao_code=func.lower(table.c.icao_code))
+        ).rowcount
+        db.session.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ix_aircraft_icao_int ON aircraft (icao_int)"))
+        db.session.commit()
+
+    except Exception as e:
+        logger.error(f"Error migrating aircraft ICAO addresses: {str(e)}")
+        db.session.rollback()
+        raise
+
+    aircraft_index.invalidate()
+    cache_service.invalidate_namespace('aircraft')
+    logger.info(
+        f"Migrated aircraft ICAO addresses: {summary['backfilled']} backfilled, "
+        f"{summary['merged']} duplicates merged, {summary['lowercased']} lower-cased"
+    )
+    return summary
+
+
+class AircraftIndex:
+    """
+    Compact in-process map of 24-bit ICAO address (icao_int) to aircraft ID
+
+    Known aircraft are held in two sorted NumPy arrays (uint32 addresses,
+    int64 IDs; about 12 bytes per aircraft) searched with searchsorted, so
+    resolving a snapshot does not query the database. Aircraft added after
+    loading sit in a small dict that is merged into the arrays once it grows.
+    The index loads itself from the aircraft table on first use and can be
+    invalidated to reload, e.g. after a failed write.
+    """
+
+    def __init__(self, merge_threshold=4096):
+        self.merge_threshold = merge_threshold
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._keys = np.empty(0, dtype=np.uint32)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._recent = {}  # ICAO address -> aircraft ID, not yet merged
+        self._loaded = False
+
+    def __len__(self):
+        return len(self._keys) + len(self._recent)
+
+    def load(self):
+        """Read every (icao_int, id) pair from the aircraft table"""
+        started = time.perf_counter()
+        keys = []
+        ids = []
+        rows = db.session.execute(
+            select(Aircraft.icao_int, Aircraft.id).where(Aircraft.icao_int.isnot(None))
+        ).yield_per(50000)
+        for icao_int, aircraft_id in rows:
+            keys.append(icao_int)
+            ids.append(aircraft_id)
+
+        keys = np.array(keys, dtype=np.uint32)
+        ids = np.array(ids, dtype=np.int64)
+        order = np.argsort(keys, kind='stable')
+        with self._lock:
+            self._keys = keys[order]
+            self._ids = ids[order]
+            self._recent = {}
+            self._loaded = True
+        self.logger.info(f"Loaded {len(keys)} aircraft into the ICAO index in {time.perf_counter() - started:.2f}s")
+
+    def invalidate(self):
+        """Drop the index so the next lookup reloads it"""
+        with self._lock:
+            self._loaded = False
+
+    def lookup(self, icao_ints):
+        """
+        Resolve ICAO addresses to aircraft IDs
+
+        Args:
+            icao_ints: List of 24-bit integer ICAO addresses
+
+        Returns:
+            dict: Mapping of ICAO address to aircraft ID for the addresses in the index
+        """
+        if not self._loaded:
+            self.load()
+
+        with self._lock:
+            sorted_keys, sorted_ids, recent = self._keys, self._ids, self._recent
+            found = {}
+            if len(sorted_keys) and len(icao_ints):
+                keys = np.array(icao_ints, dtype=np.uint32)
+                positions = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+                hits = np.flatnonzero(sorted_keys[positions] == keys)
+                found = dict(zip(keys[hits].tolist(), sorted_ids[positions[hits]].tolist()))
+            if recent:
+                for key in icao_ints:
+                    if key in recent:
+                        found[key] = recent[key]
+        return found
+
+    def add(self, aircraft_ids):
+        """
+        Record aircraft resolved or created outside the index
+
+        Args:
+            aircraft_ids: Mapping of ICAO address to aircraft ID
+        """
+        with self._lock:
+            self._recent.update(aircraft_ids)
+            if len(self._recent) >= max(self.merge_threshold, len(self._keys) // 8):
+                self._merge()
+
+    def _merge(self):
+        """Fold the recent additions into the sorted arrays (lock held)"""
+        extra_keys = np.fromiter(self._recent.keys(), dtype=np.uint32, count=len(self._recent))
+        extra_ids = np.fromiter(self._recent.values(), dtype=np.int64, count=len(self._recent))
+        keep = ~np.isin(self._keys, extra_keys)
+        keys = np.concatenate((self._keys[keep], extra_keys))
+        ids = np.concatenate((self._ids[keep], extra_ids))
+        order = np.argsort(keys, kind='stable')
+        self._keys = keys[order]
+        self._ids = ids[order]
+        self._recent = {}
+
+
+# Shared by every ADSBIngestor in the process
+aircraft_index = AircraftIndex()
@@ -0,0 +1,239 @@
+import csv
+import logging
+import math
+import os
+import threading
+import numpy as np
+from scipy.spatial import cKDTree
+from sqlalchemy import or_, select
+from config import Config
+from extensions import db
+from app.models import Flight
+from app.services.position_partitions import position_storage
+from app.utils.geo import EARTH_RADIUS_M
+
+
+FEET_TO_METERS = 0.3048
+
+DEFAULT_AIRPORTS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'airports.csv')
+
+
+def _unit_vectors(latitude, longitude):
+    """Points on the unit sphere for arrays of coordinates in degrees"""
+    phi = np.radians(np.asarray(latitude, dtype=np.float64))
+    lam = np.radians(np.asarray(longitude, dtype=np.float64))
+    cos_phi = np.cos(phi)
+    return np.column_stack((cos_phi * np.cos(lam), cos_phi * np.sin(lam), np.sin(phi)))
+
+
+class AirportIndex:
+    """
+    Nearest-airport lookup over the bundled airport reference data
+
+    Airports are indexed as points on the unit sphere in a KD-tree, where the
+    nearest chord is also the nearest great-circle distance, so a lookup is a
+    single tree query instead of a haversine scan. A match must lie within
+    max_distance meters and, when an altitude is given, the aircraft must be
+    within max_height meters of the airport elevation.
+
+    The data file is a CSV with icao, iata, name, country, latitude,
+    longitude and elevation_ft columns (app/data/airports.csv by default).
+    """
+
+    def __init__(self, path=None, max_distance=None, max_height=None):
+        self.path = path or Config.AIRPORTS_DATA_PATH or DEFAULT_AIRPORTS_PATH
+        self.max_distance = max_distance if max_distance is not None else Config.AIRPORT_MAX_DISTANCE
+        self.max_height = max_height if max_height is not None else Config.AIRPORT_MAX_HEIGHT
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._tree = None
+        self._max_chord = 2 * math.sin(self.max_distance / (2 * EARTH_RADIUS_M))
+
+    def load(self):
+        """Read the airport data and build the tree (once per process)"""
+        with self._lock:
+            if self._tree is not None:
+                return
+
+            codes, iata, names, countries, latitude, longitude, elevation = [], [], [], [], [], [], []
+            with open(self.path, newline='', encoding='utf-8') as handle:
+                for row in csv.DictReader(handle):
+                    codes.append(row['icao'])
+                    iata.append(row['iata'] or None)
+                    names.append(row['name'])
+                    countries.append(row['country'] or None)
+                    latitude.append(float(row['latitude']))
+                    longitude.append(float(row['longitude']))
+                    elevation.append(float(row['elevation_ft']) * FEET_TO_METERS if row['elevation_ft'] else np.nan)
+
+            self.codes = codes
+            self.iata = iata
+            self.names = names
+            self.countries = countries
+            self.latitude = np.array(latitude)
+            self.longitude = np.array(longitude)
+            self.elevation = np.array(elevation)
+            self._tree = cKDTree(_unit_vectors(self.latitude, self.longitude))
+            self.logger.info(f"Loaded {len(codes)} airports from {self.path}")
+
+    def __len__(self):
+        self.load()
+        return len(self.codes)
+
+    def nearest_indexes(self, latitude, longitude, altitude=None):
+        """
+        Resolve arrays of positions to airport row indexes
+
+        Args:
+            latitude, longitude: Arrays of positions in degrees
+            altitude: Optional array of altitudes in meters (NaN skips the height check)
+
+        Returns:
+            tuple: (index array, distance array in meters); index is -1 where no
+                   airport matched
+        """
+        self.load()
+        latitude = np.asarray(latitude, dtype=np.float64)
+        longitude = np.asarray(longitude, dtype=np.float64)
+        valid = np.isfinite(latitude) & np.isfinite(longitude)
+        indexes = np.full(latitude.shape, -1, dtype=np.int64)
+        distances = np.full(latitude.shape, np.inf)
+        if not valid.any():
+            return indexes, distances
+
+        chord, found = self._tree.query(_unit_vectors(latitude[valid], longitude[valid]),
+                                        distance_upper_bound=self._max_chord)
+        matched = np.isfinite(chord)
+        found = np.where(matched, found, -1)
+
+        if altitude is not None:
+            height = np.asarray(altitude, dtype=np.float64)[valid] - self.elevation[np.maximum(found, 0)]
+            found = np.where(height > self.max_height, -1, found)  # NaN heights pass
+
+        indexes[valid] = found
+        distances[valid] = np.where(found >= 0, 2 * EARTH_RADIUS_M * np.arcsin(np.minimum(chord, 2.0) / 2), np.inf)
+        return indexes, distances
+
+    def nearest_codes(self, latitude, longitude, altitude=None):
+        """
+        Resolve arrays of positions to ICAO airport codes
+
+        Returns:
+            list: ICAO code or None for every position
+        """
+        indexes, _ = self.nearest_indexes(latitude, longitude, altitude)
+        return [self.codes[index] if index >= 0 else None for index in indexes.tolist()]
+
+    def nearest(self, latitude, longitude, altitude=None):
+        """
+        Find the airport nearest to one position
+
+        Args:
+            latitude, longitude: Position in degrees
+            altitude: Optional altitude in meters
+
+        Returns:
+            dict: icao, iata, name, country, latitude, longitude and distance (meters), or None
+        """
+        if latitude is None or longitude is None:
+            return None
+        self.load()
+
+        # Scalar path: a single tree query without building intermediate arrays
+        phi, lam = math.radians(latitude), math.radians(longitude)
+        chord, index = self._tree.query(
+            (math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi)),
+            distance_upper_bound=self._max_chord
+        )
+        if math.isinf(chord):
+            return None
+        if altitude is not None and altitude - self.elevation[index] > self.max_height:
+            return None
+        return {
+            'icao': self.codes[index],
+            'iata': self.iata[index],
+            'name': self.names[index],
+            'country': self.countries[index],
+            'latitude': float(self.latitude[index]),
+            'longitude': float(self.longitude[index]),
+            'distance': 2 * EARTH_RADIUS_M * math.asin(min(chord, 2.0) / 2)
+        }
+
+    def nearest_code(self, latitude, longitude, altitude=None):
+        """ICAO code of the airport nearest to one position, or None"""
+        airport = self.nearest(latitude, longitude, altitude)
+        return airport['icao'] if airport else None
+
+
+def backfill_flight_airports(index, batch_size=500):
+    """
+    Fill missing departure/arrival airports of stored flights from their positions
+
+    The first recorded position of a flight resolves its departure airport
+    and, for closed legs (landed or lost), the last one its arrival airport;
+    only those two positions are read per flight (see position_storage.endpoints).
+    Positions too far from or too high above any airport stay unresolved.
+    Flights are processed in ID order, one batch per commit.
+
+    Args:
+        index: AirportIndex to resolve positions with
+        batch_size: Flights per batch
+
+    Returns:
+        dict: Numbers of flights scanned and departure/arrival airports filled
+    """
+    logger = logging.getLogger(__name__)
+    closed = Flight.status.in_(('landed', 'lost'))
+    summary = {'flights': 0, 'departures': 0, 'arrivals': 0}
+    last_id = 0
+
+    while True:
+        flights = db.session.execute(
+            select(Flight.id, Flight.departure_airport, Flight.arrival_airport, closed.label('closed'))
+            .where(Flight.id > last_id)
+            .where(or_(Flight.departure_airport.is_(None), closed & Flight.arrival_airport.is_(None)))
+            .order_by(Flight.id)
+            .limit(batch_size)
+        ).all()
+        if not flights:
+            return summary
+        last_id = flights[-1].id
+
+        endpoints = position_storage.endpoints([flight.id for flight in flights])
+
+        wanted = []  # (flight ID, column, position row)
+        for flight_id, departure, arrival, is_closed in flights:
+            if flight_id not in endpoints:
+                continue
+            first, last = endpoints[flight_id]
+            if departure is None:
+                wanted.append((flight_id, 'departure_airport', first))
+            if is_closed and arrival is None:
+                wanted.append((flight_id, 'arrival_airport', last))
+
+        codes = index.nearest_codes(
+            [row.latitude for _, _, row in wanted],
+            [row.longitude for _, _, row in wanted],
+            [np.nan if row.altitude is None else row.altitude for _, _, row in wanted]
+        ) if wanted else []
+
+        updates = {}
+        for (flight_id, column, _), code in zip(wanted, codes):
+            if code:
+                updates.setdefault(flight_id, {'id': flight_id})[column] = code
+                summary['departures' if column == 'departure_airport' else 'arrivals'] += 1
+
+        try:
+            if updates:
+                db.session.bulk_update_mappings(Flight, list(updates.values()))
+            db.session.commit()
+        except Exception as e:
+            logger.error(f"Error backfilling flight airports: {str(e)}")
+            db.session.rollback()
+            raise
+
+        summary['flights'] += len(flights)
+
+
+# Loaded on first use, or at startup when this process ingests ADS-B data
+airport_index = AirportIndex()
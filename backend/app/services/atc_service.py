@@ -2,6 +2,12 @@ import logging
 from datetime import datetime
 from extensions import db
 from app.models import ATCMessage, Flight, User
+from app.services.cache_service import cache_service
+
+
+def airport_cache_namespace(airport_code):
+    """Cache namespace of the cached message list of one airport"""
+    return f"atc-airport:{airport_code}"
 
 
 class ATCService:
@@ -63,6 +69,8 @@ class ATCService:
             # Add to database
             db.session.add(atc_message)
             db.session.commit()
+            if airport_code:
+                cache_service.invalidate_namespace(airport_cache_namespace(airport_code))
             
             self.logger.info(f"Stored ATC message for frequency {frequency}, callsign {callsign}")
             
@@ -170,6 +178,8 @@ class ATCService:
             message.processed_at = datetime.utcnow()
             
             db.session.commit()
+            if message.airport_code:
+                cache_service.invalidate_namespace(airport_cache_namespace(message.airport_code))
             
             self.logger.info(f"Marked ATC message {message_id} as verified by user {verified_by_user_id}")
             
@@ -1,19 +1,46 @@
 import json
-import pickle
+import time
 from datetime import datetime, timedelta
+from config import Config
 from extensions import redis_client
+from app.services.near_cache import near_cache, cache_invalidation_listener
+from app.utils.cache_codec import CacheCodec
 
 
 class CacheService:
     """
     Service class for managing Redis cache operations
+    
+    With CACHE_NEAR_ENABLED, get() and get_json() are served from a bounded
+    in-process NearCache before going to Redis. Every write and delete made
+    through this class publishes an invalidation that the other workers'
+    CacheInvalidationListener applies, so the near tier only lags Redis by
+    the pub/sub delivery time (and at most CACHE_NEAR_TTL if a message is
+    lost). Keys written to Redis directly bypass the invalidation and must
+    not be read through this class.
+    
+    set() and set_many() encode values with a CacheCodec: CACHE_SERIALIZER
+    (msgpack by default) or the serializer named in the call, compressed
+    above CACHE_COMPRESSION_THRESHOLD bytes. get() and get_many() decode
+    whatever serializer a value was written with.
     """
     
-    def __init__(self, default_ttl=3600):  # Default TTL: 1 hour
+    NAMESPACE_PREFIX = 'cache-namespace:'  # Version keys of invalidate_namespace()
+    
+    def __init__(self, default_ttl=3600, near=None, codec=None):  # Default TTL: 1 hour
         self.default_ttl = default_ttl
         self.redis_client = redis_client
+        self.codec = codec or CacheCodec()
+        self.batch_size = Config.CACHE_BATCH_SIZE
+        self.scan_count = Config.CACHE_SCAN_COUNT
+        near = Config.CACHE_NEAR_ENABLED if near is None else near
+        self.near_cache = near_cache if near else None
+        self.invalidation = cache_invalidation_listener if near else None
+        self.redis_hits = 0
+        self.redis_misses = 0
+        self.redis_errors = 0
 
-    def set(self, key, value, ttl=None):
+    def set(self, key, value, ttl=None, serializer=None):
         """
         Set a value in cache
         
@@ -21,23 +48,23 @@ class CacheService:
             key: Cache key
             value: Value to cache (will be serialized)
             ttl: Time-to-live in seconds (uses default if not provided)
+            serializer: Serializer name, e.g. 'flight' (uses the codec's default if not provided)
             
         Returns:
             bool: Success status
         """
         try:
             # Serialize the value
-            serialized_value = self._serialize(value)
+            serialized_value = self._serialize(value, serializer)
             
             # Use provided TTL or default
             ttl_to_use = ttl or self.default_ttl
             
             # Set in Redis
-            result = self.redis_client.setex(key, ttl_to_use, serialized_value)
-            
-            return result
+            return self._write([key], lambda pipe: pipe.setex(key, ttl_to_use, serialized_value))[0]
             
         except Exception as e:
+            self.redis_errors += 1
             print(f"Error setting cache: {str(e)}")
             return False
 
@@ -49,21 +76,14 @@ class CacheService:
             key: Cache key
             
         Returns:
-            Cached value or None if not found
+            Cached value or None if not found; values served from the near
+            cache are shared with other callers and must not be modified
         """
         try:
-            # Get from Redis
-            value = self.redis_client.get(key)
-            
-            if value is None:
-                return None
-                
-            # Deserialize the value
-            deserialized_value = self._deserialize(value)
-            
-            return deserialized_value
+            return self._read(key, 'codec', self._deserialize)
             
         except Exception as e:
+            self.redis_errors += 1
             print(f"Error getting cache: {str(e)}")
             return None
 
@@ -78,10 +98,11 @@ class CacheService:
             bool: Success status
         """
         try:
-            result = self.redis_client.delete(key)
+            result = self._write([key], lambda pipe: pipe.delete(key))[0]
             return result > 0  # Returns number of deleted keys, convert to boolean
             
         except Exception as e:
+            self.redis_errors += 1
             print(f"Error deleting cache: {str(e)}")
             return False
 
@@ -100,6 +121,7 @@ class CacheService:
             return result > 0
             
         except Exception as e:
+            self.redis_errors += 1
             print(f"Error checking cache existence: {str(e)}")
             return False
 
@@ -123,11 +145,10 @@ class CacheService:
             ttl_to_use = ttl or self.default_ttl
             
             # Set in Redis
-            result = self.redis_client.setex(key, ttl_to_use, json_value)
-            
-            return result
+            return self._write([key], lambda pipe: pipe.setex(key, ttl_to_use, json_value))[0]
             
         except Exception as e:
+            self.redis_errors += 1
             print(f"Error setting JSON cache: {str(e)}")
             return False
 
@@ -139,35 +160,256 @@ class CacheService:
             key: Cache key
             
         Returns:
-            Cached JSON value or None if not found
+            Cached JSON value or None if not found; values served from the
+            near cache are shared with other callers and must not be modified
         """
         try:
-            # Get from Redis
-            value = self.redis_client.get(key)
+            return self._read(key, 'json', lambda value: json.loads(value.decode('utf-8')))
             
-            if value is None:
-                return None
-                
-            # Deserialize from JSON
-            deserialized_value = json.loads(value.decode('utf-8'))
+        except Exception as e:
+            self.redis_errors += 1
+            print(f"Error getting JSON cache: {str(e)}")
+            return None
+
+    def get_many(self, keys):
+        """
+        Get several values from cache, CACHE_BATCH_SIZE keys per MGET
+        
+        Args:
+            keys: Iterable of cache keys
             
-            return deserialized_value
+        Returns:
+            dict: Cache key -> value for the keys that were found
+        """
+        try:
+            return self._read_many(keys, 'codec', self._deserialize)
             
         except Exception as e:
-            print(f"Error getting JSON cache: {str(e)}")
+            self.redis_errors += 1
+            print(f"Error getting many from cache: {str(e)}")
+            return {}
+
+    def get_many_json(self, keys):
+        """
+        Get several JSON values from cache, CACHE_BATCH_SIZE keys per MGET
+        
+        Args:
+            keys: Iterable of cache keys
+            
+        Returns:
+            dict: Cache key -> JSON value for the keys that were found
+        """
+        try:
+            return self._read_many(keys, 'json', lambda value: json.loads(value.decode('utf-8')))
+            
+        except Exception as e:
+            self.redis_errors += 1
+            print(f"Error getting many from JSON cache: {str(e)}")
+            return {}
+
+    def set_many(self, mapping, ttl=None, serializer=None):
+        """
+        Set several values in cache, one pipelined round trip per CACHE_BATCH_SIZE keys
+        
+        Args:
+            mapping: Dict of cache key -> value to cache (will be serialized)
+            ttl: Time-to-live in seconds for every key, or a dict of cache
+                 key -> TTL (keys missing from it use the default)
+            serializer: Serializer name for every value (uses the codec's default if not provided)
+            
+        Returns:
+            bool: Success status
+        """
+        try:
+            return self._write_many({key: self._serialize(value, serializer) for key, value in mapping.items()}, ttl)
+            
+        except Exception as e:
+            self.redis_errors += 1
+            print(f"Error setting many in cache: {str(e)}")
+            return False
+
+    def set_many_json(self, mapping, ttl=None):
+        """
+        Set several JSON-serializable values in cache, one pipelined round trip per CACHE_BATCH_SIZE keys
+        
+        Args:
+            mapping: Dict of cache key -> JSON-serializable value
+            ttl: Time-to-live in seconds for every key, or a dict of cache
+                 key -> TTL (keys missing from it use the default)
+            
+        Returns:
+            bool: Success status
+        """
+        try:
+            return self._write_many({key: json.dumps(value) for key, value in mapping.items()}, ttl)
+            
+        except Exception as e:
+            self.redis_errors += 1
+            print(f"Error setting many in JSON cache: {str(e)}")
+            return False
+
+    def delete_many(self, keys):
+        """
+        Delete several values from cache, CACHE_BATCH_SIZE keys per UNLINK
+        
+        Args:
+            keys: Iterable of cache keys
+            
+        Returns:
+            int: Number of deleted keys
+        """
+        try:
+            deleted = 0
+            for chunk in self._chunks(list(dict.fromkeys(keys))):
+                deleted += self._write(chunk, lambda pipe: pipe.unlink(*chunk))[0]
+            return deleted
+            
+        except Exception as e:
+            self.redis_errors += 1
+            print(f"Error deleting many from cache: {str(e)}")
+            return 0
+
+    def _read(self, key, codec, decode):
+        """
+        Read a key through the near cache
+        
+        Args:
+            key: Cache key
+            codec: Name of the decoding, so that get() and get_json() of the
+                   same key do not serve each other's values
+            decode: Callable turning the stored bytes into the value
+            
+        Returns:
+            Decoded value or None if not found
+        """
+        near = self.near_cache is not None and self.invalidation.ensure_started()
+        if near:
+            hit, entry = self.near_cache.get(key)
+            if hit and entry[0] == codec:
+                return entry[1]
+            token = self.near_cache.token(key)
+        
+        value = self.redis_client.get(key)
+        if value is None:
+            self.redis_misses += 1
             return None
+        self.redis_hits += 1
+        
+        decoded = decode(value)
+        if near:
+            self.near_cache.fill(key, (codec, decoded), len(value), token)
+        return decoded
+
+    def _read_many(self, keys, codec, decode):
+        """
+        Read keys through the near cache, fetching the rest with chunked MGETs
+        
+        Args:
+            keys: Iterable of cache keys
+            codec: Name of the decoding (see _read)
+            decode: Callable turning the stored bytes into the value
+            
+        Returns:
+            dict: Cache key -> decoded value for the keys that were found
+        """
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        tokens = {}
+        missing = keys
+        
+        near = self.near_cache is not None and self.invalidation.ensure_started()
+        if near:
+            missing = []
+            for key in keys:
+                hit, entry = self.near_cache.get(key)
+                if hit and entry[0] == codec:
+                    found[key] = entry[1]
+                else:
+                    tokens[key] = self.near_cache.token(key)
+                    missing.append(key)
+        
+        for chunk in self._chunks(missing):
+            for key, value in zip(chunk, self.redis_client.mget(chunk)):
+                if value is None:
+                    self.redis_misses += 1
+                    continue
+                self.redis_hits += 1
+                found[key] = decode(value)
+                if near:
+                    self.near_cache.fill(key, (codec, found[key]), len(value), tokens[key])
+        return found
+
+    def _write_many(self, serialized, ttl):
+        """
+        Write serialized values with SETEX, one pipeline per CACHE_BATCH_SIZE keys
+        
+        Args:
+            serialized: Dict of cache key -> serialized value
+            ttl: TTL for every key or a dict of cache key -> TTL
+            
+        Returns:
+            bool: Success status
+        """
+        ttls = ttl if isinstance(ttl, dict) else {}
+        default_ttl = (None if isinstance(ttl, dict) else ttl) or self.default_ttl
+        for chunk in self._chunks(list(serialized)):
+            self._write(chunk, lambda pipe: [pipe.setex(key, ttls.get(key) or default_ttl, serialized[key])
+                                             for key in chunk])
+        return True
+
+    def _write(self, keys, command):
+        """
+        Run Redis commands that change keys and invalidate the keys everywhere
+        
+        The commands and the invalidation message go out in one pipeline, so
+        a write costs a single round trip with or without the near cache.
+        
+        Args:
+            keys: Cache keys being changed
+            command: Callable issuing the commands on a pipeline
+            
+        Returns:
+            list: Results of the commands
+        """
+        pipe = self.redis_client.pipeline(transaction=False)
+        command(pipe)
+        if self.near_cache is not None:
+            pipe.publish(self.invalidation.channel, self.invalidation.message(keys))
+        results = pipe.execute()
+        if self.near_cache is not None:
+            self.near_cache.invalidate(keys)
+        return results
+
+    def _chunks(self, keys):
+        """Split keys into CACHE_BATCH_SIZE slices"""
+        return [keys[start:start + self.batch_size] for start in range(0, len(keys), self.batch_size)]
+
+    def stats(self):
+        """
+        Hit, miss and eviction counters of this process, per tier
+        
+        Returns:
+            dict: 'near' (None when disabled) and 'redis' counters; a near
+                  hit never reaches Redis, a near miss is followed by a
+                  Redis hit or miss
+        """
+        return {
+            'near': self.near_cache.stats() if self.near_cache is not None else None,
+            'redis': {'hits': self.redis_hits, 'misses': self.redis_misses, 'errors': self.redis_errors}
+        }
 
-    def _serialize(self, obj):
+    def _serialize(self, obj, serializer=None):
         """
         Serialize an object for storage in Redis
         
         Args:
             obj: Object to serialize
+            serializer: Serializer name (uses the codec's default if not provided)
             
         Returns:
             Serialized object as bytes
         """
-        return pickle.dumps(obj)
+        return self.codec.dumps(obj, serializer)
 
     def _deserialize(self, data):
         """
@@ -179,7 +421,7 @@ class CacheService:
         Returns:
             Deserialized object
         """
-        return pickle.loads(data)
+        return self.codec.loads(data)
 
     def increment(self, key, amount=1):
         """
@@ -193,10 +435,11 @@ class CacheService:
             New value after increment
         """
         try:
-            result = self.redis_client.incrby(key, amount)
+            result = self._write([key], lambda pipe: pipe.incrby(key, amount))[0]
             return result
             
         except Exception as e:
+            self.redis_errors += 1
             print(f"Error incrementing cache: {str(e)}")
             return None
 
@@ -212,10 +455,11 @@ class CacheService:
             bool: Success status
         """
         try:
-            result = self.redis_client.expire(key, ttl)
+            result = self._write([key], lambda pipe: pipe.expire(key, ttl))[0]
             return result
             
         except Exception as e:
+            self.redis_errors += 1
             print(f"Error setting expiration: {str(e)}")
             return False
 
@@ -223,6 +467,12 @@ class CacheService:
         """
         Delete all keys matching a pattern
         
+        Walks the keyspace with SCAN, CACHE_SCAN_COUNT keys per step, and
+        frees the matches with UNLINK in batches of CACHE_BATCH_SIZE, so
+        Redis keeps serving other clients in between and memory is reclaimed
+        in the background. Prefer invalidate_namespace() for families of keys
+        that are dropped together regularly.
+        
         Args:
             pattern: Pattern to match (e.g., "flight:*")
             
@@ -230,13 +480,22 @@ class CacheService:
             int: Number of deleted keys
         """
         try:
-            keys = self.redis_client.keys(pattern)
-            if keys:
-                result = self.redis_client.delete(*keys)
-                return result
-            return 0
+            deleted = 0
+            batch = []
+            for key in self.redis_client.scan_iter(match=pattern, count=self.scan_count):
+                batch.append(key)
+                if len(batch) >= self.batch_size:
+                    deleted += self.redis_client.unlink(*batch)
+                    batch = []
+            if batch:
+                deleted += self.redis_client.unlink(*batch)
+            if self.near_cache is not None:
+                self.near_cache.invalidate_pattern(pattern)
+                self.redis_client.publish(self.invalidation.channel, self.invalidation.message(pattern=pattern))
+            return deleted
             
         except Exception as e:
+            self.redis_errors += 1
             print(f"Error clearing pattern: {str(e)}")
             return 0
 
@@ -244,6 +503,9 @@ class CacheService:
         """
         Get all keys matching a pattern
         
+        Uses SCAN, so the result is not a point-in-time snapshot: keys added
+        or removed while it runs may or may not be included.
+        
         Args:
             pattern: Pattern to match (default: "*")
             
@@ -251,9 +513,80 @@ class CacheService:
             list: List of matching keys
         """
         try:
-            keys = self.redis_client.keys(pattern)
-            return [key.decode('utf-8') for key in keys]
+            keys = self.redis_client.scan_iter(match=pattern, count=self.scan_count)
+            return list(dict.fromkeys(key.decode('utf-8') for key in keys))  # SCAN may repeat keys
             
         except Exception as e:
+            self.redis_errors += 1
             print(f"Error getting keys: {str(e)}")
-            return []
\ No newline at end of file
+            return []
+
+    def namespaced(self, namespace, key):
+        """
+        Build the key of an entry in a versioned namespace
+        
+        The namespace's current version is part of the key, so after
+        invalidate_namespace() the old entries are simply never read again
+        and expire by their TTL. The version is read through the near cache,
+        which keeps it coherent across workers, so this usually costs no
+        round trip.
+        
+        Args:
+            namespace: Namespace name, e.g. "aircraft"
+            key: Key within the namespace
+            
+        Returns:
+            str: Cache key, e.g. "aircraft:v1718000000000:42"
+        """
+        return f"{namespace}:v{self.namespace_version(namespace)}:{key}"
+
+    def namespace_version(self, namespace):
+        """
+        Current version of a namespace
+        
+        A namespace without a version (new, or its version key was evicted)
+        starts at the current time in milliseconds, so it never returns to a
+        version whose entries may still be cached.
+        
+        Args:
+            namespace: Namespace name
+            
+        Returns:
+            int: Version number
+        """
+        version_key = f"{self.NAMESPACE_PREFIX}{namespace}"
+        version = self._read(version_key, 'version', int)
+        if version is None:
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.set(version_key, int(time.time() * 1000), nx=True)
+            pipe.get(version_key)
+            version = int(pipe.execute()[1])
+        return version
+
+    def invalidate_namespace(self, namespace):
+        """
+        Invalidate every entry of a namespace in O(1)
+        
+        Bumps the namespace's version instead of finding and deleting its
+        keys. The superseded entries stay in Redis until their TTL expires,
+        so namespaced entries should always be written with a TTL.
+        
+        Args:
+            namespace: Namespace name
+            
+        Returns:
+            int: New version number, or None on error
+        """
+        try:
+            version_key = f"{self.NAMESPACE_PREFIX}{namespace}"
+            self.namespace_version(namespace)  # Never INCR a missing version up from 1
+            return self._write([version_key], lambda pipe: pipe.incr(version_key))[0]
+            
+        except Exception as e:
+            self.redis_errors += 1
+            print(f"Error invalidating namespace: {str(e)}")
+            return None
+
+
+# Shared cache for services and routes
+cache_service = CacheService()
@@ -0,0 +1,203 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from config import Config
+from app.services.live_state_store import EPOCH
+
+
+GROUND = 'ground'
+AIRBORNE = 'airborne'
+
+TAKEOFF = 'takeoff'
+LANDING = 'landing'
+
+
+class FlightLifecycleTracker:
+    """
+    In-memory flight phase tracker that segments an airframe's reports into legs
+
+    Each aircraft is classified as on the ground or airborne from its
+    on_ground flag, falling back to ground speed and altitude when the flag
+    is missing. A change of phase only counts once it has persisted for
+    confirm_seconds, which filters flickering surface/airborne reports; the
+    confirmed transition becomes a takeoff or landing event, carrying the
+    time and position of the first report in the new phase, that the
+    ingestor applies to the aircraft's open flight (see ADSBIngestor.ingest).
+
+    After a landing the aircraft is parked: its reports no longer open a
+    new flight until the next takeoff. Aircraft not heard from within
+    signal_timeout seconds are expired so their open flight can be closed.
+    Time is the newest report seen, capped at the wall clock plus max_skew.
+    Records are kept in report order, so expiry pops from the front of an
+    OrderedDict.
+    """
+
+    def __init__(self, ground_speed=None, ground_altitude=None, confirm_seconds=None, signal_timeout=None,
+                 max_skew=None):
+        self.ground_speed = ground_speed if ground_speed is not None else Config.LIFECYCLE_GROUND_SPEED
+        self.ground_altitude = ground_altitude if ground_altitude is not None else Config.LIFECYCLE_GROUND_ALTITUDE
+        self.confirm_seconds = confirm_seconds if confirm_seconds is not None else Config.LIFECYCLE_CONFIRM_SECONDS
+        self.signal_timeout = signal_timeout if signal_timeout is not None else Config.LIFECYCLE_SIGNAL_TIMEOUT
+        self.max_skew = max_skew if max_skew is not None else Config.LIVE_STATE_MAX_SKEW
+        self._lock = threading.Lock()
+        self._records = OrderedDict()  # ICAO address (icao_int) -> phase record
+        self._transitions = {}  # ICAO address -> (event, datetime, (latitude, longitude, altitude)) not yet written
+        self.latest = 0.0  # Newest report time seen (clamped to now + max_skew), so replays expire by capture time
+
+    def phase(self, state):
+        """
+        Classify a state as GROUND or AIRBORNE
+
+        Returns:
+            str: The phase, or None if the state carries too little information
+        """
+        if state.get('on_ground') is not None:
+            return GROUND if state['on_ground'] else AIRBORNE
+        speed = state.get('ground_speed')
+        if speed is None:
+            return None
+        altitude = state.get('altitude')
+        if speed < self.ground_speed and (altitude is None or altitude < self.ground_altitude):
+            return GROUND
+        return AIRBORNE
+
+    @staticmethod
+    def _report_time(state):
+        """Epoch seconds of a report"""
+        return state.get('last_contact') or (state['last_position_update'] - EPOCH).total_seconds()
+
+    def observe(self, states):
+        """
+        Update the phase of every reported aircraft
+
+        Args:
+            states: List of fused normalized states
+
+        Returns:
+            set: ICAO addresses (icao_int) with a newly confirmed takeoff or landing
+        """
+        events = set()
+        ceiling = time.time() + self.max_skew
+        with self._lock:
+            for state in states:
+                icao = state['icao_int']
+                reported = self._report_time(state)
+                if reported > self.latest:
+                    self.latest = min(reported, ceiling)
+
+                record = self._records.get(icao)
+                if record is None:
+                    record = {'phase': None, 'pending': None, 'pending_since': None,
+                              'parked': False, 'flight_id': None}
+                    self._records[icao] = record
+                else:
+                    self._records.move_to_end(icao)
+                record['last_seen'] = reported
+
+                phase = self.phase(state)
+                if phase is None:
+                    continue
+                if record['phase'] is None or phase == record['phase']:
+                    record['phase'] = phase
+                    record['pending'] = None
+                    continue
+
+                if record['pending'] != phase:
+                    record['pending'] = phase
+                    record['pending_since'] = reported
+                    record['pending_position'] = (state.get('latitude'), state.get('longitude'), state.get('altitude'))
+                if reported - record['pending_since'] < self.confirm_seconds:
+                    continue
+
+                event = TAKEOFF if phase == AIRBORNE else LANDING
+                record['phase'] = phase
+                record['pending'] = None
+                record['parked'] = event == LANDING
+                self._transitions[icao] = (event, EPOCH + timedelta(seconds=record['pending_since']),
+                                           record['pending_position'])
+                events.add(icao)
+        return events
+
+    def take_transitions(self, icao_ints):
+        """
+        Remove and return the unwritten transitions of some aircraft
+
+        Args:
+            icao_ints: Iterable of ICAO addresses about to be written
+
+        Returns:
+            dict: Mapping of ICAO address to an (event, datetime, (latitude, longitude, altitude)) tuple
+        """
+        with self._lock:
+            return {icao: self._transitions.pop(icao)
+                    for icao in icao_ints if icao in self._transitions}
+
+    def restore_transitions(self, transitions):
+        """Put transitions back after a failed write so the next write applies them"""
+        with self._lock:
+            for icao, transition in transitions.items():
+                self._transitions.setdefault(icao, transition)
+
+    def is_parked(self, icao):
+        """Whether an aircraft landed and has not taken off since"""
+        record = self._records.get(icao)
+        return record is not None and record['parked']
+
+    def set_flight_ids(self, flights):
+        """
+        Remember the open flight of each aircraft after a write
+
+        Args:
+            flights: Mapping of ICAO address to a dict with the flight's 'id' and 'status'
+        """
+        with self._lock:
+            for icao, flight in flights.items():
+                record = self._records.get(icao)
+                if record is not None:
+                    record['flight_id'] = flight['id'] if flight['status'] != 'landed' else None
+
+    def expire(self, now=None):
+        """
+        Forget aircraft not heard from within signal_timeout seconds
+
+        Args:
+            now: Reference time in epoch seconds (defaults to the newest report time)
+
+        Returns:
+            list: (ICAO address, open flight ID, last phase) of expired aircraft that
+                  still had an open flight
+        """
+        cutoff = (now or self.latest) - self.signal_timeout
+        lost = []
+        with self._lock:
+            while self._records:
+                icao, record = next(iter(self._records.items()))
+                if record['last_seen'] >= cutoff:
+                    break
+                del self._records[icao]
+                self._transitions.pop(icao, None)
+                if record['flight_id'] is not None:
+                    lost.append((icao, record['flight_id'], record['phase']))
+        return lost
+
+    def restore_lost(self, lost):
+        """
+        Put aircraft returned by expire() back after their flights failed to close
+
+        They expire again on the next call. Aircraft heard from again in the
+        meantime already have a new record and are left alone.
+
+        Args:
+            lost: List of (ICAO address, open flight ID, last phase) from expire()
+        """
+        with self._lock:
+            for icao, flight_id, phase in reversed(lost):
+                if icao in self._records:
+                    continue
+                self._records[icao] = {'phase': phase, 'pending': None, 'pending_since': None,
+                                       'parked': False, 'flight_id': flight_id, 'last_seen': 0.0}
+                self._records.move_to_end(icao, last=False)
+
+    def __len__(self):
+        return len(self._records)
@@ -0,0 +1,75 @@
+import logging
+import os
+import threading
+import time
+from config import Config
+from extensions import redis_client
+
+
+class IngestLeader:
+    """
+    Elects the one process that runs the in-process ADS-B ingest
+
+    Every web worker creates the app, but only one of them may poll the
+    upstream or read the receiver feed: each extra ingester spends upstream
+    credits again and writes every snapshot once more. Each process runs a
+    daemon thread that tries to take a Redis lock; the holder starts the
+    ingest and renews the lock every third of ADSB_INGEST_LOCK_TTL, the
+    others keep trying so that one of them takes over within a TTL after
+    the holder exits. The live state store is only filled in the leader;
+    the other workers serve live reads from SQL.
+
+    A leader that stalls for longer than the TTL may lose the lock to another
+    process. Its ingest threads cannot be stopped, so it logs the loss and
+    tries to take the lock back; set ADSB_INGEST_LOCK_TTL well above the
+    longest expected pause.
+    """
+
+    KEY = 'adsb:ingest-leader'
+
+    def __init__(self, redis, ttl=None):
+        self.redis = redis
+        self.ttl = ttl if ttl is not None else Config.ADSB_INGEST_LOCK_TTL
+        self.logger = logging.getLogger(__name__)
+        self.leading = False
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self, start_fn):
+        """
+        Start the election loop once per process
+
+        Args:
+            start_fn: Callable that starts the ingest, called once this process holds the lock
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, args=(start_fn,), daemon=True, name='adsb-ingest-leader')
+            self._thread.start()
+
+    def _run(self, start_fn):
+        """Acquire the lock, start the ingest and keep the lock renewed"""
+        lock = self.redis.lock(self.KEY, timeout=self.ttl, thread_local=False)
+        started = False
+        while True:
+            try:
+                if self.leading:
+                    lock.reacquire()
+                elif lock.acquire(blocking=False):
+                    self.leading = True
+                    self.logger.info(f"Process {os.getpid()} is the ADS-B ingest leader")
+                    if not started:
+                        start_fn()
+                        started = True
+            except Exception as e:
+                if self.leading:
+                    self.logger.error(f"Lost the ADS-B ingest lock, retrying: {str(e)}")
+                    self.leading = False
+                else:
+                    self.logger.error(f"Error acquiring the ADS-B ingest lock: {str(e)}")
+            time.sleep(self.ttl / 3)
+
+
+# Shared by every app created in the process
+ingest_leader = IngestLeader(redis_client)
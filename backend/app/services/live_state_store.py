@@ -0,0 +1,484 @@
+import logging
+import threading
+import time
+from datetime import datetime
+import numpy as np
+from config import Config
+from app.services.spatial_index import SpatialGridIndex
+from app.utils.geo import project_positions
+from app.utils.icao import ints_to_icao
+
+
+EPOCH = datetime(1970, 1, 1)
+
+
+class LiveStateStore:
+    """
+    Process-resident table of the latest state of every aircraft in view
+
+    Each aircraft owns one slot in a set of parallel NumPy columns, so an
+    ingest updates rows in place and map reads never touch the database.
+    Aircraft are keyed by their 24-bit ICAO address (icao_int), which is
+    also stored as an int32 column; hex codes are produced for a whole
+    result at once (see app.utils.icao.ints_to_icao).
+    Slots changed since the last flush are tracked so that the SQL write can
+    happen asynchronously (see LiveStateFlusher), and a SpatialGridIndex over
+    the slots answers bounding-box queries. Positions can be dead-reckoned
+    forward from the last fix for the whole fleet at once (see extrapolate).
+    """
+
+    FLOAT_COLUMNS = ('latitude', 'longitude', 'altitude', 'ground_speed', 'heading',
+                     'vertical_rate', 'baro_altitude', 'true_track')
+
+    def __init__(self, capacity=1024, max_age=None, extrapolation_max_age=None):
+        self.max_age = max_age if max_age is not None else Config.LIVE_STATE_MAX_AGE
+        self.extrapolation_max_age = (extrapolation_max_age if extrapolation_max_age is not None
+                                      else Config.LIVE_EXTRAPOLATION_MAX_AGE)
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.RLock()
+        self._slots = {}  # ICAO address -> slot index
+        self._free = []
+        self._dirty = set()
+        self._size = 0
+        self.index = SpatialGridIndex()
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        """Create (or grow) the column arrays to hold capacity slots"""
+        old_size = self._size
+        columns = {name: np.full(capacity, np.nan) for name in self.FLOAT_COLUMNS}
+        columns['last_seen'] = np.full(capacity, -np.inf)
+        columns['squawk'] = np.full(capacity, -1, dtype=np.int16)
+        columns['on_ground'] = np.full(capacity, -1, dtype=np.int8)
+        columns['flight_id'] = np.full(capacity, -1, dtype=np.int64)
+        columns['icao'] = np.full(capacity, -1, dtype=np.int32)  # -1 marks a free slot
+
+        if old_size:
+            for name, column in columns.items():
+                column[:old_size] = getattr(self, name)[:old_size]
+            self.callsigns.extend([None] * (capacity - old_size))
+            self.origin_countries.extend([None] * (capacity - old_size))
+        else:
+            self.callsigns = [None] * capacity
+            self.origin_countries = [None] * capacity
+
+        for name, column in columns.items():
+            setattr(self, name, column)
+        self.capacity = capacity
+
+    def _slot_for(self, icao):
+        """Return the slot of an ICAO address, assigning a new one if needed"""
+        slot = self._slots.get(icao)
+        if slot is not None:
+            return slot
+
+        if self._free:
+            slot = self._free.pop()
+        else:
+            if self._size == self.capacity:
+                self._allocate(self.capacity * 2)
+            slot = self._size
+            self._size += 1
+
+        self._slots[icao] = slot
+        self.icao[slot] = icao
+        return slot
+
+    def upsert(self, states, mark_dirty=True):
+        """
+        Write normalized states into their slots in place
+
+        Args:
+            states: Iterable of dicts produced by normalize_state
+            mark_dirty: Whether the states still need to be flushed to SQL
+        """
+        with self._lock:
+            for state in states:
+                slot = self._slot_for(state['icao_int'])
+                for name in self.FLOAT_COLUMNS:
+                    value = state[name]
+                    getattr(self, name)[slot] = np.nan if value is None else value
+                squawk = state['squawk']
+                self.squawk[slot] = int(squawk) if squawk and squawk.isdigit() else -1
+                on_ground = state['on_ground']
+                self.on_ground[slot] = -1 if on_ground is None else int(on_ground)
+                updated = state['last_position_update']
+                self.last_seen[slot] = (updated - EPOCH).total_seconds() if updated else time.time()
+                self.callsigns[slot] = state['callsign']
+                self.origin_countries[slot] = state['origin_country']
+                self.index.update(slot, self.latitude[slot], self.longitude[slot])
+                if mark_dirty:
+                    self._dirty.add(slot)
+
+    def set_flight_ids(self, flights):
+        """
+        Record the database flight ID of each aircraft after a flush
+
+        Args:
+            flights: Mapping of ICAO address to a dict containing the flight 'id'
+        """
+        with self._lock:
+            for icao, flight in flights.items():
+                slot = self._slots.get(icao)
+                if slot is not None:
+                    self.flight_id[slot] = flight['id']
+
+    def drain_dirty(self):
+        """
+        Take the states changed since the previous call
+
+        Returns:
+            list: Normalized state dicts ready for ADSBIngestor.ingest
+        """
+        with self._lock:
+            slots = [slot for slot in self._dirty if self.icao[slot] >= 0]
+            self._dirty = set()
+            return self._states(slots)
+
+    def mark_dirty(self, icao_ints):
+        """Queue aircraft to be flushed again, e.g. after a failed write"""
+        with self._lock:
+            for icao in icao_ints:
+                slot = self._slots.get(icao)
+                if slot is not None:
+                    self._dirty.add(slot)
+
+    def evict_stale(self, now=None):
+        """
+        Release the slots of aircraft not seen within max_age seconds
+
+        Returns:
+            int: Number of evicted aircraft
+        """
+        now = now or time.time()
+        with self._lock:
+            evicted = 0
+            for slot in np.flatnonzero((self.last_seen[:self._size] < now - self.max_age)
+                                       & (self.icao[:self._size] >= 0)).tolist():
+                self._release(slot)
+                evicted += 1
+            return evicted
+
+    def _release(self, slot):
+        """Clear a slot and put it back on the free list"""
+        del self._slots[int(self.icao[slot])]
+        self.index.remove(slot)
+        self.icao[slot] = -1
+        self.callsigns[slot] = None
+        self.origin_countries[slot] = None
+        for name in self.FLOAT_COLUMNS:
+            getattr(self, name)[slot] = np.nan
+        self.last_seen[slot] = -np.inf
+        self.squawk[slot] = -1
+        self.on_ground[slot] = -1
+        self.flight_id[slot] = -1
+        self._dirty.discard(slot)
+        self._free.append(slot)
+
+    def __len__(self):
+        return len(self._slots)
+
+    def _live_mask(self, now):
+        """Boolean mask of occupied slots seen within max_age seconds"""
+        return self.last_seen[:self._size] >= now - self.max_age
+
+    def query(self, bbox=None, zoom=None, extrapolate=False):
+        """
+        Return the live aircraft, optionally restricted to a bounding box
+
+        Args:
+            bbox: Optional (south, west, north, east) tuple; west > east crosses the antimeridian
+            zoom: Optional map zoom level. Below SPATIAL_FULL_DETAIL_ZOOM the matching
+                  aircraft are thinned to the 2 ** zoom most recently seen per grid
+                  cell; omit it to get every aircraft
+            extrapolate: Dead-reckon latitude, longitude and altitude to the current
+                         time; each dict then also carries the projected seconds as 'extrapolated'
+
+        Returns:
+            list: Flight-like dicts for every matching aircraft
+        """
+        with self._lock:
+            slots = self._select(bbox, zoom)
+            states = self.to_dicts(slots)
+            if extrapolate:
+                projected = {name: [None if value != value else value for value in column.tolist()]
+                             for name, column in self.extrapolate(slots).items()}
+                for index, state in enumerate(states):
+                    for name, column in projected.items():
+                        state[name] = column[index]
+            return states
+
+    def get_many(self, icao_ints):
+        """
+        Return the live dicts of specific aircraft
+
+        Args:
+            icao_ints: Iterable of ICAO addresses; unknown addresses are skipped
+
+        Returns:
+            list: Flight-like dicts in the same shape as query()
+        """
+        with self._lock:
+            slots = [self._slots[icao] for icao in icao_ints if icao in self._slots]
+            return self.to_dicts(slots)
+
+    def query_columns(self, bbox=None, zoom=None, extrapolate=False):
+        """
+        Same selection as query(), returned as columns for the binary encoders
+
+        Returns:
+            dict: Mapping of field name to an array or list of values;
+                  last_position_update is in epoch seconds (the time of the fix,
+                  also when positions are extrapolated)
+        """
+        with self._lock:
+            slots = self._select(bbox, zoom)
+            columns = {name: getattr(self, name)[slots] for name in self.FLOAT_COLUMNS}
+            if extrapolate:
+                columns.update(self.extrapolate(slots))
+            columns['id'] = [value if value >= 0 else None for value in self.flight_id[slots].tolist()]
+            columns['squawk'] = [f"{value:04d}" if value >= 0 else None for value in self.squawk[slots].tolist()]
+            columns['on_ground'] = [None if value < 0 else bool(value) for value in self.on_ground[slots].tolist()]
+            columns['last_position_update'] = np.floor(self.last_seen[slots])
+            columns['icao_code'] = ints_to_icao(self.icao[slots])
+            columns['callsign'] = [self.callsigns[slot] for slot in slots.tolist()]
+            return columns
+
+    def extrapolate(self, slots, now=None):
+        """
+        Dead-reckon aircraft forward from their last fix
+
+        Positions are projected along the great circle given by true_track at
+        ground_speed, and altitude by vertical_rate, for the time since the
+        fix clamped to extrapolation_max_age seconds. Aircraft without speed
+        or track keep their position; aircraft on the ground keep their altitude.
+
+        Args:
+            slots: Array of slots
+            now: Reference time in epoch seconds (defaults to the current time)
+
+        Returns:
+            dict: 'latitude', 'longitude', 'altitude' and 'extrapolated' (projected
+                  seconds) arrays aligned with slots
+        """
+        now = now or time.time()
+        slots = np.asarray(slots, dtype=np.int64)
+        elapsed = np.clip(now - self.last_seen[slots], 0.0, self.extrapolation_max_age)
+
+        speed = self.ground_speed[slots]
+        track = self.true_track[slots]
+        moving = np.isfinite(speed) & np.isfinite(track) & (speed > 0)
+        latitude, longitude = project_positions(
+            self.latitude[slots], self.longitude[slots],
+            np.where(moving, speed * elapsed, 0.0), np.where(moving, track, 0.0)
+        )
+
+        vertical_rate = self.vertical_rate[slots]
+        climbing = np.isfinite(vertical_rate) & (self.on_ground[slots] != 1)
+        altitude = self.altitude[slots] + np.where(climbing, vertical_rate * elapsed, 0.0)
+
+        return {
+            'latitude': latitude,
+            'longitude': longitude,
+            'altitude': np.maximum(altitude, 0.0),
+            'extrapolated': np.where(moving | climbing, elapsed, 0.0)
+        }
+
+    def _select(self, bbox, zoom):
+        """Return the array of live slots matching a bounding box and zoom level"""
+        now = time.time()
+        if bbox is None:
+            slots = np.flatnonzero(self._live_mask(now))
+        else:
+            south, west, north, east = bbox
+            buckets = self.index.query(south, west, north, east)
+            slots = np.fromiter((slot for bucket in buckets for slot in bucket), dtype=np.int64)
+
+            # Exact filter for candidates from cells on the edge of the box
+            lat = self.latitude[slots]
+            lon = self.longitude[slots]
+            mask = (self.last_seen[slots] >= now - self.max_age) & (lat >= south) & (lat <= north)
+            if west <= east:
+                mask &= (lon >= west) & (lon <= east)
+            else:
+                mask &= (lon >= west) | (lon <= east)
+            slots = slots[mask]
+
+        if zoom is not None and zoom < Config.SPATIAL_FULL_DETAIL_ZOOM:
+            slots = self._thin(slots, 2 ** max(int(zoom), 0))
+        return slots
+
+    def _thin(self, slots, limit):
+        """
+        Keep the limit most recently seen aircraft of each grid cell
+
+        Applied after the liveness and bounding-box filters; aircraft without
+        a position are kept.
+        """
+        positioned = np.isfinite(self.latitude[slots]) & np.isfinite(self.longitude[slots])
+        candidates = slots[positioned]
+        if len(candidates) <= limit:
+            return slots
+
+        cells = self.index.cells_of(self.latitude[candidates], self.longitude[candidates])
+        order = np.lexsort((-self.last_seen[candidates], cells))  # By cell, newest first
+        cells = cells[order]
+        starts = np.flatnonzero(np.r_[True, cells[1:] != cells[:-1]])
+        rank = np.arange(len(cells)) - np.repeat(starts, np.diff(np.r_[starts, len(cells)]))
+        kept = candidates[order[rank < limit]]
+        return np.sort(np.concatenate([kept, slots[~positioned]]))
+
+    def _states(self, slots):
+        """
+        Rebuild normalized state dicts for an array of slots
+
+        Columns are converted to Python lists in one pass each rather than
+        reading the arrays element by element.
+        """
+        slots = np.asarray(slots, dtype=np.int64)
+        columns = {}
+        for name in self.FLOAT_COLUMNS:
+            values = getattr(self, name)[slots].tolist()
+            columns[name] = [None if value != value else value for value in values]  # NaN -> None
+        columns['squawk'] = [f"{value:04d}" if value >= 0 else None for value in self.squawk[slots].tolist()]
+        columns['on_ground'] = [None if value < 0 else bool(value) for value in self.on_ground[slots].tolist()]
+        columns['last_position_update'] = (self.last_seen[slots] * 1e6).astype('datetime64[us]').tolist()
+        slot_list = slots.tolist()
+        icao = self.icao[slots]
+        columns['icao_code'] = ints_to_icao(icao)
+        columns['icao_int'] = icao.tolist()
+        columns['callsign'] = [self.callsigns[slot] for slot in slot_list]
+        columns['origin_country'] = [self.origin_countries[slot] for slot in slot_list]
+
+        names = list(columns)
+        return [dict(zip(names, row)) for row in zip(*columns.values())]
+
+    def to_dicts(self, slots):
+        """Convert slots to the dictionary shape served by /flights/active"""
+        slots = np.asarray(slots, dtype=np.int64)
+        flight_ids = self.flight_id[slots].tolist()
+        states = self._states(slots)
+        for state, flight_id in zip(states, flight_ids):
+            del state['icao_int']
+            state['id'] = flight_id if flight_id >= 0 else None
+            state['status'] = 'active'
+            state['last_position_update'] = state['last_position_update'].isoformat()
+        return states
+
+
+class LiveStateFlusher:
+    """
+    Background thread that periodically writes dirty live states to SQL
+    """
+
+    def __init__(self, store, interval=None):
+        self.store = store
+        self.interval = interval if interval is not None else Config.LIVE_STATE_FLUSH_INTERVAL
+        self.logger = logging.getLogger(__name__)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self, app, flush_fn):
+        """
+        Start the flush loop once per process
+
+        Args:
+            app: Flask application used to push an app context for each flush
+            flush_fn: Callable receiving the list of dirty states to persist
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, args=(app, flush_fn), daemon=True)
+            self._thread.start()
+            self.logger.info(f"Started live state flusher (every {self.interval}s)")
+
+    def _run(self, app, flush_fn):
+        """Flush loop"""
+        while True:
+            time.sleep(self.interval)
+            states = []
+            try:
+                with app.app_context():
+                    states = self.store.drain_dirty()
+                    if states:
+                        flush_fn(states)
+                    self.store.evict_stale()
+            except Exception as e:
+                self.logger.error(f"Error flushing live state: {str(e)}")
+                self.store.mark_dirty(state['icao_int'] for state in states)
+
+
+class LivePositionEmitter:
+    """
+    Background thread that pushes dead-reckoned positions between ingests
+
+    Every interval seconds the positions of all moving aircraft are
+    extrapolated in one vectorized pass and handed to an emit callback as
+    compact columns. Aircraft whose fix is older than the store's
+    extrapolation_max_age no longer move and are left out.
+    """
+
+    def __init__(self, store, interval=None):
+        self.store = store
+        self.interval = interval if interval is not None else Config.LIVE_EXTRAPOLATION_INTERVAL
+        self.logger = logging.getLogger(__name__)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self, emit_fn):
+        """
+        Start the emit loop once per process
+
+        Args:
+            emit_fn: Callable receiving the dict built by positions()
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, args=(emit_fn,), daemon=True)
+            self._thread.start()
+            self.logger.info(f"Started live position emitter (every {self.interval}s)")
+
+    def positions(self, now=None):
+        """
+        Extrapolate every live aircraft that is still being projected
+
+        Args:
+            now: Reference time in epoch seconds (defaults to the current time)
+
+        Returns:
+            dict: 'time' plus 'icao_codes', 'latitude', 'longitude' and 'altitude' lists
+        """
+        now = now or time.time()
+        store = self.store
+        with store._lock:
+            slots = np.flatnonzero(store._live_mask(now))
+            projected = store.extrapolate(slots, now)
+            active = (projected['extrapolated'] > 0) & (projected['extrapolated'] < store.extrapolation_max_age)
+            slots = slots[active]
+            return {
+                'time': now,
+                'icao_codes': ints_to_icao(store.icao[slots]),
+                'latitude': np.round(projected['latitude'][active], 5).tolist(),
+                'longitude': np.round(projected['longitude'][active], 5).tolist(),
+                'altitude': [None if value != value else value
+                             for value in np.round(projected['altitude'][active], 1).tolist()]
+            }
+
+    def _run(self, emit_fn):
+        """Emit loop"""
+        while True:
+            time.sleep(self.interval)
+            try:
+                positions = self.positions()
+                if positions['icao_codes']:
+                    emit_fn(positions)
+            except Exception as e:
+                self.logger.error(f"Error emitting live positions: {str(e)}")
+
+
+# Shared by every ADSBService instance in the process
+live_state_store = LiveStateStore()
+live_state_flusher = LiveStateFlusher(live_state_store)
+live_position_emitter = LivePositionEmitter(live_state_store)
@@ -0,0 +1,251 @@
+import fnmatch
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from config import Config
+from extensions import redis_client
+
+
+class NearCache:
+    """
+    Bounded in-process LRU map in front of Redis
+
+    Entries hold the decoded value, so a hit costs neither a round trip nor a
+    deserialization; callers must treat returned values as read-only. The map
+    is bounded by entry count and by the serialized size of the values, and
+    every entry expires after ttl seconds so that a lost invalidation cannot
+    serve stale data for long.
+
+    Fills race with invalidations: a reader may fetch a value from Redis just
+    before another worker overwrites it and the invalidation arrives before
+    the reader stores its now stale copy. Readers therefore take a token()
+    before going to Redis and fill() drops the value if the key was
+    invalidated in the meantime.
+    """
+
+    STRIPES = 1024  # Invalidation counters, keys are hashed onto them
+
+    def __init__(self, max_entries=None, max_bytes=None, ttl=None):
+        self.max_entries = max_entries if max_entries is not None else Config.CACHE_NEAR_MAX_ENTRIES
+        self.max_bytes = max_bytes if max_bytes is not None else Config.CACHE_NEAR_MAX_BYTES
+        self.ttl = ttl if ttl is not None else Config.CACHE_NEAR_TTL
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, size, expires_at), least recently used first
+        self._bytes = 0
+        self._invalidations = [0] * self.STRIPES
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """
+        Look up a key
+
+        Returns:
+            tuple: (True, value) on a hit, (False, None) otherwise
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            if entry[2] <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+
+    def token(self, key):
+        """Invalidation counter of a key, taken before reading it from Redis"""
+        return self._invalidations[hash(key) % self.STRIPES]
+
+    def fill(self, key, value, size, token):
+        """
+        Store a value read from Redis
+
+        Args:
+            key: Cache key
+            value: Decoded value
+            size: Size of the serialized value in bytes
+            token: token() taken before the Redis read
+        """
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if self._invalidations[hash(key) % self.STRIPES] != token:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic() + self.ttl)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, keys):
+        """Drop keys and fail fills of them that are in flight"""
+        with self._lock:
+            for key in keys:
+                self._invalidations[hash(key) % self.STRIPES] += 1
+                if key in self._entries:
+                    self._remove(key)
+
+    def invalidate_pattern(self, pattern):
+        """Drop keys matching a Redis glob pattern"""
+        with self._lock:
+            self._invalidations = [count + 1 for count in self._invalidations]
+            for key in [key for key in self._entries if fnmatch.fnmatchcase(key, pattern)]:
+                self._remove(key)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._invalidations = [count + 1 for count in self._invalidations]
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        """Remove an entry; the lock must be held"""
+        self._bytes -= self._entries.pop(key)[1]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """
+        Counters of the near tier
+
+        Returns:
+            dict: hits, misses, evictions, expirations, entries and bytes
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'entries': len(self._entries),
+                'bytes': self._bytes
+            }
+
+
+class CacheInvalidationListener:
+    """
+    Keeps a NearCache coherent with writes made by other workers
+
+    Every write through CacheService publishes the affected keys (or a
+    pattern) on CACHE_INVALIDATION_CHANNEL, tagged with the publishing
+    process's origin id. A daemon thread per process subscribes to the
+    channel and drops what other processes invalidated. The near tier is only
+    used while the subscription is live: until it is established, and after
+    it breaks, reads go straight to Redis and the near cache is cleared
+    because messages may have been missed.
+
+    The thread is started lazily and again after a fork, so a preforking
+    server such as gunicorn gets one subscription per worker.
+    """
+
+    RECONNECT_DELAY = 1.0
+    MAX_RECONNECT_DELAY = 30.0
+
+    def __init__(self, near_cache, redis, channel=None):
+        self.near_cache = near_cache
+        self.redis = redis
+        self.channel = channel or Config.CACHE_INVALIDATION_CHANNEL
+        self.logger = logging.getLogger(__name__)
+        self.origin = uuid.uuid4().hex  # Renewed after a fork
+        self.listening = False
+        self._pid = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        """
+        Start the subscriber thread once per process
+
+        Returns:
+            bool: Whether the subscription is live and the near tier may be used
+        """
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return self.listening
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked: the parent's thread and subscription did not come along
+                self._pid = os.getpid()
+                self.origin = uuid.uuid4().hex
+                self.listening = False
+                self.near_cache.clear()
+                self._thread = None
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True, name='cache-invalidation')
+                self._thread.start()
+        return self.listening
+
+    def message(self, keys=(), pattern=None):
+        """
+        Encode an invalidation for other workers, published alongside the write
+
+        Args:
+            keys: Cache keys that were written or deleted
+            pattern: Redis glob pattern whose keys were deleted
+
+        Returns:
+            str: Message for CACHE_INVALIDATION_CHANNEL
+        """
+        return json.dumps({'origin': self.origin, 'keys': list(keys), 'pattern': pattern})
+
+    def _handle(self, data):
+        """Apply one invalidation message"""
+        message = json.loads(data)
+        if message.get('origin') == self.origin:
+            return  # Already applied locally by the writer
+        if message.get('keys'):
+            self.near_cache.invalidate(message['keys'])
+        if message.get('pattern'):
+            self.near_cache.invalidate_pattern(message['pattern'])
+
+    def _run(self):
+        """Subscribe and apply invalidations, reconnecting with backoff"""
+        delay = self.RECONNECT_DELAY
+        while True:
+            pubsub = None
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=False)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    if message['type'] == 'subscribe':
+                        self.near_cache.clear()
+                        self.listening = True
+                        delay = self.RECONNECT_DELAY
+                        self.logger.info(f"Listening for cache invalidations on {self.channel}")
+                    elif message['type'] == 'message':
+                        try:
+                            self._handle(message['data'])
+                        except (ValueError, TypeError) as e:
+                            self.logger.error(f"Ignoring malformed cache invalidation: {str(e)}")
+            except Exception as e:
+                self.logger.error(f"Cache invalidation subscription lost: {str(e)}")
+            finally:
+                self.listening = False
+                self.near_cache.clear()
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+            time.sleep(delay)
+            delay = min(delay * 2, self.MAX_RECONNECT_DELAY)
+
+
+# Shared by every CacheService instance in the process
+near_cache = NearCache()
+cache_invalidation_listener = CacheInvalidationListener(near_cache, redis_client)
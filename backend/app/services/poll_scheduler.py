@@ -0,0 +1,124 @@
+import logging
+import math
+import time
+from config import Config
+from app.services.upstream_client import request_credits
+
+
+class RegionSchedule:
+    """Polling state of one region shard"""
+
+    __slots__ = ('box', 'credits', 'interval', 'change_rate', 'last_polled', 'last_attempt', 'next_due')
+
+    def __init__(self, box, interval):
+        self.box = box
+        self.credits = request_credits('/states/all', dict(zip(('lamin', 'lomin', 'lamax', 'lomax'), box)))
+        self.interval = interval
+        self.change_rate = None  # Smoothed changed aircraft per second, None until observed
+        self.last_polled = None  # Monotonic time of the last successful poll
+        self.last_attempt = None  # Monotonic time of the last poll, failed or not
+        self.next_due = 0.0  # Due straight away
+
+
+class AdaptivePollScheduler:
+    """
+    Spends the upstream credit budget where the traffic changes
+
+    Every region shard gets its own poll interval. After each poll the
+    number of new and updated aircraft the region produced per second (see
+    SnapshotDiffer) is smoothed into its change rate. Intervals are then
+    chosen to minimise change-weighted staleness for the credits available:
+    with cost c and change rate w, a region is polled every k * sqrt(c / w)
+    seconds, where k makes the total spend sum(c / interval) equal the
+    budget's sustainable credit rate. No region is polled faster than
+    min_interval (the upstream's time resolution), and none slower than
+    max_interval unless the credits left cannot pay for that.
+
+    While the upstream is backing off after a 429 nothing is polled.
+    """
+
+    SMOOTHING = 0.3  # Weight of the newest observation in the change rate
+    RATE_FLOOR = 0.01  # Changes per second assumed for a region that showed none
+
+    def __init__(self, poller, budget, boxes, min_interval=None, max_interval=None):
+        self.poller = poller
+        self.budget = budget
+        self.min_interval = min_interval if min_interval is not None else Config.ADSB_MIN_POLL_INTERVAL
+        self.max_interval = max_interval if max_interval is not None else Config.ADSB_MAX_POLL_INTERVAL
+        self.logger = logging.getLogger(__name__)
+        self.regions = [RegionSchedule(box, self.min_interval) for box in boxes]
+
+    def due(self, now):
+        """Regions whose next poll time has passed"""
+        return [region for region in self.regions if region.next_due <= now]
+
+    def record(self, regions, changes, now):
+        """
+        Update change rates after a poll
+
+        Args:
+            regions: RegionSchedules that were polled
+            changes: Changed aircraft per region, None where the fetch failed
+            now: Monotonic time the poll started
+        """
+        for region, changed in zip(regions, changes):
+            region.last_attempt = now
+            if changed is None:
+                continue
+            if region.last_polled is not None:
+                rate = changed / max(now - region.last_polled, self.min_interval)
+                region.change_rate = rate if region.change_rate is None else (
+                    self.SMOOTHING * rate + (1 - self.SMOOTHING) * region.change_rate)
+            region.last_polled = now
+
+    def plan(self, now):
+        """Recompute every region's interval from the current change rates and credit budget"""
+        rate = self.budget.sustainable_rate()
+        weights = [max(region.change_rate or 0.0, self.RATE_FLOOR) for region in self.regions]
+        scale = sum(math.sqrt(region.credits * weight) for region, weight in zip(self.regions, weights))
+
+        intervals = []
+        for region, weight in zip(self.regions, weights):
+            if rate <= 0:
+                interval = self.max_interval
+            elif region.change_rate is None:
+                interval = self.min_interval  # Poll again soon to measure the region
+            else:
+                interval = max(scale / rate * math.sqrt(region.credits / weight), self.min_interval)
+            intervals.append(interval)
+
+        # The budget outranks max_interval: capping would spend credits faster than they last
+        capped = [min(interval, self.max_interval) for interval in intervals]
+        if rate <= 0 or sum(region.credits / interval for region, interval in zip(self.regions, capped)) <= rate:
+            intervals = capped
+
+        for region, interval in zip(self.regions, intervals):
+            region.interval = interval
+            region.next_due = (region.last_attempt if region.last_attempt is not None else now) + interval
+
+    def run_once(self):
+        """
+        Poll the regions that are due and plan the next round
+
+        Returns:
+            float: Seconds to sleep before calling again
+        """
+        blocked = self.budget.blocked_for()
+        if blocked > 0:
+            return blocked
+
+        now = time.monotonic()
+        regions = self.due(now)
+        if regions:
+            summary = self.poller.poll_regions([region.box for region in regions])
+            self.record(regions, summary['shard_changes'], now)
+            self.plan(now)
+            self.logger.info(
+                f"Polled {len(regions)}/{len(self.regions)} regions for "
+                f"{sum(region.credits for region in regions)} credits; {self.budget.remaining} credits left, "
+                f"intervals {min(region.interval for region in self.regions):.0f}-"
+                f"{max(region.interval for region in self.regions):.0f}s"
+            )
+
+        next_due = min(region.next_due for region in self.regions)
+        return max(next_due - time.monotonic(), 0.5)
@@ -0,0 +1,424 @@
+import logging
+import re
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import (Column, DateTime, Float, Index, Integer, MetaData, Table,
+                        func, or_, select, text, union_all)
+from extensions import db
+from app.models import FlightPosition
+
+
+PARTITION_PREFIX = 'flight_positions_p'
+PARTITION_NAME = re.compile(r'^flight_positions_p(\d{8})$')
+PARTITION_UPPER_BOUND = re.compile(r"TO \('([^']+)'\)")
+
+# Columns returned by reads; ids are left out because SQLite day tables number their rows independently
+POSITION_COLUMNS = ('flight_id', 'latitude', 'longitude', 'altitude', 'ground_speed', 'heading', 'timestamp')
+
+POSTGRES_PARENT_DDL = """
+CREATE TABLE flight_positions (
+    id BIGSERIAL,
+    flight_id INTEGER NOT NULL REFERENCES flights(id) ON DELETE CASCADE,
+    latitude DOUBLE PRECISION NOT NULL,
+    longitude DOUBLE PRECISION NOT NULL,
+    altitude INTEGER,
+    ground_speed DOUBLE PRECISION,
+    heading DOUBLE PRECISION,
+    "timestamp" TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+    PRIMARY KEY (id, "timestamp")
+) PARTITION BY RANGE ("timestamp")
+"""
+
+
+class PositionPartitionManager:
+    """
+    Day-partitioned storage for flight position history
+
+    Modes, chosen per database on first use:
+
+    - 'postgresql': flight_positions is a natively range-partitioned table with
+      one partition per UTC day; queries on the parent are pruned by timestamp.
+    - 'sqlite': one flight_positions_pYYYYMMDD table per day; reads UNION ALL
+      the day tables overlapping the requested window (plus the base table,
+      which keeps any rows written before partitioning was enabled).
+    - 'legacy': a plain flight_positions table (other dialects, or a PostgreSQL
+      table created before partitioning; see migrate_to_partitions).
+
+    In the partitioned modes retention drops whole days instead of deleting rows.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._modes = {}  # engine URL -> mode
+        self._known_partitions = set()
+        self._day_tables = {}
+
+    @staticmethod
+    def partition_name(day):
+        return f"{PARTITION_PREFIX}{day:%Y%m%d}"
+
+    @staticmethod
+    def _day_of(timestamp):
+        return timestamp.date() if isinstance(timestamp, datetime) else timestamp
+
+    def mode(self):
+        """Return the storage mode of the current database, detecting it on first use"""
+        bind = db.session.get_bind()
+        key = str(bind.url)
+        mode = self._modes.get(key)
+        if mode is None:
+            with self._lock:
+                mode = self._modes.get(key) or self._detect_mode(bind.dialect.name)
+                self._modes[key] = mode
+        return mode
+
+    def _detect_mode(self, dialect):
+        if dialect == 'sqlite':
+            return 'sqlite'
+        if dialect != 'postgresql':
+            return 'legacy'
+
+        relkind = db.session.execute(text(
+            "SELECT c.relkind FROM pg_class c "
+            "WHERE c.relname = 'flight_positions' AND pg_table_is_visible(c.oid)"
+        )).scalar()
+        if relkind is None:
+            db.session.execute(text(POSTGRES_PARENT_DDL))
+            db.session.execute(text(
+                'CREATE INDEX IF NOT EXISTS idx_flight_position_time '
+                'ON flight_positions (flight_id, "timestamp" DESC)'
+            ))
+            db.session.commit()
+            self.logger.info("Created partitioned flight_positions table")
+            return 'postgresql'
+        if relkind == 'p':
+            return 'postgresql'
+
+        self.logger.warning(
+            "flight_positions is not partitioned; retention will delete rows. "
+            "Run 'flask positions migrate' to convert it."
+        )
+        return 'legacy'
+
+    def _day_table(self, day):
+        """SQLAlchemy Table for a SQLite day partition"""
+        name = self.partition_name(day)
+        table = self._day_tables.get(name)
+        if table is None:
+            table = Table(
+                name, MetaData(),
+                Column('id', Integer, primary_key=True),
+                Column('flight_id', Integer, nullable=False),
+                Column('latitude', Float, nullable=False),
+                Column('longitude', Float, nullable=False),
+                Column('altitude', Integer),
+                Column('ground_speed', Float),
+                Column('heading', Float),
+                Column('timestamp', DateTime, nullable=False),
+                Index(f"idx_{name}_flight_time", 'flight_id', 'timestamp')
+            )
+            self._day_tables[name] = table
+        return table
+
+    def ensure_partitions(self, days):
+        """
+        Create the partitions for the given days if they do not exist yet
+
+        Args:
+            days: Iterable of dates
+        """
+        mode = self.mode()
+        if mode == 'legacy':
+            return
+
+        for day in set(days):
+            name = self.partition_name(day)
+            if name in self._known_partitions:
+                continue
+            if mode == 'postgresql':
+                db.session.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF flight_positions "
+                    f"FOR VALUES FROM ('{day:%Y-%m-%d}') TO ('{day + timedelta(days=1):%Y-%m-%d}')"
+                ))
+            else:
+                self._day_table(day).create(db.session.connection(), checkfirst=True)
+            self._known_partitions.add(name)
+
+    def insert(self, rows):
+        """
+        Insert position rows into their day partitions (does not commit)
+
+        Args:
+            rows: List of dicts with FlightPosition column values
+        """
+        if not rows:
+            return
+
+        mode = self.mode()
+        # executemany: SQLAlchemy groups the rows into multi-row VALUES batches where supported
+        if mode == 'legacy':
+            db.session.execute(FlightPosition.__table__.insert(), rows)
+            return
+
+        by_day = {}
+        for row in rows:
+            by_day.setdefault(self._day_of(row['timestamp']), []).append(row)
+        self.ensure_partitions(by_day)
+
+        if mode == 'postgresql':
+            # The parent routes each row to its partition
+            db.session.execute(FlightPosition.__table__.insert(), rows)
+        else:
+            for day, day_rows in by_day.items():
+                db.session.execute(self._day_table(day).insert(), day_rows)
+
+    def _sqlite_partition_days(self):
+        """Days that currently have a SQLite partition table"""
+        names = db.session.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'flight_positions_p%'"
+        )).scalars()
+        days = []
+        for name in names:
+            match = PARTITION_NAME.match(name)
+            if match:
+                days.append(datetime.strptime(match.group(1), '%Y%m%d').date())
+        return sorted(days)
+
+    def select(self, flight_id, since=None, until=None):
+        """
+        Read the positions of a flight in timestamp order
+
+        Only partitions overlapping [since, until] are touched.
+
+        Args:
+            flight_id: ID of the flight
+            since: Optional inclusive lower timestamp bound
+            until: Optional inclusive upper timestamp bound
+
+        Returns:
+            list: Rows with flight_id, latitude, longitude, altitude, ground_speed, heading and timestamp
+        """
+        return self.select_many([flight_id], since=since, until=until)
+
+    def _positions(self, flight_ids, since=None, until=None):
+        """
+        Query of the positions of flights inside a window, over the partitions it overlaps
+
+        Returns:
+            Select or CompoundSelect, or None when there is no position table
+        """
+        if self.mode() != 'sqlite':
+            tables = [FlightPosition.__table__]
+        else:
+            tables = []
+            for day in self._sqlite_partition_days():
+                if since is not None and day < since.date():
+                    continue
+                if until is not None and day > until.date():
+                    continue
+                tables.append(self._day_table(day))
+            if db.inspect(db.session.connection()).has_table(FlightPosition.__tablename__):
+                tables.append(FlightPosition.__table__)
+            if not tables:
+                return None
+
+        selects = []
+        for table in tables:
+            query = select(*(table.c[name] for name in POSITION_COLUMNS)).where(table.c.flight_id.in_(flight_ids))
+            if since is not None:
+                query = query.where(table.c.timestamp >= since)
+            if until is not None:
+                query = query.where(table.c.timestamp <= until)
+            selects.append(query)
+        return selects[0] if len(selects) == 1 else union_all(*selects)
+
+    def select_many(self, flight_ids, since=None, until=None):
+        """
+        Read the positions of several flights ordered by flight and timestamp
+
+        Args:
+            flight_ids: List of flight IDs
+            since: Optional inclusive lower timestamp bound
+            until: Optional inclusive upper timestamp bound
+
+        Returns:
+            list: Rows in the same shape as select()
+        """
+        query = self._positions(flight_ids, since=since, until=until)
+        if query is None:
+            return []
+        positions = query.subquery()
+        return db.session.execute(
+            select(positions).order_by(positions.c.flight_id, positions.c.timestamp)
+        ).all()
+
+    def endpoints(self, flight_ids, since=None, until=None):
+        """
+        Read only the first and last position of each flight
+
+        The earliest and latest timestamp of every flight are found in one
+        aggregate and joined back to their rows, so a flight's track is
+        never loaded as a whole.
+
+        Args:
+            flight_ids: List of flight IDs
+            since: Optional inclusive lower timestamp bound
+            until: Optional inclusive upper timestamp bound
+
+        Returns:
+            dict: Mapping of flight ID to a (first row, last row) tuple, rows shaped as in select()
+        """
+        query = self._positions(flight_ids, since=since, until=until)
+        if query is None:
+            return {}
+        # Two inlined copies rather than one CTE, so PostgreSQL answers the
+        # aggregate from the (flight_id, timestamp) index instead of materializing tracks
+        positions = query.subquery('positions')
+        candidates = query.subquery('candidates')
+        bounds = select(
+            candidates.c.flight_id,
+            func.min(candidates.c.timestamp).label('first'),
+            func.max(candidates.c.timestamp).label('last')
+        ).group_by(candidates.c.flight_id).subquery('bounds')
+        rows = db.session.execute(
+            select(positions)
+            .join(bounds, positions.c.flight_id == bounds.c.flight_id)
+            .where(or_(positions.c.timestamp == bounds.c.first, positions.c.timestamp == bounds.c.last))
+            .order_by(positions.c.flight_id, positions.c.timestamp)
+        ).all()
+
+        endpoints = {}
+        for row in rows:
+            first, _ = endpoints.get(row.flight_id, (row, row))
+            endpoints[row.flight_id] = (first, row)
+        return endpoints
+
+    def delete_flights(self, flight_ids):
+        """
+        Delete the positions of flights (does not commit)
+
+        Only the SQLite day tables need this: the Flight.positions cascade
+        covers the base table, and PostgreSQL partitions cascade through the
+        parent's foreign key.
+
+        Args:
+            flight_ids: List of flight IDs
+        """
+        if self.mode() != 'sqlite' or not flight_ids:
+            return
+        for day in self._sqlite_partition_days():
+            table = self._day_table(day)
+            db.session.execute(table.delete().where(table.c.flight_id.in_(flight_ids)))
+
+    def drop_before(self, cutoff):
+        """
+        Remove positions older than a cutoff, dropping whole partitions where possible
+
+        Partitions are dropped only once their whole day is older than the
+        cutoff, so up to one extra day of history may be kept.
+
+        Args:
+            cutoff: Naive UTC datetime
+
+        Returns:
+            dict: Dropped partition names and the number of individually deleted legacy rows
+        """
+        mode = self.mode()
+        dropped = []
+        deleted = 0
+
+        try:
+            if mode == 'postgresql':
+                partitions = db.session.execute(text(
+                    "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+                    "JOIN pg_class c ON c.oid = i.inhrelid "
+                    "JOIN pg_class p ON p.oid = i.inhparent "
+                    "WHERE p.relname = 'flight_positions'"
+                )).all()
+                for name, bound in partitions:
+                    match = PARTITION_UPPER_BOUND.search(bound or '')
+                    if match and datetime.fromisoformat(match.group(1)) <= cutoff:
+                        db.session.execute(text(f'DROP TABLE IF EXISTS "{name}"'))
+                        dropped.append(name)
+
+            elif mode == 'sqlite':
+                for day in self._sqlite_partition_days():
+                    if datetime.combine(day + timedelta(days=1), datetime.min.time()) <= cutoff:
+                        self._day_table(day).drop(db.session.connection(), checkfirst=True)
+                        dropped.append(self.partition_name(day))
+
+            if mode != 'postgresql' and db.inspect(db.session.connection()).has_table(FlightPosition.__tablename__):
+                # Legacy rows (or the whole table in legacy mode) still need a row delete
+                deleted = db.session.query(FlightPosition).filter(
+                    FlightPosition.timestamp < cutoff
+                ).delete(synchronize_session=False)
+
+            db.session.commit()
+
+        except Exception as e:
+            self.logger.error(f"Error dropping old position partitions: {str(e)}")
+            db.session.rollback()
+            raise
+
+        self._known_partitions.difference_update(dropped)
+        return {'dropped_partitions': dropped, 'deleted_rows': deleted}
+
+    def migrate_to_partitions(self):
+        """
+        Convert a plain PostgreSQL flight_positions table to the partitioned layout
+
+        The existing table is renamed to flight_positions_legacy and attached
+        as a partition covering everything up to the end of the day of its
+        newest row (at least up to today), so its rows stay readable and are
+        dropped as a unit once they age out. The day partition after it is
+        created in the same transaction so that writes continue right away.
+
+        Returns:
+            bool: Whether a migration was performed
+        """
+        bind = db.session.get_bind()
+        if bind.dialect.name != 'postgresql' or self.mode() != 'legacy':
+            return False
+
+        today = datetime.utcnow().date()
+        try:
+            db.session.execute(text("ALTER TABLE flight_positions RENAME TO flight_positions_legacy"))
+            # The legacy partition must hold every existing row, including today's
+            newest = db.session.execute(text('SELECT MAX("timestamp") FROM flight_positions_legacy')).scalar()
+            upper = today if newest is None else max(today, newest.date() + timedelta(days=1))
+            db.session.execute(text("ALTER INDEX IF EXISTS idx_flight_position_time RENAME TO idx_flight_position_time_legacy"))
+            db.session.execute(text(POSTGRES_PARENT_DDL))
+            db.session.execute(text(
+                'CREATE INDEX IF NOT EXISTS idx_flight_position_time '
+                'ON flight_positions (flight_id, "timestamp" DESC)'
+            ))
+            db.session.execute(text(
+                "SELECT setval(pg_get_serial_sequence('flight_positions', 'id'), "
+                "COALESCE((SELECT MAX(id) FROM flight_positions_legacy), 0) + 1, false)"
+            ))
+            db.session.execute(text(
+                "ALTER TABLE flight_positions_legacy ALTER COLUMN \"timestamp\" SET NOT NULL"
+            ))
+            db.session.execute(text(
+                f"ALTER TABLE flight_positions ATTACH PARTITION flight_positions_legacy "
+                f"FOR VALUES FROM (MINVALUE) TO ('{upper:%Y-%m-%d}')"
+            ))
+            db.session.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {self.partition_name(upper)} PARTITION OF flight_positions "
+                f"FOR VALUES FROM ('{upper:%Y-%m-%d}') TO ('{upper + timedelta(days=1):%Y-%m-%d}')"
+            ))
+            db.session.commit()
+        except Exception as e:
+            self.logger.error(f"Error migrating flight_positions to partitions: {str(e)}")
+            db.session.rollback()
+            raise
+
+        self._modes[str(bind.url)] = 'postgresql'
+        self._known_partitions.add(self.partition_name(upper))
+        self.logger.info("Migrated flight_positions to a partitioned table")
+        return True
+
+
+# Shared by the position writer, the API and the retention task
+position_storage = PositionPartitionManager()
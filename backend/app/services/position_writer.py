@@ -0,0 +1,142 @@
+import calendar
+import logging
+import threading
+import time
+from config import Config
+from extensions import db
+from app.services.position_partitions import position_storage
+from app.utils.geo import approximate_distance
+
+
+class PositionWriter:
+    """
+    Buffered writer that appends FlightPosition rows during ADS-B ingest
+
+    Points that have not moved far enough since the last recorded point of the
+    same flight are dropped, and the rest are written as one batched INSERT at
+    most once every flush_interval seconds. Points of a failed INSERT go back
+    to the front of the buffer for the next flush, keeping at most max_buffer
+    points.
+    """
+
+    def __init__(self, min_distance=None, min_interval=None, flush_interval=None, max_buffer=None):
+        self.min_distance = min_distance if min_distance is not None else Config.POSITION_MIN_DISTANCE
+        self.min_interval = min_interval if min_interval is not None else Config.POSITION_MIN_INTERVAL
+        self.flush_interval = flush_interval if flush_interval is not None else Config.POSITION_FLUSH_INTERVAL
+        self.max_buffer = max_buffer if max_buffer is not None else Config.POSITION_MAX_BUFFER
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._last_points = {}  # flight_id -> (latitude, longitude, altitude, epoch seconds)
+        self._last_flush = time.monotonic()
+
+    def append(self, flight_id, state):
+        """
+        Queue a position for a flight unless it is too close to the previous one
+
+        Args:
+            flight_id: ID of the flight the position belongs to
+            state: Normalized state dict
+
+        Returns:
+            bool: Whether the point was queued
+        """
+        latitude = state['latitude']
+        longitude = state['longitude']
+        if latitude is None or longitude is None:
+            return False
+
+        timestamp = state['last_position_update']
+        epoch = calendar.timegm(timestamp.utctimetuple())
+        altitude = state['altitude']
+
+        with self._lock:
+            last = self._last_points.get(flight_id)
+            if last is not None:
+                last_latitude, last_longitude, last_altitude, last_epoch = last
+                if (latitude, longitude, altitude) == (last_latitude, last_longitude, last_altitude):
+                    return False
+                if (epoch - last_epoch < self.min_interval and
+                        approximate_distance(last_latitude, last_longitude, latitude, longitude) < self.min_distance):
+                    return False
+
+            self._last_points[flight_id] = (latitude, longitude, altitude, epoch)
+            self._buffer.append({
+                'flight_id': flight_id,
+                'latitude': latitude,
+                'longitude': longitude,
+                'altitude': altitude,
+                'ground_speed': state['ground_speed'],
+                'heading': state['heading'],
+                'timestamp': timestamp
+            })
+            return True
+
+    def extend(self, flights, states_by_icao):
+        """
+        Queue the positions of a whole ingested snapshot
+
+        Args:
+            flights: Mapping of ICAO address (icao_int) to a dict containing the flight 'id'
+            states_by_icao: Mapping of ICAO address to normalized state
+
+        Returns:
+            int: Number of queued points
+        """
+        queued = 0
+        for icao, flight in flights.items():
+            if self.append(flight['id'], states_by_icao[icao]):
+                queued += 1
+        return queued
+
+    def flush_if_due(self):
+        """Flush the buffer if flush_interval seconds have passed since the last flush"""
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            return self.flush()
+        return 0
+
+    def flush(self):
+        """
+        Write all buffered positions to their day partitions and commit
+
+        A failed write is logged and its rows are requeued, so the caller's
+        ingest carries on.
+
+        Returns:
+            int: Number of rows written
+        """
+        with self._lock:
+            rows = self._buffer
+            self._buffer = []
+            self._last_flush = time.monotonic()
+            self._prune_last_points()
+
+        if not rows:
+            return 0
+
+        try:
+            position_storage.insert(rows)
+            db.session.commit()
+        except Exception as e:
+            self.logger.error(f"Error writing {len(rows)} flight positions, requeued for the next flush: {str(e)}")
+            db.session.rollback()
+            self._requeue(rows)
+            return 0
+
+        return len(rows)
+
+    def _requeue(self, rows):
+        """Put rows of a failed write back in front of the points queued since"""
+        with self._lock:
+            self._buffer[:0] = rows
+            overflow = len(self._buffer) - self.max_buffer
+            if overflow > 0:
+                del self._buffer[:overflow]
+                self.logger.warning(f"Position buffer full, dropped the {overflow} oldest points")
+
+    def _prune_last_points(self):
+        """Forget flights that have not reported for a long time"""
+        cutoff = time.time() - max(self.min_interval * 10, 3600)
+        stale = [flight_id for flight_id, point in self._last_points.items() if point[3] < cutoff]
+        for flight_id in stale:
+            del self._last_points[flight_id]
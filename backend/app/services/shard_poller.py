@@ -0,0 +1,186 @@
+import logging
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from config import Config
+from app.services.adsb_ingest import normalize_state
+from app.utils.json_stream import StateVectorStream
+
+
+def icao_shards(icao_codes, shard_size=None):
+    """
+    Split ICAO codes into shards small enough for one icao24= query string
+
+    Args:
+        icao_codes: Iterable of ICAO codes
+        shard_size: Codes per shard (defaults to Config.ADSB_SHARD_SIZE)
+
+    Returns:
+        list: Lists of lower-cased, de-duplicated ICAO codes
+    """
+    shard_size = shard_size or Config.ADSB_SHARD_SIZE
+    codes = sorted({code.lower() for code in icao_codes if code})
+    return [codes[start:start + shard_size] for start in range(0, len(codes), shard_size)]
+
+
+def region_shards(spec=None):
+    """
+    Split the globe into a grid of bounding boxes
+
+    Args:
+        spec: Grid as 'ROWSxCOLS', e.g. '3x6' (defaults to Config.ADSB_REGION_SHARDS)
+
+    Returns:
+        list: (lamin, lomin, lamax, lomax) tuples covering the globe
+    """
+    spec = spec or Config.ADSB_REGION_SHARDS or '1x1'
+    rows, cols = (int(part) for part in spec.lower().split('x'))
+    lat_step = 180 / rows
+    lon_step = 360 / cols
+    return [
+        (-90 + row * lat_step, -180 + col * lon_step, -90 + (row + 1) * lat_step, -180 + (col + 1) * lon_step)
+        for row in range(rows) for col in range(cols)
+    ]
+
+
+class ShardPoller:
+    """
+    Polls the ADS-B upstream in shards on a bounded thread pool
+
+    Each worker fetches one shard (a slice of tracked ICAO codes or a
+    lamin/lomin/lamax/lomax box) and stream-parses and normalizes it. Every
+    parsed batch is handed to ADSBService.process_states on the polling
+    thread as soon as it arrives, so ingest overlaps the slower shards'
+    downloads and no whole snapshot is held in memory. Region shards share
+    their edges; an aircraft reported by two shards is dropped as a
+    duplicate by the fusion stage. A failed shard is logged and skipped
+    rather than failing the whole poll. The summary counts the new and
+    updated aircraft of every shard so that AdaptivePollScheduler can tell
+    busy regions from quiet ones.
+    """
+
+    def __init__(self, service, max_workers=None):
+        self.service = service
+        self.max_workers = max_workers or Config.ADSB_SHARD_WORKERS
+        self.logger = logging.getLogger(__name__)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='adsb-shard')
+
+    def _fetch_shard(self, index, params, received_at, batches):
+        """
+        Fetch one shard, putting its normalized batches on a queue
+
+        Puts (index, states) for every batch, then (index, None) once the
+        shard is complete or (index, exception) if it failed.
+        """
+        try:
+            response = self.service.upstream.get('/states/all', params=params, stream=True)
+            with response:
+                stream = StateVectorStream(response.iter_content(chunk_size=Config.ADSB_STREAM_CHUNK_SIZE),
+                                           batch_size=Config.ADSB_STREAM_BATCH_SIZE)
+                for batch in stream:
+                    states = [state for state in (normalize_state(raw, received_at) for raw in batch) if state]
+                    if states:
+                        batches.put((index, states))
+        except Exception as e:
+            batches.put((index, e))
+            return
+        batches.put((index, None))
+
+    def _poll(self, shard_params):
+        """
+        Fetch shards concurrently and ingest their batches as they arrive
+
+        Args:
+            shard_params: List of query parameter dicts, one per shard
+
+        Returns:
+            dict: Shard counts, ingested state count, summed ingest counts, timings
+                  and 'shard_changes', the number of new and updated aircraft of
+                  each shard in shard_params order (None for failed shards)
+        """
+        received_at = datetime.utcnow()
+        started = time.perf_counter()
+
+        # Bounded so that fast shards wait for the ingest instead of piling up in memory
+        batches = queue.Queue(maxsize=self.max_workers * 2)
+        for index, params in enumerate(shard_params):
+            self._executor.submit(self._fetch_shard, index, params, received_at, batches)
+
+        totals = {'count': 0, 'new': 0, 'updated': 0, 'unchanged': 0, 'stale': 0, 'duplicates': 0}
+        shard_changes = [0] * len(shard_params)
+        failed = 0
+        ingest = 0.0
+        pending = len(shard_params)
+        try:
+            while pending:
+                index, item = batches.get()
+                if item is None:
+                    pending -= 1
+                    continue
+                if isinstance(item, Exception):
+                    pending -= 1
+                    failed += 1
+                    shard_changes[index] = None
+                    self.logger.error(f"Error fetching ADS-B shard {shard_params[index]}: {str(item)}")
+                    continue
+
+                phase = time.perf_counter()
+                result = self.service.process_states(item)
+                ingest += time.perf_counter() - phase
+                totals['count'] += len(item)
+                for key in ('new', 'updated', 'unchanged', 'stale', 'duplicates'):
+                    totals[key] += result.get(key, 0)
+                if shard_changes[index] is not None:
+                    changed = result.get('changed_icao', ())
+                    shard_changes[index] += sum(1 for state in item if state['icao_int'] in changed)
+        finally:
+            # After a failed ingest, let the remaining workers finish instead of blocking on the queue
+            while pending:
+                item = batches.get()[1]
+                if item is None or isinstance(item, Exception):
+                    pending -= 1
+
+        elapsed = time.perf_counter() - started
+        summary = {
+            'shards': len(shard_params),
+            'failed_shards': failed,
+            **totals,
+            'shard_changes': shard_changes,
+            'timings': {'total': elapsed, 'ingest': ingest}
+        }
+        self.logger.info(
+            f"Polled {summary['shards']} shards ({failed} failed, {summary['count']} states, "
+            f"{summary['duplicates']} duplicate) in {elapsed * 1000:.1f}ms, of which ingest {ingest * 1000:.1f}ms"
+        )
+        return summary
+
+    def poll_icao_codes(self, icao_codes, shard_size=None):
+        """
+        Poll a set of tracked aircraft, ADSB_SHARD_SIZE ICAO codes per request
+
+        Args:
+            icao_codes: Iterable of ICAO codes
+            shard_size: Codes per shard (optional)
+
+        Returns:
+            dict: Poll summary
+        """
+        shards = icao_shards(icao_codes, shard_size)
+        return self._poll([{'icao24': ','.join(shard)} for shard in shards])
+
+    def poll_regions(self, boxes=None):
+        """
+        Poll the globe as a grid of bounding boxes
+
+        Args:
+            boxes: List of (lamin, lomin, lamax, lomax) tuples (defaults to region_shards())
+
+        Returns:
+            dict: Poll summary
+        """
+        boxes = boxes or region_shards()
+        return self._poll([
+            {'lamin': lamin, 'lomin': lomin, 'lamax': lamax, 'lomax': lomax}
+            for lamin, lomin, lamax, lomax in boxes
+        ])
@@ -0,0 +1,101 @@
+import threading
+import time
+from collections import namedtuple
+from config import Config
+from app.utils.geo import approximate_distance
+
+
+SnapshotDiff = namedtuple('SnapshotDiff', ['new', 'updated', 'unchanged', 'stale'])
+SnapshotDiff.__doc__ = """
+Changes between an ADS-B snapshot and the previously published state
+
+Attributes:
+    new: States of aircraft not seen before
+    updated: States that moved or changed squawk/on_ground (or are due a refresh)
+    unchanged: States with no significant change
+    stale: ICAO addresses (icao_int) of aircraft not reported for longer than the stale timeout
+"""
+
+
+class SnapshotDiffer:
+    """
+    Compares each ADS-B snapshot with the last published state of every aircraft
+
+    Only aircraft that are new, moved more than min_distance meters (or
+    min_altitude_change in altitude), changed squawk or on_ground, or have not
+    been published for refresh_interval seconds count as changed. Comparisons
+    are made against the last *published* state rather than the previous
+    snapshot, so slow drift still gets published once it adds up.
+    """
+
+    def __init__(self, min_distance=None, min_altitude_change=None, refresh_interval=None, stale_after=None):
+        self.min_distance = min_distance if min_distance is not None else Config.SNAPSHOT_MIN_DISTANCE
+        self.min_altitude_change = (min_altitude_change if min_altitude_change is not None
+                                    else Config.SNAPSHOT_MIN_ALTITUDE_CHANGE)
+        self.refresh_interval = refresh_interval if refresh_interval is not None else Config.SNAPSHOT_REFRESH_INTERVAL
+        self.stale_after = stale_after if stale_after is not None else Config.LIVE_STATE_MAX_AGE
+        self._lock = threading.Lock()
+        self._published = {}  # ICAO address -> (latitude, longitude, altitude, squawk, on_ground, published at)
+        self._last_seen = {}  # ICAO address -> monotonic time of the last report
+
+    def _changed(self, previous, state, now):
+        """Whether a state differs significantly from the last published one"""
+        latitude, longitude, altitude, squawk, on_ground, published_at = previous
+        if now - published_at >= self.refresh_interval:
+            return True
+        if state['squawk'] != squawk or state['on_ground'] != on_ground:
+            return True
+        if (state['latitude'] is None) != (latitude is None):
+            return True
+        if latitude is not None and approximate_distance(
+                latitude, longitude, state['latitude'], state['longitude']) >= self.min_distance:
+            return True
+        if (state['altitude'] is None) != (altitude is None):
+            return True
+        return altitude is not None and abs(state['altitude'] - altitude) >= self.min_altitude_change
+
+    def diff(self, states, now=None):
+        """
+        Classify a snapshot and record the changed states as published
+
+        Args:
+            states: List of dicts produced by normalize_state
+            now: Monotonic timestamp (defaults to time.monotonic())
+
+        Returns:
+            SnapshotDiff: New, updated and unchanged states plus stale ICAO addresses
+        """
+        now = now if now is not None else time.monotonic()
+        new, updated, unchanged = [], [], []
+
+        with self._lock:
+            for state in states:
+                icao = state['icao_int']
+                self._last_seen[icao] = now
+                previous = self._published.get(icao)
+                if previous is None:
+                    new.append(state)
+                elif self._changed(previous, state, now):
+                    updated.append(state)
+                else:
+                    unchanged.append(state)
+                    continue
+                self._published[icao] = (state['latitude'], state['longitude'], state['altitude'],
+                                         state['squawk'], state['on_ground'], now)
+
+            cutoff = now - self.stale_after
+            stale = [icao for icao, seen in self._last_seen.items() if seen < cutoff]
+            for icao in stale:
+                del self._last_seen[icao]
+                self._published.pop(icao, None)
+
+        return SnapshotDiff(new, updated, unchanged, stale)
+
+    def forget(self, icao_ints):
+        """Drop published state, e.g. after a failed write, so the aircraft is treated as new next time"""
+        with self._lock:
+            for icao in icao_ints:
+                self._published.pop(icao, None)
+
+    def __len__(self):
+        return len(self._published)
@@ -0,0 +1,31 @@
+from config import Config
+from .base import StateSource, StateVectorTracker
+from .rest import RestSource
+from .sbs import SBSSource
+from .beast import BeastSource
+from .replay import FileReplaySource
+
+
+def create_source(name=None, **kwargs):
+    """
+    Build the source adapter selected by name (defaults to Config.ADSB_SOURCE)
+
+    Args:
+        name: 'rest', 'sbs', 'beast' or 'avr'
+        **kwargs: Passed to the adapter (host, port, batch_interval, ...)
+
+    Returns:
+        StateSource: Configured adapter
+    """
+    name = (name or Config.ADSB_SOURCE).lower()
+    if name == 'rest':
+        return RestSource(**kwargs)
+    if name == 'sbs':
+        return SBSSource(**kwargs)
+    if name in ('beast', 'avr'):
+        return BeastSource(framing=name, **kwargs)
+    raise ValueError(f"Unknown ADS-B source: {name}")
+
+
+__all__ = ['StateSource', 'StateVectorTracker', 'RestSource', 'SBSSource', 'BeastSource',
+           'FileReplaySource', 'create_source']
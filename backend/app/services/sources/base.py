@@ -0,0 +1,233 @@
+import socket
+import time
+from datetime import datetime
+from config import Config
+from app.services.adsb_ingest import normalize_state
+
+
+# Layout of an OpenSky state vector; every source produces vectors in this layout
+STATE_VECTOR_FIELDS = (
+    'icao24', 'callsign', 'origin_country', 'time_position', 'last_contact', 'longitude',
+    'latitude', 'baro_altitude', 'on_ground', 'velocity', 'true_track', 'vertical_rate',
+    'sensors', 'geo_altitude', 'squawk', 'spi', 'position_source'
+)
+FIELD_INDEX = {name: index for index, name in enumerate(STATE_VECTOR_FIELDS)}
+
+POSITION_SOURCE_ADSB = 0
+
+
+class StateVectorTracker:
+    """
+    Accumulates per-message updates into one state vector per aircraft
+
+    Receiver feeds report fields piecemeal (position, velocity and identity
+    arrive in separate messages); the tracker merges them and remembers which
+    aircraft changed since the last drain.
+    """
+
+    def __init__(self, max_age=None, position_source=POSITION_SOURCE_ADSB):
+        self.max_age = max_age if max_age is not None else Config.LIVE_STATE_MAX_AGE
+        self.position_source = position_source
+        self._vectors = {}  # ICAO code -> state vector list
+        self._cpr = {}  # ICAO code -> {0: even frame, 1: odd frame}
+        self._dirty = set()
+        self.latest = 0  # Newest message time seen, so replays age out by capture time
+
+    def __contains__(self, icao_code):
+        return icao_code in self._vectors
+
+    def __len__(self):
+        return len(self._vectors)
+
+    def update(self, icao_code, timestamp, **fields):
+        """
+        Merge fields into an aircraft's state vector
+
+        Args:
+            icao_code: Lower-case hex ICAO address
+            timestamp: Reception time in epoch seconds (becomes last_contact)
+            **fields: State vector fields by name, e.g. latitude=..., squawk=...
+        """
+        vector = self._vectors.get(icao_code)
+        if vector is None:
+            vector = [None] * len(STATE_VECTOR_FIELDS)
+            vector[FIELD_INDEX['icao24']] = icao_code
+            vector[FIELD_INDEX['spi']] = False
+            vector[FIELD_INDEX['position_source']] = self.position_source
+            self._vectors[icao_code] = vector
+
+        for name, value in fields.items():
+            if value is not None:
+                vector[FIELD_INDEX[name]] = value
+        vector[FIELD_INDEX['last_contact']] = timestamp
+        self._dirty.add(icao_code)
+        if timestamp > self.latest:
+            self.latest = timestamp
+
+    def position(self, icao_code):
+        """Last known (latitude, longitude) of an aircraft, or None"""
+        vector = self._vectors.get(icao_code)
+        if vector is None or vector[FIELD_INDEX['latitude']] is None:
+            return None
+        return vector[FIELD_INDEX['latitude']], vector[FIELD_INDEX['longitude']]
+
+    def cpr_frames(self, icao_code):
+        """Mutable dict of the last even (0) and odd (1) CPR frames of an aircraft"""
+        return self._cpr.setdefault(icao_code, {})
+
+    def drain(self):
+        """
+        Take the state vectors of aircraft updated since the previous call
+
+        Returns:
+            list: Copies of the updated state vectors
+        """
+        vectors = [list(self._vectors[icao_code]) for icao_code in self._dirty]
+        self._dirty = set()
+        return vectors
+
+    def evict(self, now=None):
+        """
+        Forget aircraft not heard from within max_age seconds
+
+        Args:
+            now: Reference time in epoch seconds (defaults to the newest message time)
+
+        Returns:
+            int: Number of evicted aircraft
+        """
+        cutoff = (now or self.latest) - self.max_age
+        stale = [code for code, vector in self._vectors.items() if vector[FIELD_INDEX['last_contact']] < cutoff]
+        for icao_code in stale:
+            del self._vectors[icao_code]
+            self._cpr.pop(icao_code, None)
+            self._dirty.discard(icao_code)
+        return len(stale)
+
+
+class StateSource:
+    """
+    Base class of ADS-B source adapters
+
+    Subclasses implement batches(), yielding lists of OpenSky-layout state
+    vectors; normalized_batches() turns them into the dicts consumed by
+    ADSBService.process_states, so every source shares one ingest pipeline.
+    """
+
+    name = 'base'
+
+    def batches(self):
+        """
+        Yield lists of raw state vectors
+
+        Returns:
+            iterator: Lists of state vector lists
+        """
+        raise NotImplementedError
+
+    def normalized_batches(self):
+        """
+        Yield lists of normalized states
+
+        Returns:
+            iterator: Lists of dicts produced by normalize_state
+        """
+        for batch in self.batches():
+            received_at = datetime.utcnow()
+            states = [state for state in (normalize_state(raw, received_at) for raw in batch) if state]
+            if states:
+                yield states
+
+    def close(self):
+        """Release any connection held by the source"""
+
+
+class MessageSource(StateSource):
+    """
+    Base class of message-oriented feeds (SBS, Beast, AVR)
+
+    Decoded messages update a StateVectorTracker, which is drained into a
+    batch every batch_interval seconds (or every batch_size messages when
+    set, e.g. for replays).
+    """
+
+    def __init__(self, batch_interval=None, batch_size=None):
+        self.batch_interval = batch_interval if batch_interval is not None else Config.ADSB_SOURCE_BATCH_INTERVAL
+        self.batch_size = batch_size
+        self.tracker = StateVectorTracker()
+        self._since_drain = 0
+        self._last_drain = time.monotonic()
+
+    def _drain_due(self, force=False):
+        """
+        Return the pending batch if a drain is due, else None
+
+        Args:
+            force: Drain regardless of batch_interval/batch_size
+        """
+        now = time.monotonic()
+        if not force:
+            self._since_drain += 1
+            if self.batch_size is not None:
+                if self._since_drain < self.batch_size:
+                    return None
+            elif now - self._last_drain < self.batch_interval:
+                return None
+
+        self._since_drain = 0
+        self._last_drain = now
+        batch = self.tracker.drain()
+        self.tracker.evict()
+        return batch or None
+
+
+class SocketSource(MessageSource):
+    """
+    Base class of feeds read from a TCP socket
+
+    Subclasses implement _messages(chunks), consuming raw byte chunks and
+    feeding the decoder, yielding once per decoded message (and once per
+    empty chunk, so batches are still drained while the feed is idle).
+    """
+
+    default_port = None
+
+    def __init__(self, host=None, port=None, timeout=None, **kwargs):
+        super().__init__(**kwargs)
+        self.host = host or Config.ADSB_SOURCE_HOST
+        self.port = port or Config.ADSB_SOURCE_PORT or self.default_port
+        self.timeout = timeout if timeout is not None else Config.ADSB_SOURCE_TIMEOUT
+        self._socket = None
+
+    def _chunks(self):
+        """Read raw chunks from the socket, yielding b'' when the read times out"""
+        self._socket = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        try:
+            while True:
+                try:
+                    chunk = self._socket.recv(65536)
+                except socket.timeout:
+                    yield b''
+                    continue
+                if not chunk:
+                    return
+                yield chunk
+        finally:
+            self.close()
+
+    def _messages(self, chunks):
+        raise NotImplementedError
+
+    def batches(self):
+        for _ in self._messages(self._chunks()):
+            batch = self._drain_due()
+            if batch:
+                yield batch
+        batch = self._drain_due(force=True)
+        if batch:
+            yield batch
+
+    def close(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
@@ -0,0 +1,221 @@
+import time
+from app.services.sources.base import SocketSource
+from app.services.sources.modes import ModeSDecoder
+
+
+BEAST_ESCAPE = 0x1A
+
+MLAT_TICKS_PER_SECOND = 12e6  # Beast/AVR timestamps count a 12 MHz clock
+MLAT_MAX_DRIFT = 2.0  # Seconds a live feed's MLAT clock may run apart from the host clock
+
+# Frame type -> unescaped length of timestamp (6) + signal level (1) + message
+BEAST_FRAME_LENGTHS = {
+    0x31: 7 + 2,   # '1': Mode A/C
+    0x32: 7 + 7,   # '2': Mode S short
+    0x33: 7 + 14,  # '3': Mode S long
+}
+
+
+class BeastFrameReader:
+    """
+    Incremental parser for the Beast binary protocol (dump1090 port 30005)
+
+    Frames start with 0x1A followed by a type byte; any 0x1A inside the
+    frame body is escaped by doubling it. Partial frames at the end of a
+    chunk are kept until the next chunk arrives.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self.frames = 0
+        self.resyncs = 0
+
+    def feed(self, data):
+        """
+        Parse a chunk of bytes
+
+        Args:
+            data: Raw bytes from the feed
+
+        Returns:
+            list: (frame type, 48-bit MLAT timestamp, signal level, message bytes) tuples
+        """
+        buffer = self._buffer
+        buffer.extend(data)
+        frames = []
+        size = len(buffer)
+        position = 0
+
+        while True:
+            start = buffer.find(BEAST_ESCAPE, position)
+            if start < 0 or start + 1 >= size:
+                position = size if start < 0 else start
+                break
+
+            length = BEAST_FRAME_LENGTHS.get(buffer[start + 1])
+            if length is None:
+                # Escaped 0x1A in the middle of a stream we joined late, or an unsupported frame
+                position = start + 1
+                continue
+
+            end = start + 2 + length
+            body = buffer[start + 2:end]
+            if BEAST_ESCAPE in body:
+                body, end = self._unescape(buffer, start + 2, length)
+                if body is None:
+                    if end is None:
+                        position = start  # Incomplete frame; wait for more data
+                        break
+                    self.resyncs += 1
+                    position = end
+                    continue
+            elif end > size:
+                position = start
+                break
+
+            frames.append((buffer[start + 1], int.from_bytes(body[:6], 'big'), body[6], bytes(body[7:])))
+            position = end
+
+        del buffer[:position]
+        self.frames += len(frames)
+        return frames
+
+    @staticmethod
+    def _unescape(buffer, offset, length):
+        """
+        Read `length` unescaped bytes starting at offset
+
+        Returns:
+            tuple: (body, end offset), (None, None) if incomplete, or (None, resync offset)
+                   when an unescaped 0x1A starts a new frame inside this one
+        """
+        body = bytearray()
+        index = offset
+        size = len(buffer)
+        while len(body) < length:
+            if index >= size:
+                return None, None
+            byte = buffer[index]
+            if byte == BEAST_ESCAPE:
+                if index + 1 >= size:
+                    return None, None
+                if buffer[index + 1] != BEAST_ESCAPE:
+                    return None, index
+                index += 1
+            body.append(byte)
+            index += 1
+        return body, index
+
+
+class MLATClock:
+    """
+    Converts 12 MHz MLAT timestamps of Beast/AVR frames into epoch seconds
+
+    The counter has no epoch of its own, so it is anchored to a reference
+    time on the first frame and frames are timed by their offset from it.
+    This keeps the spacing of messages that arrive in the same chunk, which
+    state fusion needs to tell a new fix from a duplicate. The clock is
+    re-anchored when the counter goes backwards (receiver restart or
+    midnight reset for GPS-synchronised receivers) or, with max_drift set,
+    when it runs more than max_drift seconds apart from the reference.
+    """
+
+    def __init__(self, max_drift=None):
+        self.max_drift = max_drift
+        self._anchor = None  # (ticks, epoch seconds)
+
+    def time(self, ticks, now):
+        """
+        Epoch seconds of a frame
+
+        Args:
+            ticks: 48-bit MLAT timestamp (0 when the receiver does not provide one)
+            now: Reference time in epoch seconds, returned for frames without a timestamp
+
+        Returns:
+            float: Epoch seconds
+        """
+        if not ticks:
+            return now
+        if self._anchor is not None:
+            anchor_ticks, anchor_time = self._anchor
+            timestamp = anchor_time + (ticks - anchor_ticks) / MLAT_TICKS_PER_SECOND
+            if ticks >= anchor_ticks and (self.max_drift is None or abs(timestamp - now) <= self.max_drift):
+                return timestamp
+        self._anchor = (ticks, now)
+        return now
+
+
+def parse_avr_line(line):
+    """
+    Parse one AVR text frame (dump1090 port 30002)
+
+    Accepts '*<hex>;' frames and '@<12 hex digit MLAT timestamp><hex>;' frames.
+
+    Returns:
+        tuple: (48-bit MLAT timestamp, 0 for '*' frames; message bytes), or None
+               if the line is not a Mode S frame
+    """
+    line = line.strip()
+    if not line.endswith(';') or line[:1] not in ('*', '@'):
+        return None
+    payload = line[1:-1]
+    ticks = '0'
+    if line[0] == '@':
+        ticks, payload = payload[:12], payload[12:]
+    if len(payload) not in (14, 28):
+        return None
+    try:
+        return int(ticks, 16), bytes.fromhex(payload)
+    except ValueError:
+        return None
+
+
+class BeastSource(SocketSource):
+    """
+    Streaming TCP adapter for Beast binary (port 30005) or AVR text (port 30002) feeds
+
+    Messages are timed by their MLAT timestamps (see MLATClock), or by the
+    time they are read when the receiver sends none.
+    """
+
+    name = 'beast'
+
+    def __init__(self, framing='beast', **kwargs):
+        if framing not in ('beast', 'avr'):
+            raise ValueError(f"Unsupported framing: {framing}")
+        self.framing = framing
+        self.default_port = 30005 if framing == 'beast' else 30002
+        super().__init__(**kwargs)
+        self.decoder = ModeSDecoder(self.tracker)
+        self.reader = BeastFrameReader()
+        self.clock = MLATClock(max_drift=MLAT_MAX_DRIFT)
+
+    def _messages(self, chunks):
+        if self.framing == 'beast':
+            return self._beast_messages(chunks)
+        return self._avr_messages(chunks)
+
+    def _beast_messages(self, chunks):
+        for chunk in chunks:
+            if not chunk:
+                yield None
+                continue
+            for frame_type, ticks, _, message in self.reader.feed(chunk):
+                if frame_type != 0x31:
+                    self.decoder.feed(message, self.clock.time(ticks, time.time()))
+                yield None
+
+    def _avr_messages(self, chunks):
+        pending = b''
+        for chunk in chunks:
+            if not chunk:
+                yield None
+                continue
+            lines = (pending + chunk).split(b'\n')
+            pending = lines.pop()
+            for line in lines:
+                frame = parse_avr_line(line.decode('ascii', errors='replace'))
+                if frame is not None:
+                    self.decoder.feed(frame[1], self.clock.time(frame[0], time.time()))
+                yield None
@@ -0,0 +1,307 @@
+"""
+Mode S / ADS-B message decoding for raw receiver feeds (Beast and AVR)
+
+Handles the downlink formats needed to build state vectors:
+
+    DF17/18 extended squitter: identification (TC 1-4), surface position
+        (TC 5-8, on-ground flag only), airborne position with CPR decoding
+        (TC 9-18 barometric, TC 20-22 GNSS altitude) and velocity (TC 19)
+    DF4/20 altitude reply and DF5/21 identity reply (squawk), accepted only
+        for addresses already confirmed by a DF17/18 message
+
+Values are converted to the units of OpenSky state vectors (meters, m/s).
+"""
+import math
+
+
+FEET_TO_METERS = 0.3048
+KNOTS_TO_MS = 0.514444
+FPM_TO_MS = 0.00508
+
+CALLSIGN_CHARSET = '#ABCDEFGHIJKLMNOPQRSTUVWXYZ##### ###############0123456789######'
+
+CPR_MAX = 131072.0  # 2 ** 17
+CPR_PAIR_MAX_AGE = 10.0  # Seconds between even and odd frames for a global decode
+
+MODES_GENERATOR = 0xFFF409
+
+
+def _crc_table():
+    table = []
+    for byte in range(256):
+        crc = byte << 16
+        for _ in range(8):
+            crc = ((crc << 1) ^ MODES_GENERATOR) if crc & 0x800000 else crc << 1
+        table.append(crc & 0xFFFFFF)
+    return table
+
+
+CRC_TABLE = _crc_table()
+
+
+def modes_crc(data):
+    """
+    Mode S CRC-24 of a message excluding its trailing 24 parity bits
+
+    Args:
+        data: Message bytes (7 or 14)
+
+    Returns:
+        int: 24-bit remainder
+    """
+    crc = 0
+    for byte in data[:-3]:
+        crc = ((crc << 8) & 0xFFFFFF) ^ CRC_TABLE[((crc >> 16) ^ byte) & 0xFF]
+    return crc
+
+
+def cpr_nl(latitude):
+    """Number of CPR longitude zones at a latitude"""
+    latitude = abs(latitude)
+    if latitude == 0:
+        return 59
+    if latitude == 87:
+        return 2
+    if latitude > 87:
+        return 1
+    a = 1 - math.cos(math.pi / 30)
+    b = math.cos(math.radians(latitude)) ** 2
+    return int(math.floor(2 * math.pi / math.acos(1 - a / b)))
+
+
+def cpr_global(even, odd, odd_is_newer):
+    """
+    Decode an airborne position from an even/odd CPR frame pair
+
+    Args:
+        even: (lat_cpr, lon_cpr) of the even frame
+        odd: (lat_cpr, lon_cpr) of the odd frame
+        odd_is_newer: Whether the odd frame was received last
+
+    Returns:
+        tuple: (latitude, longitude) or None if the frames straddle a zone boundary
+    """
+    lat_even, lon_even = even[0] / CPR_MAX, even[1] / CPR_MAX
+    lat_odd, lon_odd = odd[0] / CPR_MAX, odd[1] / CPR_MAX
+
+    j = math.floor(59 * lat_even - 60 * lat_odd + 0.5)
+    latitude_even = 360 / 60 * (j % 60 + lat_even)
+    latitude_odd = 360 / 59 * (j % 59 + lat_odd)
+    if latitude_even >= 270:
+        latitude_even -= 360
+    if latitude_odd >= 270:
+        latitude_odd -= 360
+
+    nl = cpr_nl(latitude_even)
+    if nl != cpr_nl(latitude_odd):
+        return None
+
+    if odd_is_newer:
+        latitude = latitude_odd
+        zones = max(nl - 1, 1)
+        lon_cpr = lon_odd
+    else:
+        latitude = latitude_even
+        zones = max(nl, 1)
+        lon_cpr = lon_even
+
+    m = math.floor(lon_even * (nl - 1) - lon_odd * nl + 0.5)
+    longitude = 360 / zones * (m % zones + lon_cpr)
+    if longitude >= 180:
+        longitude -= 360
+    return latitude, longitude
+
+
+def cpr_local(reference, cpr, odd):
+    """
+    Decode an airborne position from a single CPR frame near a reference position
+
+    Valid while the aircraft is within about 180 NM of the reference.
+
+    Args:
+        reference: (latitude, longitude) of the last known position
+        cpr: (lat_cpr, lon_cpr) of the frame
+        odd: Whether the frame is odd
+
+    Returns:
+        tuple: (latitude, longitude)
+    """
+    ref_lat, ref_lon = reference
+    lat_cpr, lon_cpr = cpr[0] / CPR_MAX, cpr[1] / CPR_MAX
+
+    d_lat = 360 / (60 - odd)
+    j = math.floor(ref_lat / d_lat) + math.floor((ref_lat % d_lat) / d_lat - lat_cpr + 0.5)
+    latitude = d_lat * (j + lat_cpr)
+
+    zones = cpr_nl(latitude) - odd
+    d_lon = 360 / zones if zones > 0 else 360
+    m = math.floor(ref_lon / d_lon) + math.floor((ref_lon % d_lon) / d_lon - lon_cpr + 0.5)
+    longitude = d_lon * (m + lon_cpr)
+    return latitude, longitude
+
+
+def decode_ac12(value):
+    """Altitude in feet from the 12-bit ADS-B altitude field (25 ft encoding only)"""
+    if not value & 0x10:
+        return None  # Gillham-coded altitudes are not decoded
+    n = ((value & 0xFE0) >> 1) | (value & 0x0F)
+    return n * 25 - 1000
+
+
+def decode_ac13(value):
+    """Altitude in feet from the 13-bit altitude code of DF4/20 replies"""
+    if value & 0x40 or not value & 0x10:
+        return None  # Metric and Gillham-coded altitudes are not decoded
+    n = ((value & 0x1F80) >> 2) | ((value & 0x20) >> 1) | (value & 0x0F)
+    return n * 25 - 1000
+
+
+def decode_squawk(value):
+    """Squawk code string from the 13-bit identity field of DF5/21 replies"""
+    def bit(position):
+        return (value >> position) & 1
+
+    a = bit(7) * 4 + bit(9) * 2 + bit(11)
+    b = bit(1) * 4 + bit(3) * 2 + bit(5)
+    c = bit(8) * 4 + bit(10) * 2 + bit(12)
+    d = bit(0) * 4 + bit(2) * 2 + bit(4)
+    return f"{a}{b}{c}{d}"
+
+
+def decode_callsign(me):
+    """Callsign from the ME field of an identification message"""
+    chars = [CALLSIGN_CHARSET[(me >> shift) & 0x3F] for shift in range(42, -1, -6)]
+    return ''.join(chars).replace('#', '').strip() or None
+
+
+class ModeSDecoder:
+    """
+    Decodes raw Mode S messages into updates of a StateVectorTracker
+
+    CPR frames are kept per aircraft in the tracker so positions can be
+    decoded globally from an even/odd pair, then locally from single frames
+    once a position is known.
+    """
+
+    def __init__(self, tracker):
+        self.tracker = tracker
+        self.messages = 0
+        self.rejected = 0
+
+    def feed(self, message, timestamp):
+        """
+        Decode one message
+
+        Args:
+            message: Message bytes (7 or 14 bytes)
+            timestamp: Reception time in epoch seconds
+
+        Returns:
+            bool: Whether the message was decoded and applied
+        """
+        self.messages += 1
+        if len(message) not in (7, 14):
+            self.rejected += 1
+            return False
+
+        df = message[0] >> 3
+        if df in (17, 18) and len(message) == 14:
+            if modes_crc(message) != int.from_bytes(message[-3:], 'big'):
+                self.rejected += 1
+                return False
+            icao_code = message[1:4].hex()
+            return self._extended_squitter(icao_code, int.from_bytes(message[4:11], 'big'), timestamp)
+
+        if df in (4, 5, 20, 21):
+            # Address/parity replies: the address is the CRC XOR the parity field
+            icao_code = f"{modes_crc(message) ^ int.from_bytes(message[-3:], 'big'):06x}"
+            if icao_code not in self.tracker:
+                self.rejected += 1
+                return False
+            field = int.from_bytes(message[2:4], 'big') & 0x1FFF
+            if df in (4, 20):
+                altitude = decode_ac13(field)
+                if altitude is None:
+                    return False
+                self.tracker.update(icao_code, timestamp, baro_altitude=altitude * FEET_TO_METERS)
+            else:
+                self.tracker.update(icao_code, timestamp, squawk=decode_squawk(field))
+            return True
+
+        self.rejected += 1
+        return False
+
+    def _extended_squitter(self, icao_code, me, timestamp):
+        type_code = me >> 51
+
+        if 1 <= type_code <= 4:
+            self.tracker.update(icao_code, timestamp, callsign=decode_callsign(me))
+            return True
+
+        if 5 <= type_code <= 8:
+            self.tracker.update(icao_code, timestamp, on_ground=True)
+            return True
+
+        if 9 <= type_code <= 18 or 20 <= type_code <= 22:
+            return self._airborne_position(icao_code, type_code, me, timestamp)
+
+        if type_code == 19:
+            return self._velocity(icao_code, me, timestamp)
+
+        return False
+
+    def _airborne_position(self, icao_code, type_code, me, timestamp):
+        altitude_field = (me >> 36) & 0xFFF
+        odd = (me >> 34) & 1
+        cpr = ((me >> 17) & 0x1FFFF, me & 0x1FFFF)
+
+        fields = {'on_ground': False}
+        if type_code <= 18:
+            altitude = decode_ac12(altitude_field)
+            if altitude is not None:
+                fields['baro_altitude'] = altitude * FEET_TO_METERS
+        elif altitude_field:
+            fields['geo_altitude'] = float(altitude_field)  # GNSS height is already in meters
+
+        frames = self.tracker.cpr_frames(icao_code)
+        frames[odd] = (cpr[0], cpr[1], timestamp)
+        other = frames.get(1 - odd)
+
+        position = None
+        reference = self.tracker.position(icao_code)
+        if other is not None and timestamp - other[2] <= CPR_PAIR_MAX_AGE:
+            position = cpr_global(frames[0][:2], frames[1][:2], odd_is_newer=bool(odd))
+        elif reference is not None:
+            position = cpr_local(reference, cpr, odd)
+
+        if position is not None:
+            fields['latitude'], fields['longitude'] = position
+            fields['time_position'] = timestamp
+        self.tracker.update(icao_code, timestamp, **fields)
+        return True
+
+    def _velocity(self, icao_code, me, timestamp):
+        subtype = (me >> 48) & 0x7
+        fields = {}
+
+        if subtype in (1, 2):
+            v_ew = (me >> 32) & 0x3FF
+            v_ns = (me >> 21) & 0x3FF
+            if v_ew and v_ns:
+                factor = 4 if subtype == 2 else 1
+                vx = (v_ew - 1) * factor * (-1 if (me >> 42) & 1 else 1)
+                vy = (v_ns - 1) * factor * (-1 if (me >> 31) & 1 else 1)
+                fields['velocity'] = math.hypot(vx, vy) * KNOTS_TO_MS
+                fields['true_track'] = math.degrees(math.atan2(vx, vy)) % 360
+        elif subtype in (3, 4) and (me >> 42) & 1:
+            # Airspeed messages only carry the magnetic heading
+            fields['true_track'] = ((me >> 32) & 0x3FF) * 360 / 1024
+
+        vertical_rate = (me >> 10) & 0x1FF
+        if vertical_rate:
+            fields['vertical_rate'] = (vertical_rate - 1) * 64 * (-1 if (me >> 19) & 1 else 1) * FPM_TO_MS
+
+        if not fields:
+            return False
+        self.tracker.update(icao_code, timestamp, **fields)
+        return True
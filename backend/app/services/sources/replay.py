@@ -0,0 +1,126 @@
+import os
+import time
+from app.services.sources.base import MessageSource
+from app.services.sources.beast import BeastFrameReader, MLATClock, parse_avr_line
+from app.services.sources.modes import ModeSDecoder
+from app.services.sources.sbs import SBSDecoder
+from app.utils.json_stream import StateVectorStream
+
+
+REPLAY_FORMATS = ('json', 'sbs', 'beast', 'avr')
+
+EXTENSION_FORMATS = {
+    '.json': 'json',
+    '.jsonl': 'json',
+    '.sbs': 'sbs',
+    '.csv': 'sbs',
+    '.bin': 'beast',
+    '.beast': 'beast',
+    '.avr': 'avr',
+    '.txt': 'avr',
+}
+
+
+class FileReplaySource(MessageSource):
+    """
+    Replays a recorded capture through the normal ingest pipeline
+
+    Supported formats:
+        json: OpenSky /states/all documents, one per line (JSON Lines)
+        sbs: SBS-1 BaseStation lines
+        beast: Beast binary capture
+        avr: AVR text frames
+
+    With realtime=True, captures are paced by their own timestamps;
+    otherwise the file is replayed as fast as possible, which is what
+    throughput tests want. SBS timestamps are the receiver's local time;
+    timezone names the receiver's clock as for SBSDecoder. Beast and AVR
+    messages are timed by their MLAT timestamps from the start of the
+    replay, or by the time they are decoded when the capture has none.
+    """
+
+    name = 'replay'
+
+    def __init__(self, path, fmt=None, batch_size=1000, realtime=False, timezone=None, **kwargs):
+        super().__init__(batch_size=batch_size, **kwargs)
+        self.path = path
+        self.fmt = fmt or EXTENSION_FORMATS.get(os.path.splitext(path)[1].lower())
+        if self.fmt not in REPLAY_FORMATS:
+            raise ValueError(f"Cannot determine replay format of {path}; use one of {', '.join(REPLAY_FORMATS)}")
+        self.realtime = realtime
+        self.timezone = timezone  # Receiver clock of SBS captures, see SBSDecoder
+        self.messages = 0
+        self._clock = None  # (first capture time, monotonic start)
+
+    def _pace(self, capture_time):
+        """Sleep until capture_time is due, relative to the first message"""
+        if not self.realtime or capture_time is None:
+            return
+        if self._clock is None:
+            self._clock = (capture_time, time.monotonic())
+            return
+        delay = (capture_time - self._clock[0]) - (time.monotonic() - self._clock[1])
+        if delay > 0:
+            time.sleep(delay)
+
+    def batches(self):
+        if self.fmt == 'json':
+            yield from self._json_batches()
+            return
+
+        for _ in self._messages():
+            self.messages += 1
+            batch = self._drain_due()
+            if batch:
+                yield batch
+        batch = self._drain_due(force=True)
+        if batch:
+            yield batch
+
+    def _json_batches(self):
+        with open(self.path, 'rb') as capture:
+            for line in capture:
+                if not line.strip():
+                    continue
+                stream = StateVectorStream([line], batch_size=self.batch_size)
+                batches = list(stream)
+                self._pace(stream.time)
+                for batch in batches:
+                    self.messages += len(batch)
+                    yield batch
+
+    def _messages(self):
+        """Feed the capture to its decoder, yielding once per message"""
+        if self.fmt == 'sbs':
+            decoder = SBSDecoder(self.tracker, self.timezone)
+            with open(self.path, 'r', encoding='ascii', errors='replace') as capture:
+                for line in capture:
+                    self._pace(decoder.feed_line(line, time.time()))
+                    yield None
+            return
+
+        decoder = ModeSDecoder(self.tracker)
+        clock = MLATClock()
+        if self.fmt == 'avr':
+            with open(self.path, 'r', encoding='ascii', errors='replace') as capture:
+                for line in capture:
+                    frame = parse_avr_line(line)
+                    if frame is not None:
+                        timestamp = clock.time(frame[0], time.time())
+                        self._pace(timestamp)
+                        decoder.feed(frame[1], timestamp)
+                    yield None
+            return
+
+        reader = BeastFrameReader()
+        with open(self.path, 'rb') as capture:
+            while True:
+                chunk = capture.read(65536)
+                if not chunk:
+                    return
+                for frame_type, ticks, _, message in reader.feed(chunk):
+                    if frame_type != 0x31:
+                        timestamp = clock.time(ticks, time.time())
+                        self._pace(timestamp)
+                        decoder.feed(message, timestamp)
+                    yield None
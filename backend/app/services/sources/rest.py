@@ -0,0 +1,52 @@
+import time
+from config import Config
+from app.services.sources.base import StateSource
+from app.services.upstream_client import adsb_upstream
+from app.utils.json_stream import StateVectorStream
+
+
+class RestSource(StateSource):
+    """
+    Polling adapter for the OpenSky REST API (/states/all)
+
+    Each poll is stream-parsed and yielded in ADSB_STREAM_BATCH_SIZE batches.
+    """
+
+    name = 'rest'
+
+    def __init__(self, upstream=None, params=None, interval=None, polls=None):
+        """
+        Args:
+            upstream: UpstreamClient to use (defaults to the shared client)
+            params: Optional /states/all query parameters (icao24, lamin, ...)
+            interval: Seconds between polls (defaults to Config.ADSB_POLL_INTERVAL)
+            polls: Stop after this many polls (default: poll forever)
+        """
+        self.upstream = upstream or adsb_upstream
+        self.params = params or {}
+        self.interval = interval if interval is not None else Config.ADSB_POLL_INTERVAL
+        self.polls = polls
+        self.last_time = None
+
+    def poll(self):
+        """
+        Fetch one snapshot
+
+        Returns:
+            iterator: Lists of raw state vectors
+        """
+        response = self.upstream.get('/states/all', params=self.params, stream=True)
+        with response:
+            stream = StateVectorStream(response.iter_content(chunk_size=Config.ADSB_STREAM_CHUNK_SIZE),
+                                       batch_size=Config.ADSB_STREAM_BATCH_SIZE)
+            yield from stream
+            self.last_time = stream.time
+
+    def batches(self):
+        count = 0
+        while self.polls is None or count < self.polls:
+            started = time.monotonic()
+            yield from self.poll()
+            count += 1
+            if self.polls is None or count < self.polls:
+                time.sleep(max(self.interval - (time.monotonic() - started), 0))
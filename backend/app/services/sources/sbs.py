@@ -0,0 +1,159 @@
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from config import Config
+from app.services.sources.base import SocketSource
+from app.services.sources.modes import FEET_TO_METERS, FPM_TO_MS, KNOTS_TO_MS
+
+
+def _float(value):
+    return float(value) if value else None
+
+
+def _flag(value):
+    """SBS booleans are '-1' (or '1') for true and '0' for false"""
+    if not value:
+        return None
+    return value != '0'
+
+
+def parse_sbs_timestamp(date, time_of_day, timezone=None):
+    """
+    Epoch seconds from the generated date/time fields of an SBS message
+
+    The fields are the receiver's local time, without a UTC offset.
+
+    Args:
+        date: Date field such as '2024/01/01'
+        time_of_day: Time field such as '12:00:00.000'
+        timezone: tzinfo of the receiver (defaults to this host's local timezone)
+
+    Returns:
+        float: Epoch seconds, or None if the fields are missing or malformed
+    """
+    try:
+        parsed = datetime.strptime(f"{date} {time_of_day}", '%Y/%m/%d %H:%M:%S.%f')
+    except ValueError:
+        return None
+    if timezone is not None:
+        parsed = parsed.replace(tzinfo=timezone)
+    return parsed.timestamp()
+
+
+def parse_sbs_line(line, timezone=None):
+    """
+    Parse one SBS-1 (BaseStation) MSG line
+
+    Args:
+        line: Text line such as 'MSG,3,1,1,4840D6,1,2024/01/01,12:00:00.000,...'
+        timezone: tzinfo of the receiver's clock (defaults to this host's local timezone)
+
+    Returns:
+        tuple: (icao_code, timestamp or None, fields dict in OpenSky units), or None
+               for non-MSG lines and lines without an address
+    """
+    parts = line.strip().split(',')
+    if len(parts) < 11 or parts[0] != 'MSG' or not parts[4]:
+        return None
+    parts += [''] * (22 - len(parts))
+
+    fields = {}
+    callsign = parts[10].strip()
+    if callsign:
+        fields['callsign'] = callsign
+    altitude = _float(parts[11])
+    if altitude is not None:
+        fields['baro_altitude'] = altitude * FEET_TO_METERS
+    ground_speed = _float(parts[12])
+    if ground_speed is not None:
+        fields['velocity'] = ground_speed * KNOTS_TO_MS
+    track = _float(parts[13])
+    if track is not None:
+        fields['true_track'] = track
+    latitude, longitude = _float(parts[14]), _float(parts[15])
+    if latitude is not None and longitude is not None:
+        fields['latitude'] = latitude
+        fields['longitude'] = longitude
+    vertical_rate = _float(parts[16])
+    if vertical_rate is not None:
+        fields['vertical_rate'] = vertical_rate * FPM_TO_MS
+    if parts[17].strip():
+        fields['squawk'] = parts[17].strip()
+    spi = _flag(parts[20])
+    if spi is not None:
+        fields['spi'] = spi
+    on_ground = _flag(parts[21])
+    if on_ground is not None:
+        fields['on_ground'] = on_ground
+
+    return parts[4].strip().lower(), parse_sbs_timestamp(parts[6], parts[7], timezone), fields
+
+
+class SBSDecoder:
+    """Applies parsed SBS lines to a StateVectorTracker"""
+
+    def __init__(self, tracker, timezone=None):
+        """
+        Args:
+            tracker: StateVectorTracker to update
+            timezone: Receiver clock: 'local' for this host's timezone, an IANA name
+                      such as 'Europe/Berlin', or 'receipt' to ignore the message
+                      timestamps and use the time lines are received
+                      (defaults to Config.ADSB_SOURCE_TIMEZONE)
+        """
+        self.tracker = tracker
+        timezone = timezone or Config.ADSB_SOURCE_TIMEZONE
+        self.receipt_time = timezone == 'receipt'
+        self.timezone = None if timezone in ('local', 'receipt') else ZoneInfo(timezone)
+        self.messages = 0
+        self.rejected = 0
+
+    def feed_line(self, line, received_at):
+        """
+        Apply one SBS line
+
+        Args:
+            line: SBS text line
+            received_at: Epoch seconds used when the line carries no timestamp
+
+        Returns:
+            float: The message timestamp, or None if the line was rejected
+        """
+        self.messages += 1
+        parsed = parse_sbs_line(line, self.timezone)
+        if parsed is None:
+            self.rejected += 1
+            return None
+        icao_code, timestamp, fields = parsed
+        if self.receipt_time or timestamp is None:
+            timestamp = received_at
+        if 'latitude' in fields:
+            fields['time_position'] = timestamp
+        self.tracker.update(icao_code, timestamp, **fields)
+        return timestamp
+
+
+class SBSSource(SocketSource):
+    """
+    Streaming TCP adapter for SBS-1 BaseStation feeds (dump1090 port 30003)
+    """
+
+    name = 'sbs'
+    default_port = 30003
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.decoder = SBSDecoder(self.tracker)
+
+    def _messages(self, chunks):
+        pending = b''
+        for chunk in chunks:
+            if not chunk:
+                yield None
+                continue
+            lines = (pending + chunk).split(b'\n')
+            pending = lines.pop()
+            received_at = time.time()
+            for line in lines:
+                self.decoder.feed_line(line.decode('ascii', errors='replace'), received_at)
+                yield None
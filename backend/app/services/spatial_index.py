@@ -0,0 +1,103 @@
+import math
+import numpy as np
+from config import Config
+
+
+class SpatialGridIndex:
+    """
+    Fixed lat/lon grid that buckets keys by the cell containing their position
+
+    A bounding-box lookup only visits the cells overlapping the box, so its
+    cost scales with the viewport rather than with global traffic.
+    """
+
+    def __init__(self, cell_size=None):
+        self.cell_size = cell_size or Config.SPATIAL_GRID_CELL_SIZE
+        self.rows = int(math.ceil(180 / self.cell_size))
+        self.cols = int(math.ceil(360 / self.cell_size))
+        self._cells = {}  # cell id -> set of keys
+        self._key_cells = {}  # key -> cell id
+
+    def _row(self, lat):
+        return min(max(int((lat + 90) // self.cell_size), 0), self.rows - 1)
+
+    def _col(self, lon):
+        return min(max(int((lon + 180) // self.cell_size), 0), self.cols - 1)
+
+    def cell_of(self, lat, lon):
+        """Return the cell id containing a position"""
+        return self._row(lat) * self.cols + self._col(lon)
+
+    def cells_of(self, lat, lon):
+        """Return the cell ids containing arrays of positions"""
+        rows = np.clip((np.asarray(lat) + 90) // self.cell_size, 0, self.rows - 1).astype(np.int64)
+        cols = np.clip((np.asarray(lon) + 180) // self.cell_size, 0, self.cols - 1).astype(np.int64)
+        return rows * self.cols + cols
+
+    def update(self, key, lat, lon):
+        """
+        Move a key to the cell of its new position
+
+        Args:
+            key: Hashable identifier (e.g. a live-store slot)
+            lat: Latitude, or None to drop the key from the index
+            lon: Longitude, or None to drop the key from the index
+        """
+        if lat is None or lon is None or math.isnan(lat) or math.isnan(lon):
+            self.remove(key)
+            return
+
+        cell = self.cell_of(lat, lon)
+        previous = self._key_cells.get(key)
+        if previous == cell:
+            return
+        if previous is not None:
+            self._discard(previous, key)
+        self._cells.setdefault(cell, set()).add(key)
+        self._key_cells[key] = cell
+
+    def remove(self, key):
+        """Drop a key from the index"""
+        cell = self._key_cells.pop(key, None)
+        if cell is not None:
+            self._discard(cell, key)
+
+    def _discard(self, cell, key):
+        bucket = self._cells.get(cell)
+        if bucket is not None:
+            bucket.discard(key)
+            if not bucket:
+                del self._cells[cell]
+
+    def _col_ranges(self, west, east):
+        """Column ranges covering a longitude span, split at the antimeridian"""
+        if west <= east:
+            return [(self._col(west), self._col(east))]
+        return [(self._col(west), self.cols - 1), (0, self._col(east))]
+
+    def query(self, south, west, north, east):
+        """
+        Return the keys of every cell overlapping a bounding box, grouped by cell
+
+        Cells on the edge of the box may hold keys slightly outside it, so
+        callers should apply an exact filter to the candidates.
+
+        Args:
+            south, west, north, east: Box edges in degrees; west > east crosses the antimeridian
+
+        Returns:
+            list: One list of keys per non-empty cell
+        """
+        buckets = []
+        col_ranges = self._col_ranges(west, east)
+        for row in range(self._row(south), self._row(north) + 1):
+            base = row * self.cols
+            for first, last in col_ranges:
+                for col in range(first, last + 1):
+                    bucket = self._cells.get(base + col)
+                    if bucket:
+                        buckets.append(list(bucket))
+        return buckets
+
+    def __len__(self):
+        return len(self._key_cells)
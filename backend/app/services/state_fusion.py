@@ -0,0 +1,147 @@
+import threading
+import time
+from collections import OrderedDict
+from config import Config
+from app.services.live_state_store import EPOCH
+
+
+# Fields that belong to a position fix and only advance with a newer time_position
+POSITION_FIELDS = ('latitude', 'longitude', 'altitude', 'baro_altitude', 'on_ground',
+                   'time_position', 'last_position_update')
+
+
+class StateFusion:
+    """
+    Fuses reports of the same aircraft from several receivers or providers
+
+    For every aircraft (keyed by icao_int) the fused state and its newest time_position and
+    last_contact are kept. A report is:
+
+    - dropped as out of order if both its fix and its contact are older than
+      what is already known, or older than max_age relative to the newest
+      report seen;
+    - dropped as a duplicate if it carries the same fix and contact and adds
+      no missing field;
+    - otherwise merged: position fields are taken from the report with the
+      newest time_position, other fields from the newest last_contact, and a
+      source lacking a field (e.g. no callsign) never erases it.
+
+    The newest report seen is tracked so replays age out by capture time, but
+    it never advances past the wall clock plus max_skew: a single receiver
+    with a clock running ahead would otherwise drop every correctly timed
+    report as out of order and evict the whole table.
+
+    Each report costs O(1) dict work; records are kept in update order so
+    expired aircraft are evicted from the front of an OrderedDict.
+    """
+
+    def __init__(self, max_age=None, max_skew=None):
+        self.max_age = max_age if max_age is not None else Config.LIVE_STATE_MAX_AGE
+        self.max_skew = max_skew if max_skew is not None else Config.LIVE_STATE_MAX_SKEW
+        self._lock = threading.Lock()
+        self._records = OrderedDict()  # ICAO address -> fused state
+        self.latest = 0.0  # Newest last_contact seen (clamped to now + max_skew), so replays age out by capture time
+        self.stats = {'accepted': 0, 'merged': 0, 'duplicates': 0, 'out_of_order': 0}
+
+    @staticmethod
+    def _contact(state):
+        """Epoch seconds of a report's last contact, falling back to its fix or position update time"""
+        return (state.get('last_contact') or state.get('time_position')
+                or (state['last_position_update'] - EPOCH).total_seconds())
+
+    def fuse(self, states):
+        """
+        Fuse a batch of normalized states
+
+        Args:
+            states: List of dicts produced by normalize_state (any number of reports per aircraft)
+
+        Returns:
+            tuple: (fused states, one per accepted aircraft, and a dict of per-batch counts)
+        """
+        counts = {'accepted': 0, 'merged': 0, 'duplicates': 0, 'out_of_order': 0}
+        fused = {}
+
+        ceiling = time.time() + self.max_skew
+        with self._lock:
+            for state in states:
+                icao = state['icao_int']
+                contact = self._contact(state)
+                if contact > self.latest:
+                    self.latest = min(contact, ceiling)
+                if contact < self.latest - self.max_age:
+                    counts['out_of_order'] += 1
+                    continue
+
+                record = self._records.get(icao)
+                if record is None:
+                    record = dict(state)
+                    record['last_contact'] = contact
+                    self._records[icao] = record
+                    fused[icao] = record
+                    counts['accepted'] += 1
+                    continue
+
+                merged = self._merge(record, state, contact)
+                if merged is None:
+                    counts['out_of_order'] += 1
+                elif merged is False:
+                    counts['duplicates'] += 1
+                else:
+                    self._records[icao] = merged
+                    self._records.move_to_end(icao)
+                    fused[icao] = merged
+                    counts['merged'] += 1
+
+            self._evict()
+            for key, value in counts.items():
+                self.stats[key] += value
+
+        return [dict(state) for state in fused.values()], counts
+
+    def _merge(self, record, state, contact):
+        """
+        Merge a report into an aircraft's fused state
+
+        Returns:
+            dict: The new fused state; None if the report is out of order;
+                  False if it is a duplicate
+        """
+        fix = state.get('time_position')
+        known_fix = record.get('time_position')
+        newer_fix = fix is not None and (known_fix is None or fix > known_fix)
+        newer_contact = contact > record['last_contact']
+
+        if not newer_fix and not newer_contact and contact < record['last_contact']:
+            return None
+
+        merged = dict(record)
+        changed = False
+        for name, value in state.items():
+            if value is None or name == 'last_contact':
+                continue
+            if name in POSITION_FIELDS:
+                take = newer_fix or (fix is None and known_fix is None and newer_contact)
+            else:
+                take = newer_contact
+            if take or merged.get(name) is None:
+                if merged.get(name) != value:
+                    merged[name] = value
+                    changed = True
+
+        if newer_contact:
+            merged['last_contact'] = contact
+            changed = True
+        return merged if changed else False
+
+    def _evict(self):
+        """Drop aircraft whose last report is older than max_age"""
+        cutoff = self.latest - self.max_age
+        while self._records:
+            icao, record = next(iter(self._records.items()))
+            if record['last_contact'] >= cutoff:
+                break
+            del self._records[icao]
+
+    def __len__(self):
+        return len(self._records)
@@ -0,0 +1,227 @@
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import Config
+
+
+class JitteredRetry(Retry):
+    """
+    urllib3 retry policy with full-jitter exponential backoff
+
+    Each sleep is drawn uniformly from [0, backoff_factor * 2 ** (retries - 1)],
+    so workers that failed together do not retry in lockstep.
+    """
+
+    def get_backoff_time(self):
+        return random.uniform(0, super().get_backoff_time())
+
+
+# /states/all credit cost by the area of the bounding box in square degrees (OpenSky REST API)
+STATES_CREDIT_TIERS = ((25, 1), (100, 2), (400, 3))
+STATES_GLOBAL_CREDITS = 4
+
+
+def request_credits(path, params=None):
+    """
+    Credits OpenSky charges for a request
+
+    Only /states/all is metered by area: a bounding box costs 1 to 3 credits
+    depending on its size, anything larger (or no box at all) costs 4.
+    Other endpoints are not counted locally; the remaining-credit header
+    still accounts for them.
+    """
+    if path != '/states/all':
+        return 0
+    params = params or {}
+    if not all(name in params for name in ('lamin', 'lomin', 'lamax', 'lomax')):
+        return STATES_GLOBAL_CREDITS
+    area = abs(float(params['lamax']) - float(params['lamin'])) * abs(float(params['lomax']) - float(params['lomin']))
+    for limit, credits in STATES_CREDIT_TIERS:
+        if area <= limit:
+            return credits
+    return STATES_GLOBAL_CREDITS
+
+
+class RateLimitedError(requests.exceptions.RequestException):
+    """Raised instead of sending a request while the upstream rate limit is backing off"""
+
+
+class CreditBudget:
+    """
+    Tracks the upstream API credit allowance and rate-limit backoff
+
+    The remaining credits are taken from the X-Rate-Limit-Remaining header
+    whenever the upstream sends it; otherwise the cost of every request is
+    deducted from daily_credits, which is restored at midnight UTC. A 429
+    blocks requests for X-Rate-Limit-Retry-After-Seconds (or Retry-After),
+    falling back to a jittered exponential backoff that grows with every
+    consecutive 429 and resets after the next successful request.
+    """
+
+    def __init__(self, daily_credits=None, reserve=None, backoff=None, max_backoff=None):
+        self.daily_credits = daily_credits if daily_credits is not None else Config.ADSB_DAILY_CREDITS
+        self.reserve = reserve if reserve is not None else Config.ADSB_CREDIT_RESERVE
+        self.backoff = backoff if backoff is not None else Config.ADSB_RATE_LIMIT_BACKOFF
+        self.max_backoff = max_backoff if max_backoff is not None else Config.ADSB_RATE_LIMIT_MAX_BACKOFF
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self.remaining = self.daily_credits
+        self.spent = 0
+        self.rate_limited = 0  # Consecutive 429 responses
+        self._blocked_until = 0.0  # Monotonic time
+        self._day = datetime.utcnow().date()
+
+    def _roll_over(self):
+        """Restore the allowance after midnight UTC (lock held)"""
+        today = datetime.utcnow().date()
+        if today != self._day:
+            self._day = today
+            self.remaining = self.daily_credits
+            self.spent = 0
+
+    def observe(self, response, credits):
+        """
+        Account for a response from the upstream
+
+        Args:
+            response: requests.Response of the request
+            credits: Local cost estimate of the request (see request_credits)
+        """
+        with self._lock:
+            self._roll_over()
+            header = response.headers.get('X-Rate-Limit-Remaining')
+            if response.status_code == 429:
+                self.rate_limited += 1
+                retry_after = (response.headers.get('X-Rate-Limit-Retry-After-Seconds')
+                               or response.headers.get('Retry-After'))
+                try:
+                    wait = float(retry_after)
+                except (TypeError, ValueError):
+                    wait = random.uniform(0.5, 1.0) * min(self.backoff * 2 ** (self.rate_limited - 1), self.max_backoff)
+                self._blocked_until = time.monotonic() + wait
+                self.remaining = 0 if header is None else self.remaining
+                self.logger.warning(f"Upstream rate limit hit ({self.rate_limited} in a row), backing off for {wait:.0f}s")
+            elif response.ok:
+                self.rate_limited = 0
+                self.spent += credits
+                self.remaining = max(self.remaining - credits, 0)
+            if header is not None:
+                try:
+                    self.remaining = int(header)
+                except ValueError:
+                    pass
+
+    def blocked_for(self):
+        """Seconds until requests may be sent again, 0 if not backing off"""
+        return max(self._blocked_until - time.monotonic(), 0.0)
+
+    def sustainable_rate(self):
+        """
+        Credits per second that can be spent evenly until the allowance is restored
+
+        A reserve fraction of the daily allowance is kept back for on-demand
+        requests (e.g. fetching a single aircraft through the API).
+        """
+        with self._lock:
+            self._roll_over()
+            now = datetime.utcnow()
+            reset = datetime(now.year, now.month, now.day) + timedelta(days=1)
+            available = self.remaining - self.reserve * self.daily_credits
+            return max(available, 0) / max((reset - now).total_seconds(), 1.0)
+
+
+class UpstreamClient:
+    """
+    Shared, pooled HTTP client for the ADS-B upstream API
+
+    One requests.Session keeps TCP/TLS connections alive across polls,
+    negotiates compressed responses, applies connect/read timeouts to every
+    request, and retries idempotent requests on connection errors and
+    transient 5xx responses with jittered backoff. Every response is
+    accounted against the credit budget, and while a 429 backoff is in
+    effect requests fail fast with RateLimitedError without being sent.
+    """
+
+    RETRY_STATUSES = (500, 502, 503, 504)
+
+    def __init__(self, base_url=None, username=None, password=None, connect_timeout=None,
+                 read_timeout=None, max_retries=None, backoff_factor=None, pool_size=None):
+        self.base_url = (base_url or Config.ADSB_API_BASE_URL).rstrip('/')
+        self.timeout = (
+            connect_timeout if connect_timeout is not None else Config.ADSB_CONNECT_TIMEOUT,
+            read_timeout if read_timeout is not None else Config.ADSB_READ_TIMEOUT
+        )
+        self.logger = logging.getLogger(__name__)
+        self.credits = CreditBudget()
+
+        username = username or Config.ADSB_USERNAME
+        password = password or Config.ADSB_PASSWORD
+        max_retries = max_retries if max_retries is not None else Config.ADSB_MAX_RETRIES
+        backoff_factor = backoff_factor if backoff_factor is not None else Config.ADSB_RETRY_BACKOFF
+        pool_size = pool_size or Config.ADSB_POOL_SIZE
+
+        # 429 is not retried here: rate limits are left to the caller
+        retry = JitteredRetry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            backoff_factor=backoff_factor,
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'Accept': 'application/json',
+            'Accept-Encoding': 'gzip, deflate'
+        })
+        if username and password:
+            self.session.auth = (username, password)
+
+    def get(self, path, params=None, stream=False):
+        """
+        Perform a GET request against the upstream API
+
+        Args:
+            path: Path relative to the base URL, e.g. '/states/all'
+            params: Optional query parameters
+            stream: Whether to defer downloading the body (for incremental parsing)
+
+        Returns:
+            requests.Response: Successful response
+
+        Raises:
+            RateLimitedError: While backing off after a 429
+            requests.exceptions.RequestException: On connection failures, timeouts or error statuses
+        """
+        wait = self.credits.blocked_for()
+        if wait > 0:
+            raise RateLimitedError(f"Upstream rate limited, retrying in {wait:.0f}s")
+
+        response = self.session.get(f"{self.base_url}{path}", params=params, timeout=self.timeout, stream=stream)
+        self.credits.observe(response, request_credits(path, params))
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError:
+            response.close()
+            raise
+        return response
+
+    def close(self):
+        """Close all pooled connections"""
+        self.session.close()
+
+
+# Shared by every ADSBService instance in the process
+adsb_upstream = UpstreamClient()
@@ -57,14 +57,14 @@ def fetch_adsb_data_task(icao_codes=None):
     try:
         logger.info(f"Starting ADS-B data fetch for {'all aircraft' if icao_codes is None else f'aircraft: {icao_codes}'}")
         
-        # Fetch current states from ADS-B
-        result = adsb_service.fetch_current_states(icao_codes)
+        # Fetch current states from ADS-B, ingesting the response as it streams in
+        result = adsb_service.fetch_current_states(icao_codes, stream=True)
         
-        logger.info(f"Successfully fetched ADS-B data for {len(result.get('states', []))} aircraft")
+        logger.info(f"Successfully fetched ADS-B data for {result['count']} aircraft")
         
         return {
             'status': 'success',
-            'fetched_count': len(result.get('states', [])),
+            'fetched_count': result['count'],
             'icao_codes': icao_codes
         }
         
@@ -98,15 +98,17 @@ def fetch_all_aircraft_data():
                 'message': 'No tracked aircraft found'
             }
         
-        # Fetch data for all tracked aircraft
-        result = adsb_service.fetch_current_states(icao_codes)
+        # Fetch data for all tracked aircraft in concurrent ICAO shards
+        result = adsb_service.shard_poller.poll_icao_codes(icao_codes)
         
-        logger.info(f"Successfully fetched ADS-B data for {len(result.get('states', []))} tracked aircraft")
+        logger.info(f"Successfully fetched ADS-B data for {result['count']} tracked aircraft")
         
         return {
             'status': 'success',
-            'fetched_count': len(result.get('states', [])),
-            'tracked_count': len(icao_codes)
+            'fetched_count': result['count'],
+            'tracked_count': len(icao_codes),
+            'shards': result['shards'],
+            'failed_shards': result['failed_shards']
         }
         
     except Exception as e:
@@ -122,43 +124,38 @@ def cleanup_old_positions():
     """
     Periodic task to clean up old flight position records
     
+    Whole day partitions past the retention period are dropped instead of
+    deleting rows one by one, and the next partitions are created ahead of time.
+    
     Returns:
         dict: Result of cleanup operation
     """
     try:
         from datetime import datetime, timedelta
-        from app.models import FlightPosition
+        from config import Config
+        from app.services.position_partitions import position_storage
         
         logger.info("Starting cleanup of old flight position records")
         
-        # Define retention period (e.g., keep only last 7 days)
-        retention_days = 7
+        retention_days = Config.POSITION_RETENTION_DAYS
         cutoff_date = datetime.utcnow() - timedelta(days=retention_days)
         
-        # Count records to be deleted
-        old_records_count = FlightPosition.query.filter(
-            FlightPosition.timestamp < cutoff_date
-        ).count()
-        
-        if old_records_count == 0:
-            logger.info("No old position records to clean up")
-            return {
-                'status': 'info',
-                'message': 'No old records to clean up'
-            }
-        
-        # Delete old records
-        deleted_count = db.session.query(FlightPosition).filter(
-            FlightPosition.timestamp < cutoff_date
-        ).delete(synchronize_session=False)
+        result = position_storage.drop_before(cutoff_date)
         
+        # Pre-create today's and tomorrow's partitions so ingest never has to
+        today = datetime.utcnow().date()
+        position_storage.ensure_partitions([today, today + timedelta(days=1)])
         db.session.commit()
         
-        logger.info(f"Cleaned up {deleted_count} old flight position records")
+        logger.info(
+            f"Dropped {len(result['dropped_partitions'])} position partitions and "
+            f"deleted {result['deleted_rows']} legacy position records"
+        )
         
         return {
             'status': 'success',
-            'deleted_count': deleted_count,
+            'dropped_partitions': result['dropped_partitions'],
+            'deleted_count': result['deleted_rows'],
             'retention_days': retention_days
         }
         
@@ -0,0 +1,289 @@
+"""
+Serializers for values stored by CacheService
+
+Every value is written as a one byte header followed by the payload:
+
+    header = serializer id (low 4 bits) | compression id << 4
+
+so a reader needs no out-of-band knowledge of how a key was written, and a
+payload whose header is unknown is rejected instead of being guessed at.
+Nothing here executes code while decoding: values from the upstream feed
+are cached too, so pickle and eval() are not offered.
+
+Serializers:
+    msgpack  Generic values (datetimes are kept as an extension type)
+    json     Generic values, for readers without msgpack
+    flight   Fixed struct layout of the flight records cached per poll
+
+Payloads of at least CACHE_COMPRESSION_THRESHOLD bytes are compressed with
+CACHE_COMPRESSION (zstd and lz4 are optional dependencies, zlib is always
+available) when that makes them smaller.
+"""
+import json
+import struct
+import zlib
+from datetime import datetime, timedelta
+from config import Config
+
+try:
+    import msgpack
+except ImportError:  # Optional dependency
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # Optional dependency
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # Optional dependency
+    lz4_frame = None
+
+
+EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_ZSTD = 2
+COMPRESSION_LZ4 = 3
+
+DATETIME_EXT = 1  # msgpack extension type of naive datetimes (microseconds since the epoch)
+
+
+class MsgpackSerializer:
+    """MessagePack for arbitrary values"""
+
+    id = 1
+    name = 'msgpack'
+
+    def __init__(self):
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed")
+
+    @staticmethod
+    def _default(value):
+        if isinstance(value, datetime) and value.tzinfo is None:
+            return msgpack.ExtType(DATETIME_EXT, struct.pack('<q', (value - EPOCH) // _MICROSECOND))
+        raise TypeError(f"Cannot cache values of type {type(value).__name__}")
+
+    @staticmethod
+    def _ext_hook(code, data):
+        if code == DATETIME_EXT:
+            return EPOCH + timedelta(microseconds=struct.unpack('<q', data)[0])
+        return msgpack.ExtType(code, data)
+
+    def dumps(self, value):
+        return msgpack.packb(value, use_bin_type=True, default=self._default)
+
+    def loads(self, data):
+        return msgpack.unpackb(data, raw=False, ext_hook=self._ext_hook, strict_map_key=False)
+
+
+class JSONSerializer:
+    """JSON for arbitrary JSON-compatible values"""
+
+    id = 2
+    name = 'json'
+
+    def dumps(self, value):
+        return json.dumps(value, separators=(',', ':')).encode('utf-8')
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class FlightRecordSerializer:
+    """
+    Fixed layout of the flight records cached by ADSBService
+
+    Layout (little-endian):
+
+        null bitmap (u16) | on_ground (u8) | id (i64) | aircraft_id (i64)
+        | latitude, longitude (i32, 1e-5 degrees) | altitude, ground_speed, heading (i32, 1e-2)
+        | last_position_update (i64, microseconds since the epoch)
+        then flight_number, callsign, squawk, status as u8 length + UTF-8
+
+    A record is about 70 bytes against 330 as JSON. Values are quantized:
+
+    - latitude and longitude to 1e-5 degrees (about a metre), as in the columnar feed
+    - altitude, ground_speed and heading to two decimals
+    - last_position_update to microseconds, returned as an ISO 8601 string
+
+    Records with fields outside the layout are rejected.
+    """
+
+    id = 3
+    name = 'flight'
+
+    NUMERIC_FIELDS = ('id', 'aircraft_id', 'latitude', 'longitude', 'altitude', 'ground_speed',
+                      'heading', 'last_position_update')
+    STRING_FIELDS = ('flight_number', 'callsign', 'squawk', 'status')
+    FIELDS = frozenset(NUMERIC_FIELDS + STRING_FIELDS + ('on_ground',))
+
+    SCALES = ((2, 1e5), (3, 1e5), (4, 1e2), (5, 1e2), (6, 1e2))  # NUMERIC_FIELDS index -> fixed-point scale
+
+    _layout = struct.Struct('<HBqqiiiiiq')
+
+    def dumps(self, record):
+        if not self.FIELDS.issuperset(record):
+            unknown = sorted(set(record) - self.FIELDS)
+            raise ValueError(f"Fields outside the flight record layout: {', '.join(unknown)}")
+
+        get = record.get
+        numbers = [get(field) for field in self.NUMERIC_FIELDS]
+        nulls = 0
+        for bit, value in enumerate(numbers):
+            if value is None:
+                nulls |= 1 << bit
+                numbers[bit] = 0
+        for index, scale in self.SCALES:
+            if not nulls & (1 << index):
+                numbers[index] = round(numbers[index] * scale)
+        if not nulls & 0b10000000:
+            numbers[7] = (datetime.fromisoformat(numbers[7]) - EPOCH) // _MICROSECOND
+
+        on_ground = get('on_ground')
+        parts = [self._layout.pack(nulls, 2 if on_ground is None else int(bool(on_ground)), *numbers)]
+        for field in self.STRING_FIELDS:
+            value = get(field)
+            if value is None:
+                parts.append(b'\xff')
+                continue
+            encoded = str(value).encode('utf-8')
+            if len(encoded) >= 0xff:
+                raise ValueError(f"{field} is too long for the flight record layout")
+            parts.append(bytes((len(encoded),)))
+            parts.append(encoded)
+        return b''.join(parts)
+
+    def loads(self, data):
+        nulls, on_ground, *numbers = self._layout.unpack_from(data)
+        if nulls:
+            for bit in range(len(numbers)):
+                if nulls & (1 << bit):
+                    numbers[bit] = None
+        for index, scale in self.SCALES:
+            if numbers[index] is not None:
+                numbers[index] /= scale
+        if numbers[7] is not None:
+            numbers[7] = (EPOCH + timedelta(microseconds=numbers[7])).isoformat()
+        record = dict(zip(self.NUMERIC_FIELDS, numbers))
+        record['on_ground'] = None if on_ground == 2 else bool(on_ground)
+
+        offset = self._layout.size
+        for field in self.STRING_FIELDS:
+            length = data[offset]
+            offset += 1
+            if length == 0xff:
+                record[field] = None
+                continue
+            record[field] = data[offset:offset + length].decode('utf-8')
+            offset += length
+        return record
+
+
+def _available_serializers():
+    serializers = [JSONSerializer(), FlightRecordSerializer()]
+    if msgpack is not None:
+        serializers.append(MsgpackSerializer())
+    return {serializer.name: serializer for serializer in serializers}
+
+
+SERIALIZERS = _available_serializers()
+COMPRESSIONS = {'none': COMPRESSION_NONE, 'zlib': COMPRESSION_ZLIB, 'zstd': COMPRESSION_ZSTD, 'lz4': COMPRESSION_LZ4}
+
+
+def _compress(compression, data):
+    if compression == COMPRESSION_ZSTD:
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    if compression == COMPRESSION_LZ4:
+        return lz4_frame.compress(data)
+    return zlib.compress(data, 6)
+
+
+def _decompress(compression, data):
+    if compression == COMPRESSION_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if compression == COMPRESSION_LZ4:
+        if lz4_frame is None:
+            raise RuntimeError("lz4 is not installed")
+        return lz4_frame.decompress(data)
+    return zlib.decompress(data)
+
+
+class CacheCodec:
+    """
+    Serializes values with a named serializer and optional compression
+    """
+
+    def __init__(self, serializer=None, compression=None, threshold=None):
+        """
+        Args:
+            serializer: Default serializer name (defaults to Config.CACHE_SERIALIZER,
+                        falling back to json when msgpack is not installed)
+            compression: none, zlib, zstd or lz4 (defaults to Config.CACHE_COMPRESSION;
+                         zlib is used when the configured library is not installed)
+            threshold: Smallest payload in bytes that is compressed
+                       (defaults to Config.CACHE_COMPRESSION_THRESHOLD)
+        """
+        name = serializer or Config.CACHE_SERIALIZER
+        if name == 'msgpack' and msgpack is None:
+            name = 'json'
+        self.serializer = self._serializer(name)
+
+        compression = compression or Config.CACHE_COMPRESSION
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown cache compression: {compression}")
+        self.compression = COMPRESSIONS[compression]
+        if (self.compression == COMPRESSION_ZSTD and zstandard is None) or \
+                (self.compression == COMPRESSION_LZ4 and lz4_frame is None):
+            self.compression = COMPRESSION_ZLIB
+        self.threshold = threshold if threshold is not None else Config.CACHE_COMPRESSION_THRESHOLD
+        self._by_id = {serializer.id: serializer for serializer in SERIALIZERS.values()}
+
+    @staticmethod
+    def _serializer(name):
+        if name not in SERIALIZERS:
+            raise ValueError(f"Unknown or unavailable cache serializer: {name}")
+        return SERIALIZERS[name]
+
+    def dumps(self, value, serializer=None):
+        """
+        Encode a value
+
+        Args:
+            value: Value to encode
+            serializer: Serializer name for this value (defaults to the codec's)
+
+        Returns:
+            bytes: Header byte and payload
+        """
+        serializer = self._serializer(serializer) if serializer else self.serializer
+        payload = serializer.dumps(value)
+        compression = COMPRESSION_NONE
+        if self.compression != COMPRESSION_NONE and len(payload) >= self.threshold:
+            compressed = _compress(self.compression, payload)
+            if len(compressed) < len(payload):
+                payload, compression = compressed, self.compression
+        return bytes((serializer.id | compression << 4,)) + payload
+
+    def loads(self, data):
+        """
+        Decode a value written by dumps, whatever serializer it was written with
+
+        Raises:
+            ValueError: If the header names no known serializer
+        """
+        header = data[0]
+        serializer = self._by_id.get(header & 0x0f)
+        compression = header >> 4
+        if serializer is None or compression > COMPRESSION_LZ4:
+            raise ValueError(f"Not a cache payload (header 0x{header:02x})")
+        payload = data[1:]
+        if compression != COMPRESSION_NONE:
+            payload = _decompress(compression, payload)
+        return serializer.loads(payload)
@@ -0,0 +1,288 @@
+"""
+Compact columnar encoding for position tracks and live-traffic feeds
+
+Layout of an encoded payload (all integers little-endian varints unless noted):
+
+    magic 'FRDC' | version (u8) | row count | field count
+    for each field:
+        name length (u8) | name (utf-8) | type (u8) | decimal scale (u8) | flags (u8)
+        [null bitmap, ceil(rows / 8) bytes, present when flags & HAS_NULLS]
+        payload length | payload
+
+Numeric fields are scaled by 10 ** scale, rounded to integers, delta-encoded
+against the previous non-null value and zigzag/varint packed. String fields
+are length-prefixed UTF-8 and boolean fields are bit-packed. Null rows are
+omitted from the payload and flagged in the bitmap.
+"""
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:  # Optional dependency
+    msgpack = None
+
+
+COLUMNAR_MIMETYPE = 'application/vnd.flightfrd.columnar'
+MSGPACK_MIMETYPE = 'application/x-msgpack'
+
+MAGIC = b'FRDC'
+VERSION = 1
+
+TYPE_INT = 1
+TYPE_STR = 2
+TYPE_BOOL = 3
+
+HAS_NULLS = 0x01
+
+# Field name -> (type, decimal scale)
+TRACK_FIELDS = {
+    'timestamp': (TYPE_INT, 0),
+    'latitude': (TYPE_INT, 5),
+    'longitude': (TYPE_INT, 5),
+    'altitude': (TYPE_INT, 0),
+    'ground_speed': (TYPE_INT, 1),
+    'heading': (TYPE_INT, 1),
+}
+
+LIVE_FIELDS = {
+    'id': (TYPE_INT, 0),
+    'icao_code': (TYPE_STR, 0),
+    'callsign': (TYPE_STR, 0),
+    'latitude': (TYPE_INT, 5),
+    'longitude': (TYPE_INT, 5),
+    'altitude': (TYPE_INT, 0),
+    'ground_speed': (TYPE_INT, 1),
+    'heading': (TYPE_INT, 1),
+    'vertical_rate': (TYPE_INT, 1),
+    'on_ground': (TYPE_BOOL, 0),
+    'squawk': (TYPE_STR, 0),
+    'last_position_update': (TYPE_INT, 0),
+}
+
+
+def encode_varints(values):
+    """
+    Varint-encode an array of unsigned integers in one vectorized pass
+
+    Args:
+        values: Array-like of non-negative integers below 2 ** 63
+
+    Returns:
+        bytes: Concatenated LEB128 varints
+    """
+    values = np.asarray(values, dtype=np.uint64)
+    if values.size == 0:
+        return b''
+
+    shifts = np.arange(0, 64, 7, dtype=np.uint64)
+    groups = ((values[:, None] >> shifts) & np.uint64(0x7F)).astype(np.uint8)
+
+    # Number of 7-bit groups needed by each value (at least one)
+    thresholds = np.uint64(1) << shifts[1:]
+    lengths = 1 + (values[:, None] >= thresholds).sum(axis=1)
+
+    columns = np.arange(groups.shape[1])
+    used = columns[None, :] < lengths[:, None]
+    continuation = columns[None, :] < (lengths[:, None] - 1)
+    groups[continuation] |= 0x80
+    return groups[used].tobytes()
+
+
+def decode_varints(data, count=None):
+    """
+    Decode concatenated varints produced by encode_varints
+
+    Returns:
+        numpy.ndarray: Decoded uint64 values
+    """
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if raw.size == 0:
+        return np.zeros(0, dtype=np.uint64)
+
+    ends = np.flatnonzero(raw < 0x80)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    group = np.arange(raw.size) - np.repeat(starts, ends - starts + 1)
+    contributions = (raw & 0x7F).astype(np.uint64) << (7 * group).astype(np.uint64)
+    values = np.add.reduceat(contributions, starts)
+    return values if count is None else values[:count]
+
+
+def _zigzag(values):
+    values = values.astype(np.int64)
+    return ((values << 1) ^ (values >> 63)).astype(np.uint64)
+
+
+def _unzigzag(values):
+    values = values.astype(np.uint64)
+    return (values >> np.uint64(1)).astype(np.int64) ^ -(values & np.uint64(1)).astype(np.int64)
+
+
+def _encode_field(values, field_type, scale):
+    """Encode one column, returning (null bitmap or None, payload bytes)"""
+    if isinstance(values, np.ndarray) and values.dtype.kind == 'f':
+        nulls = np.isnan(values)
+        present = values[~nulls]
+    else:
+        nulls = np.array([value is None or value != value for value in values], dtype=bool)
+        present = [value for value, is_null in zip(values, nulls) if not is_null]
+    bitmap = np.packbits(nulls).tobytes() if nulls.any() else None
+
+    if field_type == TYPE_INT:
+        scaled = np.rint(np.asarray(present, dtype=np.float64) * 10 ** scale).astype(np.int64)
+        deltas = np.diff(scaled, prepend=np.int64(0))
+        payload = encode_varints(_zigzag(deltas))
+    elif field_type == TYPE_BOOL:
+        payload = np.packbits(np.asarray(present, dtype=bool)).tobytes()
+    else:
+        encoded = [str(value).encode('utf-8') for value in present]
+        payload = encode_varints([len(value) for value in encoded]) + b''.join(encoded)
+
+    return bitmap, payload
+
+
+def encode_columnar(columns, fields):
+    """
+    Encode a table of columns into the compact binary layout
+
+    Args:
+        columns: Mapping of field name to a sequence of values (None for nulls);
+                 datetimes must already be converted to epoch seconds
+        fields: Mapping of field name to (type, decimal scale), e.g. TRACK_FIELDS
+
+    Returns:
+        bytes: Encoded payload
+    """
+    count = len(next(iter(columns.values()))) if columns else 0
+    parts = [MAGIC, bytes([VERSION]), encode_varints([count, len(fields)])]
+
+    for name, (field_type, scale) in fields.items():
+        bitmap, payload = _encode_field(columns[name], field_type, scale)
+        encoded_name = name.encode('utf-8')
+        parts.append(bytes([len(encoded_name)]) + encoded_name)
+        parts.append(bytes([field_type, scale, HAS_NULLS if bitmap is not None else 0]))
+        if bitmap is not None:
+            parts.append(bitmap)
+        parts.append(encode_varints([len(payload)]))
+        parts.append(payload)
+
+    return b''.join(parts)
+
+
+def encode_msgpack(columns, fields):
+    """
+    Encode a table of columns as a MessagePack map of per-field binary payloads
+
+    Each field carries the same payload bytes as the binary layout, so clients
+    share one column decoder between both formats.
+
+    Returns:
+        bytes: MessagePack document
+    """
+    if msgpack is None:
+        raise RuntimeError("msgpack is not installed")
+
+    count = len(next(iter(columns.values()))) if columns else 0
+    document = {'format': 'columnar', 'version': VERSION, 'count': count, 'fields': []}
+    for name, (field_type, scale) in fields.items():
+        bitmap, payload = _encode_field(columns[name], field_type, scale)
+        document['fields'].append({
+            'name': name,
+            'type': field_type,
+            'scale': scale,
+            'nulls': bitmap,
+            'data': payload
+        })
+    return msgpack.packb(document, use_bin_type=True)
+
+
+class _Reader:
+    """Cursor over an encoded payload"""
+
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.offset = 0
+
+    def byte(self):
+        value = self.data[self.offset]
+        self.offset += 1
+        return value
+
+    def take(self, size):
+        chunk = bytes(self.data[self.offset:self.offset + size])
+        self.offset += size
+        return chunk
+
+    def varint(self):
+        result = shift = 0
+        while True:
+            byte = self.byte()
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+
+def _decode_field(payload, bitmap, field_type, scale, count):
+    """Decode one column back into a list of Python values"""
+    nulls = np.unpackbits(np.frombuffer(bitmap, dtype=np.uint8), count=count).astype(bool) \
+        if bitmap is not None else np.zeros(count, dtype=bool)
+    present = int(count - nulls.sum())
+
+    if field_type == TYPE_INT:
+        values = np.cumsum(_unzigzag(decode_varints(payload, present)))
+        values = values.tolist() if scale == 0 else (values / 10 ** scale).tolist()
+    elif field_type == TYPE_BOOL:
+        values = np.unpackbits(np.frombuffer(payload, dtype=np.uint8), count=present).astype(bool).tolist()
+    else:
+        reader = _Reader(payload)
+        lengths = [reader.varint() for _ in range(present)]
+        values = [reader.take(length).decode('utf-8') for length in lengths]
+
+    iterator = iter(values)
+    return [None if is_null else next(iterator) for is_null in nulls.tolist()]
+
+
+def decode_columnar(data):
+    """
+    Decode a payload produced by encode_columnar
+
+    Returns:
+        dict: Mapping of field name to list of values
+    """
+    reader = _Reader(data)
+    if reader.take(4) != MAGIC:
+        raise ValueError("Not a columnar payload")
+    version = reader.byte()
+    if version != VERSION:
+        raise ValueError(f"Unsupported columnar version: {version}")
+
+    count = reader.varint()
+    field_count = reader.varint()
+    columns = {}
+    for _ in range(field_count):
+        name = reader.take(reader.byte()).decode('utf-8')
+        field_type, scale, flags = reader.byte(), reader.byte(), reader.byte()
+        bitmap = reader.take((count + 7) // 8) if flags & HAS_NULLS else None
+        payload = reader.take(reader.varint())
+        columns[name] = _decode_field(payload, bitmap, field_type, scale, count)
+    return columns
+
+
+def negotiate(accept_mimetypes):
+    """
+    Pick the response format from a request's Accept header
+
+    JSON stays the default; the binary formats are only used when asked for.
+
+    Returns:
+        str: 'json', 'columnar' or 'msgpack'
+    """
+    offered = ['application/json', COLUMNAR_MIMETYPE]
+    if msgpack is not None:
+        offered.append(MSGPACK_MIMETYPE)
+    best = accept_mimetypes.best_match(offered, default='application/json')
+    if best == COLUMNAR_MIMETYPE:
+        return 'columnar'
+    if best == MSGPACK_MIMETYPE:
+        return 'msgpack'
+    return 'json'
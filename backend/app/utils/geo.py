@@ -0,0 +1,68 @@
+import math
+import numpy as np
+
+
+EARTH_RADIUS_M = 6371008.8  # Mean Earth radius in meters
+
+
+def haversine_distance(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance between two points
+    
+    Args:
+        lat1, lon1: First point in degrees
+        lat2, lon2: Second point in degrees
+        
+    Returns:
+        float: Distance in meters
+    """
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def approximate_distance(lat1, lon1, lat2, lon2):
+    """
+    Fast equirectangular distance approximation, accurate for short hops
+    
+    Args:
+        lat1, lon1: First point in degrees
+        lat2, lon2: Second point in degrees
+        
+    Returns:
+        float: Distance in meters
+    """
+    dlon = (lon2 - lon1 + 180) % 360 - 180
+    x = math.radians(dlon) * math.cos(math.radians((lat1 + lat2) / 2))
+    y = math.radians(lat2 - lat1)
+    return EARTH_RADIUS_M * math.hypot(x, y)
+
+
+def project_positions(latitude, longitude, distance, bearing):
+    """
+    Destination points along great circles, vectorized over arrays
+    
+    Args:
+        latitude, longitude: Arrays of start points in degrees
+        distance: Array of distances to travel in meters
+        bearing: Array of initial bearings in degrees clockwise from north
+        
+    Returns:
+        tuple: (latitude, longitude) arrays in degrees, longitude wrapped to [-180, 180)
+    """
+    phi1 = np.radians(latitude)
+    theta = np.radians(bearing)
+    delta = np.asarray(distance) / EARTH_RADIUS_M
+    
+    sin_phi1, cos_phi1 = np.sin(phi1), np.cos(phi1)
+    sin_delta, cos_delta = np.sin(delta), np.cos(delta)
+    
+    sin_phi2 = np.clip(sin_phi1 * cos_delta + cos_phi1 * sin_delta * np.cos(theta), -1.0, 1.0)
+    dlambda = np.arctan2(np.sin(theta) * sin_delta * cos_phi1, cos_delta - sin_phi1 * sin_phi2)
+    
+    lon2 = (np.asarray(longitude) + np.degrees(dlambda) + 180) % 360 - 180
+    return np.degrees(np.arcsin(sin_phi2)), lon2
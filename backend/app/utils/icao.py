@@ -0,0 +1,102 @@
+import numpy as np
+
+
+ICAO_MAX = 0xFFFFFF
+
+# ASCII byte -> hex digit value, 255 for anything that is not a hex digit
+_HEX_VALUES = np.full(256, 255, dtype=np.uint8)
+for _digit, _char in enumerate('0123456789abcdef'):
+    _HEX_VALUES[ord(_char)] = _digit
+    _HEX_VALUES[ord(_char.upper())] = _digit
+
+# Hex digit value -> lower-case ASCII byte
+_HEX_DIGITS = np.frombuffer(b'0123456789abcdef', dtype=np.uint8)
+
+# Place value and bit shift of each of the six digits, most significant first
+_WEIGHTS = 16 ** np.arange(5, -1, -1, dtype=np.int32)
+_SHIFTS = np.arange(20, -1, -4, dtype=np.int64)
+
+_HEX_CHARS = frozenset('0123456789abcdefABCDEF')
+
+
+def icao_to_int(icao_code):
+    """
+    Convert a hex ICAO address to its 24-bit integer
+
+    Args:
+        icao_code: Six hex digits, in either case
+
+    Returns:
+        int: The address, or None if the code is not six hex digits
+    """
+    # int() alone would also accept whitespace, signs, underscores and a 0x prefix
+    if not icao_code or len(icao_code) != 6 or not _HEX_CHARS.issuperset(icao_code):
+        return None
+    return int(icao_code, 16)
+
+
+def int_to_icao(value):
+    """Canonical (lower-case, zero-padded) hex form of a 24-bit ICAO address"""
+    return f"{value:06x}"
+
+
+def normalize_icao(icao_code):
+    """
+    Canonical form of a hex ICAO address
+
+    Returns:
+        str: Six lower-case hex digits, or None if the code is not valid
+    """
+    icao_code = icao_code.strip() if icao_code else icao_code
+    value = icao_to_int(icao_code)
+    return None if value is None else int_to_icao(value)
+
+
+def icao_to_ints(icao_codes):
+    """
+    Convert a whole list of hex ICAO addresses at once
+
+    The codes are packed into a fixed-width byte array and decoded with a
+    digit lookup table, so no Python-level int() call is made per code.
+
+    Args:
+        icao_codes: Sequence of ICAO code strings (None and invalid codes allowed)
+
+    Returns:
+        numpy.ndarray: int32 addresses, -1 where a code is not six hex digits
+    """
+    count = len(icao_codes)
+    if not count:
+        return np.empty(0, dtype=np.int32)
+
+    # 'S7' keeps a seventh byte so that over-long codes are caught as invalid
+    try:
+        packed = np.array([code or '' for code in icao_codes], dtype='S7')
+    except UnicodeEncodeError:
+        # Non-ASCII input cannot be packed; it is never a valid code anyway
+        return np.array([-1 if value is None else value for value in map(icao_to_int, icao_codes)], dtype=np.int32)
+    raw = packed.view(np.uint8).reshape(count, 7)
+    digits = _HEX_VALUES[raw[:, :6]]
+    valid = (digits.max(axis=1) < 16) & (raw[:, 6] == 0)
+    return np.where(valid, digits @ _WEIGHTS, -1).astype(np.int32)
+
+
+def ints_to_icao(values):
+    """
+    Convert an array of 24-bit ICAO addresses to canonical hex codes
+
+    Args:
+        values: Array-like of addresses; negative values mean "no aircraft"
+
+    Returns:
+        list: Lower-case hex codes, None for negative values
+    """
+    values = np.asarray(values, dtype=np.int64)
+    if not len(values):
+        return []
+
+    digits = _HEX_DIGITS[(values[:, None] >> _SHIFTS) & 0xF]
+    codes = digits.view('S6').ravel().astype('U6').tolist()
+    if (values < 0).any():
+        codes = [code if value >= 0 else None for code, value in zip(codes, values.tolist())]
+    return codes
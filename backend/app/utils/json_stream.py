@@ -0,0 +1,138 @@
+import codecs
+import json
+import re
+
+
+TIME_FIELD = re.compile(r'"time"\s*:\s*(-?\d+)\s*[,}]')
+STATES_FIELD = re.compile(r'"states"\s*:\s*')
+WHITESPACE = re.compile(r'\s*')
+SEPARATORS = re.compile(r'[\s,]*')
+
+
+class StateVectorStream:
+    """
+    Incremental parser for OpenSky /states/all responses
+
+    Decodes the body chunk by chunk and yields the state vectors of the
+    "states" array in fixed-size batches as soon as they are complete, so
+    only one batch (plus the undecoded tail of the current chunk) is held in
+    memory at a time regardless of the size of the snapshot.
+
+    Usage:
+        stream = StateVectorStream(response.iter_content(65536), batch_size=1000)
+        for batch in stream:
+            ...
+        stream.time  # snapshot time, once it has been seen
+    """
+
+    def __init__(self, chunks, batch_size=1000):
+        self.chunks = iter(chunks)
+        self.batch_size = batch_size
+        self.time = None
+        self.count = 0
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+        self._exhausted = False
+
+    def _read(self):
+        """Append the next chunk to the buffer, returning False at the end of the body"""
+        if self._exhausted:
+            return False
+        for chunk in self.chunks:
+            if not chunk:
+                continue
+            # Drop the consumed prefix so the buffer never grows with the body
+            self._buffer = self._buffer[self._pos:] + self._text.decode(chunk)
+            self._pos = 0
+            return True
+        self._buffer = self._buffer[self._pos:] + self._text.decode(b'', final=True)
+        self._pos = 0
+        self._exhausted = True
+        return False
+
+    def _skip(self, separators=WHITESPACE):
+        """Advance past separator characters, reading more input as needed"""
+        while True:
+            self._pos = separators.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer) or not self._read():
+                return
+
+    def _find_states(self):
+        """
+        Position the cursor just inside the states array
+
+        Returns:
+            bool: False if the document has no states (null or missing)
+        """
+        while True:
+            match = STATES_FIELD.search(self._buffer, self._pos)
+            if match and match.end() < len(self._buffer):
+                self._capture_time(self._buffer[:match.start()])
+                self._pos = match.end()
+                self._skip()
+                if self._buffer.startswith('[', self._pos):
+                    self._pos += 1
+                    return True
+                return False
+            if not self._read():
+                self._capture_time(self._buffer)
+                return False
+
+    def _capture_time(self, text):
+        match = TIME_FIELD.search(text)
+        if match and self.time is None:
+            self.time = int(match.group(1))
+
+    def _next_state(self):
+        """Decode the next state vector, or return None at the end of the array"""
+        self._skip(SEPARATORS)
+        if self._pos >= len(self._buffer):
+            raise ValueError("Truncated states document")
+        if self._buffer[self._pos] == ']':
+            self._pos += 1
+            return None
+
+        while True:
+            try:
+                state, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # Most likely the value continues in the next chunk
+                if not self._read():
+                    raise
+                continue
+            if end == len(self._buffer) and not self._exhausted and not isinstance(state, list):
+                # A bare number or literal may continue in the next chunk
+                if self._read():
+                    continue
+            self._pos = end
+            return state
+
+    def _finish(self):
+        """Read the rest of the document to pick up a trailing "time" field"""
+        if self.time is not None:
+            return
+        while True:
+            self._capture_time(self._buffer[self._pos:])
+            if self.time is not None or not self._read():
+                return
+
+    def __iter__(self):
+        if not self._find_states():
+            self._finish()
+            return
+
+        batch = []
+        while True:
+            state = self._next_state()
+            if state is None:
+                break
+            batch.append(state)
+            self.count += 1
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+        self._finish()
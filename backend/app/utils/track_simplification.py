@@ -0,0 +1,96 @@
+import heapq
+import numpy as np
+from app.utils.geo import EARTH_RADIUS_M
+
+
+def project_track(latitudes, longitudes):
+    """
+    Project lat/lon arrays onto a local plane in meters
+
+    Longitudes are unwrapped first so tracks crossing the antimeridian stay continuous.
+
+    Args:
+        latitudes: Array of latitudes in degrees
+        longitudes: Array of longitudes in degrees
+
+    Returns:
+        tuple: (x, y) arrays in meters
+    """
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon = np.radians(np.unwrap(np.asarray(longitudes, dtype=np.float64), period=360))
+    scale = np.cos(lat.mean()) if len(lat) else 1.0
+    return lon * scale * EARTH_RADIUS_M, lat * EARTH_RADIUS_M
+
+
+def _farthest_point(x, y, start, end):
+    """
+    Find the interior point farthest from the segment between two points
+
+    Returns:
+        tuple: (distance, index) of the farthest point
+    """
+    px = x[start + 1:end]
+    py = y[start + 1:end]
+    ax, ay = x[start], y[start]
+    dx, dy = x[end] - ax, y[end] - ay
+    length_sq = dx * dx + dy * dy
+
+    if length_sq == 0:
+        distances = np.hypot(px - ax, py - ay)
+    else:
+        # Distance to the segment, clamping the projection to its endpoints
+        t = np.clip(((px - ax) * dx + (py - ay) * dy) / length_sq, 0.0, 1.0)
+        distances = np.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+    index = int(np.argmax(distances))
+    return float(distances[index]), start + 1 + index
+
+
+def simplify_track(latitudes, longitudes, tolerance=None, max_points=None):
+    """
+    Simplify a track with the Ramer-Douglas-Peucker algorithm
+
+    Segments are split best-first (largest deviation first), so the result is
+    the RDP simplification at `tolerance` meters, truncated to the `max_points`
+    most significant points when that limit is reached first. The distance
+    computations for each segment are vectorized with NumPy.
+
+    Args:
+        latitudes: Array of latitudes in degrees
+        longitudes: Array of longitudes in degrees
+        tolerance: Maximum allowed deviation in meters (optional)
+        max_points: Maximum number of points to keep (optional)
+
+    Returns:
+        numpy.ndarray: Sorted indices of the points to keep
+    """
+    count = len(latitudes)
+    if max_points is not None and max_points < 2:
+        raise ValueError("max_points must be at least 2")
+    if count <= 2 or (tolerance is None and (max_points is None or count <= max_points)):
+        return np.arange(count)
+
+    x, y = project_track(latitudes, longitudes)
+    tolerance = tolerance or 0.0
+    max_points = max_points or count
+
+    keep = np.zeros(count, dtype=bool)
+    keep[0] = keep[-1] = True
+    kept = 2
+
+    heap = []
+    distance, index = _farthest_point(x, y, 0, count - 1)
+    heapq.heappush(heap, (-distance, 0, count - 1, index))
+
+    while heap and kept < max_points:
+        negative_distance, start, end, index = heapq.heappop(heap)
+        if -negative_distance <= tolerance:
+            break
+        keep[index] = True
+        kept += 1
+        for segment_start, segment_end in ((start, index), (index, end)):
+            if segment_end - segment_start > 1:
+                distance, farthest = _farthest_point(x, y, segment_start, segment_end)
+                heapq.heappush(heap, (-distance, segment_start, segment_end, farthest))
+
+    return np.flatnonzero(keep)
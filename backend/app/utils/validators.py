@@ -1,4 +1,5 @@
 import re
+from app.utils.icao import icao_to_int
 
 
 def validate_icao_code(icao_code):
@@ -11,11 +12,8 @@ def validate_icao_code(icao_code):
     Returns:
         bool: True if valid, False otherwise
     """
-    if not icao_code or len(icao_code) != 6:
-        return False
-    
-    # ICAO codes are hexadecimal characters only
-    return bool(re.match(r'^[0-9A-Fa-f]{6}$', icao_code))
+    # ICAO codes are six hexadecimal characters, i.e. a 24-bit address
+    return icao_to_int(icao_code) is not None
 
 
 def validate_flight_number(flight_number):
@@ -0,0 +1,10 @@
+"""
+Ingest and cache benchmarks
+
+Replays recorded or synthetic /states/all snapshots through the ADS-B
+ingest path without contacting OpenSky, and compares the cache
+serializers on flight records. Run from the backend directory:
+
+    python -m benchmarks.ingest --help
+    python -m benchmarks.cache_codec --help
+"""
@@ -0,0 +1,131 @@
+"""
+Compare cache serializers on flight records
+
+Measures encode and decode time and stored bytes of the flight records
+ADSBService caches every poll, once as one key per flight (the ingest path)
+and once as a single large value such as a cached flight list, for the
+str()/eval() and pickle paths the cache used before and every serializer
+and compression of app.utils.cache_codec. Needs no database or Redis.
+
+Examples (from the backend directory):
+
+    python -m benchmarks.cache_codec
+    python -m benchmarks.cache_codec --records 50000 --output codecs.json
+"""
+import json
+import pickle
+import random
+import time
+from datetime import datetime, timedelta
+import click
+
+
+def flight_records(count, seed=0):
+    """
+    Build flight records shaped like ADSBService._cache_flight_data's
+
+    Args:
+        count: Number of records
+        seed: Random seed
+
+    Returns:
+        list: Record dicts
+    """
+    rnd = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    records = []
+    for index in range(count):
+        on_ground = rnd.random() < 0.1
+        records.append({
+            'id': index + 1,
+            'flight_number': None if rnd.random() < 0.3 else f"{rnd.choice(('LH', 'BA', 'AF', 'UA'))}{rnd.randrange(1, 9999)}",
+            'callsign': None if rnd.random() < 0.05 else f"{rnd.choice(('DLH', 'BAW', 'AFR', 'UAL'))}{rnd.randrange(1, 9999)}",
+            'aircraft_id': rnd.randrange(1, 500000),
+            'latitude': rnd.uniform(-60.0, 70.0),
+            'longitude': rnd.uniform(-180.0, 180.0),
+            'altitude': 0.0 if on_ground else rnd.uniform(1000.0, 12000.0),
+            'ground_speed': rnd.uniform(0.0, 10.0) if on_ground else rnd.uniform(120.0, 260.0),
+            'heading': rnd.uniform(0.0, 360.0),
+            'on_ground': on_ground,
+            'squawk': f"{rnd.randrange(0, 8 ** 4):04o}",
+            'status': 'active',
+            'last_position_update': (now - timedelta(seconds=rnd.randrange(0, 60))).isoformat()
+        })
+    return records
+
+
+def candidates():
+    """
+    Serializers to compare
+
+    Returns:
+        list: (name, dumps, loads, per-record only) tuples
+    """
+    from app.utils.cache_codec import CacheCodec, SERIALIZERS, lz4_frame, zstandard
+
+    found = [
+        ('str/eval', lambda value: str(value).encode('utf-8'), lambda data: eval(data.decode('utf-8')), False),
+        ('pickle', pickle.dumps, pickle.loads, False),
+        ('json (get_json)', lambda value: json.dumps(value).encode('utf-8'), lambda data: json.loads(data), False),
+    ]
+    compressions = ['none', 'zlib'] + (['zstd'] if zstandard else []) + (['lz4'] if lz4_frame else [])
+    for serializer in ('msgpack', 'json', 'flight'):
+        if serializer not in SERIALIZERS:
+            continue
+        for compression in compressions:
+            codec = CacheCodec(serializer, compression, threshold=1024)
+            label = serializer if compression == 'none' else f"{serializer}+{compression}"
+            found.append((label, codec.dumps, codec.loads, serializer == 'flight'))
+    return found
+
+
+def measure(dumps, loads, values, repeat):
+    """
+    Time encoding and decoding every value, best of repeat runs
+
+    Returns:
+        dict: Encode and decode microseconds per value and stored bytes per value
+    """
+    encode = decode = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        encoded = [dumps(value) for value in values]
+        encode = min(encode, time.perf_counter() - started)
+        started = time.perf_counter()
+        for data in encoded:
+            loads(data)
+        decode = min(decode, time.perf_counter() - started)
+    return {
+        'encode_us': encode / len(values) * 1e6,
+        'decode_us': decode / len(values) * 1e6,
+        'bytes': sum(len(data) for data in encoded) / len(values),
+    }
+
+
+@click.command()
+@click.option('--records', type=int, default=10000, help='Flight records per run.')
+@click.option('--repeat', type=int, default=5, help='Runs per serializer; the fastest is reported.')
+@click.option('--output', type=click.Path(dir_okay=False), help='Write the results as JSON.')
+def main(records, repeat, output):
+    """Benchmark cache serializers on flight records."""
+    values = flight_records(records)
+    results = []
+    for name, dumps, loads, per_record_only in candidates():
+        results.append({'layout': 'per key', 'serializer': name, **measure(dumps, loads, values, repeat)})
+        if not per_record_only:
+            whole = measure(dumps, loads, [values], repeat)
+            results.append({'layout': f"one value of {records}", 'serializer': name, **whole})
+
+    click.echo(f"{'layout':<22}{'serializer':<18}{'encode us':>11}{'decode us':>11}{'bytes':>12}")
+    click.echo('-' * 74)
+    for result in results:
+        click.echo(f"{result['layout']:<22}{result['serializer']:<18}{result['encode_us']:>11.2f}"
+                   f"{result['decode_us']:>11.2f}{result['bytes']:>12.1f}")
+
+    if output:
+        with open(output, 'w', encoding='utf-8') as handle:
+            json.dump(results, handle, indent=2)
+
+
+if __name__ == '__main__':
+    main()
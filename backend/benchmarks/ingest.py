@@ -0,0 +1,232 @@
+"""
+Replay /states/all snapshots through the ingest path and report throughput
+
+Each scenario runs in a fresh process against an empty database, so
+in-process state (live store, fusion, aircraft index) and peak memory do
+not leak between runs. Snapshots go through ADSBService._process_states_data with
+synchronous SQL writes (LIVE_STATE_FLUSH_INTERVAL=0), i.e. the same path as
+a non-streaming poll: normalize, fuse, diff, ingest, positions and cache.
+
+Examples (from the backend directory):
+
+    python -m benchmarks.ingest                                 # synthetic 1k/10k/50k on SQLite
+    python -m benchmarks.ingest --recorded captures/ --synthetic 10000
+    python -m benchmarks.ingest --postgres postgresql://localhost/flightfrd_bench
+    python -m benchmarks.ingest --output after.json --baseline before.json
+
+The PostgreSQL database is emptied (all tables dropped) before every
+scenario, and cache entries are written to the Redis database given by
+--redis-url, so point both at scratch instances.
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+import click
+
+
+DEFAULT_SYNTHETIC = (1000, 10000, 50000)
+
+# (result field, label, format, whether larger is better) for the report and regression check
+METRICS = (
+    ('states_per_second', 'states/s', '{:>8.0f}', True),
+    ('cold_ms', 'cold ms', '{:>8.1f}', False),
+    ('p50_ms', 'p50 ms', '{:>8.1f}', False),
+    ('p99_ms', 'p99 ms', '{:>8.1f}', False),
+    ('queries_per_poll', 'queries/poll', '{:>12.1f}', False),
+    ('peak_rss_mb', 'peak MB', '{:>8.1f}', False),
+)
+
+
+def _peak_rss_mb():
+    """Peak resident set size of this process in megabytes"""
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024  # Bytes on macOS, KiB elsewhere
+
+
+def run_scenario(database_url, redis_url, scenario):
+    """
+    Run one scenario in the current (fresh) process
+
+    Args:
+        database_url: SQLAlchemy URL of an empty or scratch database
+        redis_url: URL of a scratch Redis database
+        scenario: Dict with 'name' and either 'path' (recorded) or 'aircraft',
+                  'polls' and 'interval' (synthetic)
+
+    Returns:
+        dict: Metrics of the run
+    """
+    # Config is read at import time, so the environment is set before the app is imported
+    os.environ.update({
+        'DATABASE_URL': database_url,
+        'REDIS_URL': redis_url,
+        'LIVE_STATE_FLUSH_INTERVAL': '0',
+        'ADSB_POLL_INTERVAL': '0',
+        'ADSB_SOURCE': 'rest',
+    })
+    import numpy as np
+    from sqlalchemy import event
+    from app import create_app
+    from app.api.v1.flights import adsb_service
+    from app.services.airport_index import airport_index
+    from app.services.position_partitions import position_storage
+    from benchmarks.snapshots import recorded_snapshots, synthetic_snapshots
+    from extensions import db
+
+    app = create_app()
+    with app.app_context():
+        if db.engine.dialect.name != 'sqlite':
+            db.drop_all()
+        db.create_all()
+        position_storage.migrate_to_partitions()  # Production PostgreSQL layout; no-op elsewhere
+        airport_index.load()  # Loaded at startup by polling processes
+
+        statements = [0]
+
+        @event.listens_for(db.engine, 'before_cursor_execute')
+        def count_statement(*args):
+            statements[0] += 1
+
+        if 'path' in scenario:
+            snapshots = recorded_snapshots(scenario['path'])
+        else:
+            snapshots = synthetic_snapshots(scenario['aircraft'], scenario['polls'], scenario['interval'])
+
+        baseline_rss = _peak_rss_mb()
+        latencies = []
+        queries = []
+        states = 0
+        for snapshot in snapshots:
+            before = statements[0]
+            started = time.perf_counter()
+            result = adsb_service._process_states_data(snapshot)
+            latencies.append(time.perf_counter() - started)
+            queries.append(statements[0] - before)
+            states += len(snapshot.get('states') or ())
+            del snapshot, result
+
+        if not latencies:
+            raise click.ClickException(f"No snapshots in {scenario['name']}")
+
+        # The first poll creates every aircraft and flight; later polls are the steady state
+        steady = np.array(latencies[1:] or latencies) * 1000
+        return {
+            'target': db.engine.dialect.name,
+            'scenario': scenario['name'],
+            'polls': len(latencies),
+            'states': states,
+            'elapsed': sum(latencies),
+            'states_per_second': states / sum(latencies),
+            'cold_ms': latencies[0] * 1000,
+            'p50_ms': float(np.percentile(steady, 50)),
+            'p99_ms': float(np.percentile(steady, 99)),
+            'queries_per_poll': float(np.mean(queries[1:] or queries)),
+            'cold_queries': queries[0],
+            'peak_rss_mb': _peak_rss_mb(),
+            'rss_growth_mb': _peak_rss_mb() - baseline_rss,
+        }
+
+
+def _run_isolated(database_url, redis_url, scenario):
+    """Run a scenario in a spawned child process and return its metrics"""
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+        return pool.submit(run_scenario, database_url, redis_url, scenario).result()
+
+
+def _report(results):
+    """Print results as a table"""
+    header = f"{'target':<11}{'scenario':<24}{'polls':>6}" + ''.join(
+        f"  {label:>{len(fmt.format(0))}}" for _, label, fmt, _ in METRICS)
+    click.echo(header)
+    click.echo('-' * len(header))
+    for result in results:
+        click.echo(f"{result['target']:<11}{result['scenario'][:23]:<24}{result['polls']:>6}" + ''.join(
+            '  ' + fmt.format(result[field]) for field, _, fmt, _ in METRICS))
+
+
+def _regressions(results, baseline, tolerance):
+    """
+    Compare results with a baseline run
+
+    Returns:
+        list: Human-readable descriptions of metrics that got worse by more than tolerance
+    """
+    previous = {(result['target'], result['scenario']): result for result in baseline}
+    found = []
+    for result in results:
+        before = previous.get((result['target'], result['scenario']))
+        if before is None:
+            continue
+        for field, label, _, higher_is_better in METRICS:
+            old, new = before[field], result[field]
+            if not old:
+                continue
+            change = (new - old) / old
+            if (-change if higher_is_better else change) > tolerance:
+                found.append(f"{result['target']} {result['scenario']}: {label} {old:.1f} -> {new:.1f} ({change:+.0%})")
+    return found
+
+
+@click.command()
+@click.option('--recorded', 'recorded', multiple=True, type=click.Path(exists=True),
+              help='Recorded /states/all JSON or JSON-lines file (optionally .gz) or a directory of them. Repeatable.')
+@click.option('--synthetic', multiple=True, type=int,
+              help='Synthetic fleet size. Repeatable; defaults to 1000, 10000 and 50000 without --recorded.')
+@click.option('--polls', type=int, default=20, help='Snapshots per synthetic scenario.')
+@click.option('--interval', type=int, default=10, help='Seconds between synthetic snapshots.')
+@click.option('--sqlite/--no-sqlite', default=True, help='Run against a temporary SQLite file.')
+@click.option('--postgres', 'postgres_url', default=None,
+              help='PostgreSQL URL to run against as well. ALL TABLES IN IT ARE DROPPED.')
+@click.option('--redis-url', default='redis://localhost:6379/15', help='Scratch Redis database for the flight cache.')
+@click.option('--output', type=click.Path(dir_okay=False), help='Write the results as JSON.')
+@click.option('--baseline', type=click.Path(exists=True, dir_okay=False),
+              help='Results JSON of an earlier run; exit 1 if a metric regressed by more than --tolerance.')
+@click.option('--tolerance', type=float, default=0.2, help='Allowed relative regression against --baseline.')
+def main(recorded, synthetic, polls, interval, sqlite, postgres_url, redis_url, output, baseline, tolerance):
+    """Benchmark ADS-B ingest with recorded or synthetic snapshots."""
+    import redis
+
+    try:
+        redis.Redis.from_url(redis_url).ping()
+    except redis.RedisError as e:
+        raise click.ClickException(f"Redis at {redis_url} is not reachable ({e}); cache writes are part of ingest")
+
+    scenarios = [{'name': os.path.basename(os.path.normpath(path)), 'path': path} for path in recorded]
+    for aircraft in synthetic or (() if recorded else DEFAULT_SYNTHETIC):
+        scenarios.append({'name': f"synthetic-{aircraft}", 'aircraft': aircraft, 'polls': polls, 'interval': interval})
+
+    results = []
+    for scenario in scenarios:
+        if sqlite:
+            directory = tempfile.mkdtemp(prefix='ingest-benchmark-')
+            try:
+                results.append(_run_isolated(f"sqlite:///{os.path.join(directory, 'benchmark.db')}", redis_url, scenario))
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+        if postgres_url:
+            results.append(_run_isolated(postgres_url, redis_url, scenario))
+        click.echo(f"Finished {scenario['name']}", err=True)
+
+    _report(results)
+    if output:
+        with open(output, 'w', encoding='utf-8') as handle:
+            json.dump(results, handle, indent=2)
+
+    if baseline:
+        with open(baseline, encoding='utf-8') as handle:
+            regressions = _regressions(results, json.load(handle), tolerance)
+        for regression in regressions:
+            click.echo(f"REGRESSION {regression}", err=True)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
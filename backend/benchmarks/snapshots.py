@@ -0,0 +1,98 @@
+import gzip
+import json
+import math
+import os
+import random
+import time
+
+
+def _open(path):
+    """Open a text file, transparently decompressing .gz files"""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+
+def recorded_snapshots(path):
+    """
+    Yield recorded /states/all responses
+
+    Args:
+        path: A JSON file holding one response, a JSON-lines file with one
+              response per line (optionally gzipped), or a directory of such
+              files replayed in name order
+
+    Yields:
+        dict: Response with 'time' and 'states'
+    """
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            if name.endswith(('.json', '.jsonl', '.json.gz', '.jsonl.gz')):
+                yield from recorded_snapshots(os.path.join(path, name))
+        return
+
+    with _open(path) as handle:
+        if '.jsonl' in path:
+            for line in handle:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield json.load(handle)
+
+
+def synthetic_snapshots(aircraft, polls, interval=10, seed=0, start=None):
+    """
+    Yield a deterministic sequence of /states/all responses
+
+    Every aircraft keeps a fixed speed, track and climb rate and moves
+    between polls, so later polls exercise the update path as a live feed
+    would. About one in ten aircraft sits on the ground without moving and
+    one in twenty has no callsign.
+
+    Args:
+        aircraft: Number of aircraft in every snapshot
+        polls: Number of snapshots
+        interval: Seconds between snapshots
+        seed: Random seed for the fleet
+        start: Epoch seconds of the first snapshot (defaults to now minus the replayed span)
+
+    Yields:
+        dict: Response with 'time' and 'states' in OpenSky's state vector layout
+    """
+    rnd = random.Random(seed)
+    start = int(start if start is not None else time.time() - polls * interval)
+    fleet = []
+    for index in range(aircraft):
+        on_ground = rnd.random() < 0.1
+        fleet.append({
+            'icao24': f"{(index * 2654435761) & 0xFFFFFF:06x}",  # Spread over the address space
+            'callsign': None if rnd.random() < 0.05 else f"{rnd.choice(('DLH', 'BAW', 'AFR', 'UAL', 'KLM'))}{index % 9000 + 1:<5d}",
+            'country': rnd.choice(('Germany', 'United Kingdom', 'France', 'United States', 'Netherlands')),
+            'latitude': rnd.uniform(-60.0, 70.0),
+            'longitude': rnd.uniform(-180.0, 180.0),
+            'altitude': 0.0 if on_ground else rnd.uniform(1000.0, 12000.0),
+            'speed': rnd.uniform(0.0, 10.0) if on_ground else rnd.uniform(120.0, 260.0),
+            'track': rnd.uniform(0.0, 360.0),
+            'vertical_rate': 0.0 if on_ground else rnd.choice((0.0, 0.0, 5.0, -5.0)),
+            'on_ground': on_ground,
+            'squawk': f"{rnd.randrange(0, 8 ** 4):04o}"
+        })
+
+    for poll in range(polls):
+        now = start + poll * interval
+        elapsed = poll * interval
+        states = []
+        for plane in fleet:
+            moved = 0.0 if plane['on_ground'] else plane['speed'] * elapsed
+            track = math.radians(plane['track'])
+            latitude = max(-85.0, min(85.0, plane['latitude'] + moved * math.cos(track) / 111320.0))
+            longitude = (plane['longitude'] + moved * math.sin(track)
+                         / (111320.0 * max(math.cos(math.radians(latitude)), 0.01)) + 180.0) % 360.0 - 180.0
+            altitude = max(0.0, plane['altitude'] + plane['vertical_rate'] * elapsed)
+            states.append([
+                plane['icao24'], plane['callsign'], plane['country'], now, now,
+                round(longitude, 5), round(latitude, 5), round(altitude, 1), plane['on_ground'],
+                round(plane['speed'], 2), round(plane['track'], 1), plane['vertical_rate'], None,
+                round(altitude + 30.0, 1), plane['squawk'], False, 0
+            ])
+        yield {'time': now, 'states': states}
@@ -9,11 +9,82 @@ class Config:
     
     # Redis configuration
     REDIS_URL = os.environ.get('REDIS_URL') or 'redis://localhost:6379/0'
+    CACHE_NEAR_ENABLED = os.environ.get('CACHE_NEAR_ENABLED', 'true').lower() in ['true', '1', 'yes']  # Keep hot CacheService reads in process memory
+    CACHE_NEAR_MAX_ENTRIES = int(os.environ.get('CACHE_NEAR_MAX_ENTRIES', 10000))  # Entries in the in-process cache before LRU eviction
+    CACHE_NEAR_MAX_BYTES = int(os.environ.get('CACHE_NEAR_MAX_BYTES', 64 * 1024 * 1024))  # Serialized bytes in the in-process cache before LRU eviction
+    CACHE_NEAR_TTL = float(os.environ.get('CACHE_NEAR_TTL', 5))  # Seconds an in-process entry is served, bounds staleness if an invalidation is lost
+    CACHE_BATCH_SIZE = int(os.environ.get('CACHE_BATCH_SIZE', 1000))  # Keys per MGET or pipelined SETEX/DEL round trip in the batched cache calls
+    CACHE_SCAN_COUNT = int(os.environ.get('CACHE_SCAN_COUNT', 1000))  # Keys examined per SCAN step in pattern invalidation
+    CACHE_SERIALIZER = os.environ.get('CACHE_SERIALIZER', 'msgpack')  # msgpack or json for CacheService.set/set_many (json when msgpack is missing)
+    CACHE_COMPRESSION = os.environ.get('CACHE_COMPRESSION', 'zlib')  # none, zlib, zstd or lz4 (zlib when the library is missing)
+    CACHE_COMPRESSION_THRESHOLD = int(os.environ.get('CACHE_COMPRESSION_THRESHOLD', 1024))  # Serialized bytes from which cached values are compressed
+    CACHE_INVALIDATION_CHANNEL = os.environ.get('CACHE_INVALIDATION_CHANNEL', 'cache:invalidate')  # Redis pub/sub channel shared by every worker
+    CACHE_ROUTE_STALE_TTL = int(os.environ.get('CACHE_ROUTE_STALE_TTL', 300))  # Seconds past its TTL a cached response is served while one worker recomputes it
+    CACHE_ROUTE_LOCK_TIMEOUT = float(os.environ.get('CACHE_ROUTE_LOCK_TIMEOUT', 30))  # Seconds before a recompute lock of a crashed worker expires
+    CACHE_ROUTE_LOCK_WAIT = float(os.environ.get('CACHE_ROUTE_LOCK_WAIT', 5))  # Seconds a request waits for another worker's recompute before doing it itself
+    CACHE_XFETCH_BETA = float(os.environ.get('CACHE_XFETCH_BETA', 1.0))  # Eagerness of probabilistic early refresh of cached responses, 0 disables
     
     # ADS-B API configuration
     ADSB_API_BASE_URL = os.environ.get('ADSB_API_BASE_URL', 'https://opensky-network.org/api')
     ADSB_USERNAME = os.environ.get('ADSB_USERNAME')
     ADSB_PASSWORD = os.environ.get('ADSB_PASSWORD')
+    ADSB_CONNECT_TIMEOUT = float(os.environ.get('ADSB_CONNECT_TIMEOUT', 5))  # Seconds to establish a connection
+    ADSB_READ_TIMEOUT = float(os.environ.get('ADSB_READ_TIMEOUT', 30))  # Seconds to wait for response data
+    ADSB_MAX_RETRIES = int(os.environ.get('ADSB_MAX_RETRIES', 3))  # Retries on connection errors and 5xx responses
+    ADSB_RETRY_BACKOFF = float(os.environ.get('ADSB_RETRY_BACKOFF', 0.5))  # Base of the jittered exponential backoff in seconds
+    ADSB_POOL_SIZE = int(os.environ.get('ADSB_POOL_SIZE', 10))  # Pooled keep-alive connections per host
+    ADSB_STREAM_CHUNK_SIZE = int(os.environ.get('ADSB_STREAM_CHUNK_SIZE', 65536))  # Bytes read per chunk when streaming /states/all
+    ADSB_STREAM_BATCH_SIZE = int(os.environ.get('ADSB_STREAM_BATCH_SIZE', 1000))  # States ingested per batch when streaming
+    ADSB_SHARD_SIZE = int(os.environ.get('ADSB_SHARD_SIZE', 100))  # Tracked ICAO codes per sharded request
+    ADSB_SHARD_WORKERS = int(os.environ.get('ADSB_SHARD_WORKERS', 8))  # Concurrent shard requests (keep <= ADSB_POOL_SIZE)
+    ADSB_REGION_SHARDS = os.environ.get('ADSB_REGION_SHARDS', '')  # Poll the globe as a ROWSxCOLS grid of boxes, e.g. '3x6'; empty polls it in one request
+    ADSB_SOURCE = os.environ.get('ADSB_SOURCE', 'rest')  # rest, sbs, beast or avr
+    ADSB_SOURCE_HOST = os.environ.get('ADSB_SOURCE_HOST', '127.0.0.1')  # Receiver host for sbs/beast/avr feeds
+    ADSB_SOURCE_PORT = int(os.environ.get('ADSB_SOURCE_PORT', 0))  # Receiver port, 0 uses the feed's default (30003/30005/30002)
+    ADSB_SOURCE_TIMEZONE = os.environ.get('ADSB_SOURCE_TIMEZONE', 'local')  # Clock of SBS message timestamps: local, an IANA name, or receipt to use the receive time
+    ADSB_SOURCE_TIMEOUT = float(os.environ.get('ADSB_SOURCE_TIMEOUT', 5))  # Socket read timeout in seconds
+    ADSB_SOURCE_BATCH_INTERVAL = float(os.environ.get('ADSB_SOURCE_BATCH_INTERVAL', 1.0))  # Seconds of receiver messages per ingest batch
+    ADSB_INGEST_CHUNK_SIZE = int(os.environ.get('ADSB_INGEST_CHUNK_SIZE', 500))  # ICAO codes per IN query
+    ADSB_POLL_INTERVAL = int(os.environ.get('ADSB_POLL_INTERVAL', 0))  # In-process polling, 0 disables
+    ADSB_INGEST_LOCK_TTL = float(os.environ.get('ADSB_INGEST_LOCK_TTL', 30))  # Seconds of the Redis lock electing the one worker that polls or reads the feed
+    ADSB_ADAPTIVE_POLLING = os.environ.get('ADSB_ADAPTIVE_POLLING', 'false').lower() in ['true', '1', 'yes']  # Schedule each region shard by its change rate and the credit budget
+    ADSB_MIN_POLL_INTERVAL = float(os.environ.get('ADSB_MIN_POLL_INTERVAL', 5))  # Fastest adaptive poll of a region (OpenSky resolves 5s authenticated, 10s anonymous)
+    ADSB_MAX_POLL_INTERVAL = float(os.environ.get('ADSB_MAX_POLL_INTERVAL', 300))  # Slowest adaptive poll of a region
+    ADSB_DAILY_CREDITS = int(os.environ.get('ADSB_DAILY_CREDITS', 4000))  # API credits per day (4000 registered, 8000 feeders, 400 anonymous)
+    ADSB_CREDIT_RESERVE = float(os.environ.get('ADSB_CREDIT_RESERVE', 0.1))  # Fraction of the daily credits kept for on-demand requests
+    ADSB_RATE_LIMIT_BACKOFF = float(os.environ.get('ADSB_RATE_LIMIT_BACKOFF', 30))  # First backoff in seconds after a 429 without a retry header
+    ADSB_RATE_LIMIT_MAX_BACKOFF = float(os.environ.get('ADSB_RATE_LIMIT_MAX_BACKOFF', 3600))  # Longest backoff in seconds
+    
+    # Live state store configuration
+    LIVE_STATE_MAX_AGE = int(os.environ.get('LIVE_STATE_MAX_AGE', 300))  # Seconds before an aircraft drops off the live view
+    LIVE_STATE_MAX_SKEW = float(os.environ.get('LIVE_STATE_MAX_SKEW', 30))  # Seconds a report's clock may run ahead of ours and still advance the age watermark
+    LIVE_STATE_FLUSH_INTERVAL = float(os.environ.get('LIVE_STATE_FLUSH_INTERVAL', 5))  # Seconds between SQL flushes, 0 writes synchronously
+    LIVE_EXTRAPOLATION_MAX_AGE = float(os.environ.get('LIVE_EXTRAPOLATION_MAX_AGE', 30))  # Seconds past the last fix a position is dead-reckoned
+    LIVE_EXTRAPOLATION_INTERVAL = float(os.environ.get('LIVE_EXTRAPOLATION_INTERVAL', 1.0))  # Seconds between extrapolated position pushes, 0 disables
+    SPATIAL_GRID_CELL_SIZE = float(os.environ.get('SPATIAL_GRID_CELL_SIZE', 1.0))  # Grid cell size in degrees
+    SPATIAL_FULL_DETAIL_ZOOM = int(os.environ.get('SPATIAL_FULL_DETAIL_ZOOM', 7))  # Zoom from which every aircraft is returned; below it zoom= keeps 2**zoom per grid cell
+    SNAPSHOT_MIN_DISTANCE = float(os.environ.get('SNAPSHOT_MIN_DISTANCE', 50))  # Meters moved before an aircraft counts as updated
+    SNAPSHOT_MIN_ALTITUDE_CHANGE = float(os.environ.get('SNAPSHOT_MIN_ALTITUDE_CHANGE', 30))  # Altitude change before an aircraft counts as updated
+    SNAPSHOT_REFRESH_INTERVAL = float(os.environ.get('SNAPSHOT_REFRESH_INTERVAL', 60))  # Seconds after which an unchanged aircraft is written anyway
+    
+    # Flight lifecycle configuration
+    LIFECYCLE_GROUND_SPEED = float(os.environ.get('LIFECYCLE_GROUND_SPEED', 30))  # m/s below which an aircraft without an on_ground flag counts as on the ground
+    LIFECYCLE_GROUND_ALTITUDE = float(os.environ.get('LIFECYCLE_GROUND_ALTITUDE', 3000))  # Meters above which an aircraft always counts as airborne
+    LIFECYCLE_CONFIRM_SECONDS = float(os.environ.get('LIFECYCLE_CONFIRM_SECONDS', 15))  # Seconds a new phase must persist before a takeoff/landing is recorded
+    LIFECYCLE_SIGNAL_TIMEOUT = float(os.environ.get('LIFECYCLE_SIGNAL_TIMEOUT', 1800))  # Seconds without reports before an open flight is closed
+    LIFECYCLE_SWEEP_INTERVAL = float(os.environ.get('LIFECYCLE_SWEEP_INTERVAL', 300))  # Seconds between database sweeps closing flights left open across restarts
+    
+    # Airport reference data
+    AIRPORTS_DATA_PATH = os.environ.get('AIRPORTS_DATA_PATH', '')  # Airport CSV, empty uses the bundled app/data/airports.csv
+    AIRPORT_MAX_DISTANCE = float(os.environ.get('AIRPORT_MAX_DISTANCE', 10000))  # Meters from an airport for a takeoff/landing to be attributed to it
+    AIRPORT_MAX_HEIGHT = float(os.environ.get('AIRPORT_MAX_HEIGHT', 1000))  # Meters above airport elevation for a position to be attributed to it
+    
+    # Position history configuration
+    POSITION_MIN_DISTANCE = float(os.environ.get('POSITION_MIN_DISTANCE', 100))  # Meters moved before a new point is recorded
+    POSITION_MIN_INTERVAL = float(os.environ.get('POSITION_MIN_INTERVAL', 30))  # Seconds after which a point is recorded anyway
+    POSITION_FLUSH_INTERVAL = float(os.environ.get('POSITION_FLUSH_INTERVAL', 10))  # Seconds between batched inserts
+    POSITION_MAX_BUFFER = int(os.environ.get('POSITION_MAX_BUFFER', 100000))  # Points kept for retry while inserts fail; the oldest are dropped beyond it
+    POSITION_RETENTION_DAYS = int(os.environ.get('POSITION_RETENTION_DAYS', 7))  # Days of position history kept (whole day partitions are dropped)
     
     # Upload configurations
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app/static/uploads')
@@ -0,0 +1,99 @@
+import pytest
+from app.utils.cache_codec import CacheCodec, FlightRecordSerializer
+
+RECORD = {
+    'id': 42,
+    'aircraft_id': 7,
+    'flight_number': 'KL1023',
+    'callsign': 'KLM1023',
+    'latitude': 52.25720,
+    'longitude': 3.91937,
+    'altitude': 11582.4,
+    'ground_speed': 236.42,
+    'heading': 182.9,
+    'on_ground': False,
+    'squawk': '7700',
+    'status': 'active',
+    'last_position_update': '2024-01-01T12:00:00.500000'
+}
+
+
+def test_flight_record_round_trip():
+    serializer = FlightRecordSerializer()
+    data = serializer.dumps(RECORD)
+    assert len(data) < 100
+    assert serializer.loads(data) == {
+        **RECORD,
+        'latitude': pytest.approx(52.2572),
+        'longitude': pytest.approx(3.91937),
+        'altitude': pytest.approx(11582.4),
+        'ground_speed': pytest.approx(236.42),
+        'heading': pytest.approx(182.9)
+    }
+
+
+def test_flight_record_nulls():
+    serializer = FlightRecordSerializer()
+    record = {field: None for field in FlightRecordSerializer.FIELDS}
+    assert serializer.loads(serializer.dumps(record)) == record
+
+
+def test_flight_record_partial():
+    serializer = FlightRecordSerializer()
+    decoded = serializer.loads(serializer.dumps({'id': 1, 'callsign': 'KLM1023', 'on_ground': True}))
+    assert decoded['id'] == 1
+    assert decoded['callsign'] == 'KLM1023'
+    assert decoded['on_ground'] is True
+    assert decoded['latitude'] is None
+    assert decoded['status'] is None
+
+
+def test_flight_record_rejects_unknown_fields():
+    with pytest.raises(ValueError):
+        FlightRecordSerializer().dumps({**RECORD, 'registration': 'PH-BXA'})
+
+
+def test_flight_record_rejects_long_strings():
+    with pytest.raises(ValueError):
+        FlightRecordSerializer().dumps({**RECORD, 'status': 'x' * 300})
+
+
+@pytest.mark.parametrize('compression', ['none', 'zlib'])
+def test_codec_round_trip(compression):
+    codec = CacheCodec(serializer='json', compression=compression, threshold=0)
+    value = {'flights': [RECORD] * 20, 'count': 20}
+    assert codec.loads(codec.dumps(value)) == value
+
+
+def test_codec_per_value_serializer():
+    codec = CacheCodec(serializer='json', compression='none')
+    data = codec.dumps(RECORD, serializer='flight')
+    assert data[0] & 0x0f == FlightRecordSerializer.id
+    assert codec.loads(data)['callsign'] == 'KLM1023'
+
+
+def test_codec_compresses_above_threshold():
+    value = {'flights': [RECORD] * 50}
+    small = CacheCodec(serializer='json', compression='zlib', threshold=0).dumps(value)
+    plain = CacheCodec(serializer='json', compression='none').dumps(value)
+    skipped = CacheCodec(serializer='json', compression='zlib', threshold=len(plain) * 2).dumps(value)
+    assert len(small) < len(plain)
+    assert skipped == plain
+
+
+def test_codec_reads_payloads_of_other_serializers():
+    writer = CacheCodec(serializer='json', compression='zlib', threshold=0)
+    reader = CacheCodec(serializer='msgpack', compression='none')
+    assert reader.loads(writer.dumps({'count': 3})) == {'count': 3}
+
+
+def test_codec_rejects_unknown_header():
+    with pytest.raises(ValueError):
+        CacheCodec(serializer='json', compression='none').loads(b'\x0f{}')
+
+
+def test_codec_rejects_unknown_settings():
+    with pytest.raises(ValueError):
+        CacheCodec(serializer='pickle')
+    with pytest.raises(ValueError):
+        CacheCodec(serializer='json', compression='brotli')
@@ -0,0 +1,28 @@
+import pytest
+from flask import Response
+from app.api.caching import _to_entry, _to_response
+from app.utils.cache_codec import CacheCodec
+
+BODIES = [
+    ('application/json', b'{"flights": [], "count": 0}'),
+    ('application/x-flight-columns', bytes(range(256)))
+]
+
+
+@pytest.mark.parametrize('serializer', ['json', 'msgpack'])
+@pytest.mark.parametrize('content_type, body', BODIES)
+def test_entry_round_trip(serializer, content_type, body):
+    codec = CacheCodec(serializer=serializer, compression='zlib', threshold=0)
+    entry = _to_entry(Response(body, status=200, content_type=content_type), 100.0, 100.25, ttl=60)
+    response = _to_response(codec.loads(codec.dumps(entry)), 'HIT')
+
+    assert response.get_data() == body
+    assert response.status_code == 200
+    assert response.content_type == content_type
+    assert response.headers['X-Cache'] == 'HIT'
+
+
+def test_entry_timing():
+    entry = _to_entry(Response(b'{}', content_type='application/json'), 100.0, 100.25, ttl=60)
+    assert entry['delta'] == 0.25
+    assert entry['expires'] == 160.25
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+from app.utils.columnar_codec import (
+    LIVE_FIELDS, TRACK_FIELDS, _unzigzag, _zigzag, decode_columnar, decode_varints, encode_columnar,
+    encode_varints
+)
+
+
+@pytest.mark.parametrize('value, encoded', [
+    (0, b'\x00'),
+    (1, b'\x01'),
+    (127, b'\x7f'),
+    (128, b'\x80\x01'),
+    (300, b'\xac\x02'),
+    (16384, b'\x80\x80\x01'),
+    (2 ** 63 - 1, b'\xff' * 8 + b'\x7f')
+])
+def test_varint_reference_vectors(value, encoded):
+    assert encode_varints([value]) == encoded
+    assert decode_varints(encoded).tolist() == [value]
+
+
+def test_varint_round_trip():
+    values = np.array([0, 1, 127, 128, 255, 300, 65535, 2 ** 32, 2 ** 56 + 7, 2 ** 63 - 1], dtype=np.uint64)
+    encoded = encode_varints(values)
+    assert decode_varints(encoded).tolist() == values.tolist()
+    assert decode_varints(encoded, count=3).tolist() == [0, 1, 127]
+
+
+def test_varint_empty():
+    assert encode_varints([]) == b''
+    assert decode_varints(b'').size == 0
+
+
+def test_zigzag():
+    values = np.array([0, -1, 1, -2, 2, -(2 ** 62), 2 ** 62 - 1], dtype=np.int64)
+    assert _zigzag(values).tolist() == [0, 1, 2, 3, 4, 2 ** 63 - 1, 2 ** 63 - 2]
+    assert _unzigzag(_zigzag(values)).tolist() == values.tolist()
+
+
+def test_track_round_trip():
+    columns = {
+        'timestamp': [1700000000, 1700000005, 1700000010],
+        'latitude': [52.25720, 52.26011, None],
+        'longitude': [3.91937, 3.92505, 3.93011],
+        'altitude': [11582, 11590, 11590],
+        'ground_speed': [236.4, None, 236.9],
+        'heading': [182.9, 183.0, 183.1]
+    }
+    decoded = decode_columnar(encode_columnar(columns, TRACK_FIELDS))
+    assert decoded['timestamp'] == columns['timestamp']
+    assert decoded['latitude'] == [pytest.approx(52.2572), pytest.approx(52.26011), None]
+    assert decoded['longitude'] == pytest.approx(columns['longitude'])
+    assert decoded['altitude'] == columns['altitude']
+    assert decoded['ground_speed'] == [pytest.approx(236.4), None, pytest.approx(236.9)]
+    assert decoded['heading'] == pytest.approx(columns['heading'])
+
+
+def test_live_round_trip():
+    columns = {
+        'id': [1, 2],
+        'icao_code': ['4840d6', '40621d'],
+        'callsign': ['KLM1023', None],
+        'latitude': [52.2572, 51.4706],
+        'longitude': [3.91937, -0.46194],
+        'altitude': [11582, None],
+        'ground_speed': [236.4, 0.0],
+        'heading': [182.9, 90.0],
+        'vertical_rate': [-4.2, 0.0],
+        'on_ground': [False, True],
+        'squawk': ['7700', None],
+        'last_position_update': [1700000000, 1700000003]
+    }
+    decoded = decode_columnar(encode_columnar(columns, LIVE_FIELDS))
+    for field in ('id', 'icao_code', 'callsign', 'altitude', 'on_ground', 'squawk', 'last_position_update'):
+        assert decoded[field] == columns[field]
+    for field in ('latitude', 'longitude', 'ground_speed', 'heading', 'vertical_rate'):
+        assert decoded[field] == pytest.approx(columns[field])
+
+
+def test_decode_rejects_other_payloads():
+    with pytest.raises(ValueError):
+        decode_columnar(b'{"flights": []}')
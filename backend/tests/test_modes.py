@@ -0,0 +1,121 @@
+import pytest
+from app.services.sources.base import FIELD_INDEX, StateVectorTracker
+from app.services.sources.modes import (
+    FEET_TO_METERS, KNOTS_TO_MS, FPM_TO_MS, ModeSDecoder, cpr_global, cpr_local, cpr_nl,
+    decode_ac12, decode_ac13, decode_callsign, decode_squawk, modes_crc
+)
+
+# Reference frames from "The 1090 MHz Riddle" (Junzi Sun)
+IDENTIFICATION = bytes.fromhex('8D4840D6202CC371C32CE0576098')
+POSITION_EVEN = bytes.fromhex('8D40621D58C382D690C8AC2863A7')
+POSITION_ODD = bytes.fromhex('8D40621D58C386435CC412692AD6')
+VELOCITY = bytes.fromhex('8D485020994409940838175B284F')
+
+
+def _me(message):
+    return int.from_bytes(message[4:11], 'big')
+
+
+def _parity(message):
+    return int.from_bytes(message[-3:], 'big')
+
+
+@pytest.mark.parametrize('message', [IDENTIFICATION, POSITION_EVEN, POSITION_ODD, VELOCITY])
+def test_crc_matches_parity(message):
+    assert modes_crc(message) == _parity(message)
+
+
+def test_crc_detects_corruption():
+    corrupted = bytearray(IDENTIFICATION)
+    corrupted[5] ^= 0x01
+    assert modes_crc(bytes(corrupted)) != _parity(corrupted)
+
+
+def test_decode_callsign():
+    assert decode_callsign(_me(IDENTIFICATION)) == 'KLM1023'
+
+
+def test_cpr_nl():
+    assert cpr_nl(0) == 59
+    assert cpr_nl(52.2572) == 36
+    assert cpr_nl(-52.2572) == 36
+    assert cpr_nl(87) == 2
+    assert cpr_nl(89) == 1
+
+
+def test_cpr_global_even_newer():
+    latitude, longitude = cpr_global((93000, 51372), (74158, 50194), odd_is_newer=False)
+    assert latitude == pytest.approx(52.25720, abs=1e-5)
+    assert longitude == pytest.approx(3.91937, abs=1e-5)
+
+
+def test_cpr_global_odd_newer():
+    latitude, longitude = cpr_global((93000, 51372), (74158, 50194), odd_is_newer=True)
+    assert latitude == pytest.approx(52.26578, abs=1e-5)
+    assert longitude == pytest.approx(3.93891, abs=1e-5)
+
+
+def test_cpr_local():
+    latitude, longitude = cpr_local((52.258, 3.918), (93000, 51372), odd=0)
+    assert latitude == pytest.approx(52.25720, abs=1e-5)
+    assert longitude == pytest.approx(3.91937, abs=1e-5)
+
+
+def test_decode_ac12():
+    assert decode_ac12((_me(POSITION_EVEN) >> 36) & 0xFFF) == 38000
+    assert decode_ac12(0) is None  # Gillham-coded (Q bit clear)
+
+
+def test_decode_ac13():
+    # 38000 ft: N = 1560 split around the M (0x40) and Q (0x10) bits
+    assert decode_ac13(0x1838) == 38000
+    assert decode_ac13(0x1838 | 0x40) is None  # Metric
+    assert decode_ac13(0x1838 & ~0x10) is None  # Gillham-coded
+
+
+def test_decode_squawk():
+    assert decode_squawk(0) == '0000'
+    # 7700: all of A (bits 7, 9, 11) and B (bits 1, 3, 5), none of C and D
+    value = sum(1 << bit for bit in (7, 9, 11, 1, 3, 5))
+    assert decode_squawk(value) == '7700'
+
+
+def test_decoder_position_pair():
+    tracker = StateVectorTracker(max_age=60)
+    decoder = ModeSDecoder(tracker)
+    assert decoder.feed(POSITION_ODD, 100.0)
+    assert tracker.position('40621d') is None
+    assert decoder.feed(POSITION_EVEN, 101.0)
+
+    latitude, longitude = tracker.position('40621d')
+    assert latitude == pytest.approx(52.25720, abs=1e-5)
+    assert longitude == pytest.approx(3.91937, abs=1e-5)
+    vector = tracker.drain()[0]
+    assert vector[FIELD_INDEX['baro_altitude']] == pytest.approx(38000 * FEET_TO_METERS)
+    assert vector[FIELD_INDEX['on_ground']] is False
+
+
+def test_decoder_velocity():
+    tracker = StateVectorTracker(max_age=60)
+    assert ModeSDecoder(tracker).feed(VELOCITY, 100.0)
+    vector = tracker.drain()[0]
+    assert vector[FIELD_INDEX['velocity']] == pytest.approx(159.20 * KNOTS_TO_MS, abs=0.01)
+    assert vector[FIELD_INDEX['true_track']] == pytest.approx(182.88, abs=0.01)
+    assert vector[FIELD_INDEX['vertical_rate']] == pytest.approx(-832 * FPM_TO_MS)
+
+
+def test_decoder_rejects_bad_crc():
+    tracker = StateVectorTracker(max_age=60)
+    decoder = ModeSDecoder(tracker)
+    corrupted = bytearray(IDENTIFICATION)
+    corrupted[-1] ^= 0x01
+    assert not decoder.feed(bytes(corrupted), 100.0)
+    assert decoder.rejected == 1
+    assert len(tracker) == 0
+
+
+def test_decoder_ignores_replies_from_unknown_addresses():
+    tracker = StateVectorTracker(max_age=60)
+    decoder = ModeSDecoder(tracker)
+    assert not decoder.feed(bytes.fromhex('20001838000000'), 100.0)
+    assert decoder.rejected == 1
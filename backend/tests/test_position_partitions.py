@@ -0,0 +1,90 @@
+import os
+from datetime import datetime, timedelta
+import pytest
+from flask import Flask
+from sqlalchemy import text
+from extensions import db
+from app.models import Aircraft, Flight, FlightPosition
+from app.services.position_partitions import PositionPartitionManager
+
+# Migration tests need a disposable PostgreSQL database, e.g.
+# TEST_POSTGRES_URL=postgresql://postgres@localhost/flightfrd_test
+POSTGRES_URL = os.environ.get('TEST_POSTGRES_URL')
+
+
+def _app(url):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+@pytest.fixture
+def postgres_app():
+    if not POSTGRES_URL:
+        pytest.skip('TEST_POSTGRES_URL is not set')
+    app = _app(POSTGRES_URL)
+    with app.app_context():
+        db.session.execute(text('DROP TABLE IF EXISTS flight_positions CASCADE'))
+        db.session.commit()
+        db.drop_all()
+        db.create_all()
+        yield app
+        db.session.rollback()
+        db.session.execute(text('DROP TABLE IF EXISTS flight_positions CASCADE'))
+        db.session.commit()
+        db.drop_all()
+
+
+def _flight():
+    aircraft = Aircraft(icao_code='4840d6', icao_int=0x4840D6)
+    db.session.add(aircraft)
+    db.session.flush()
+    flight = Flight(callsign='KLM1023', aircraft_id=aircraft.id, status='active')
+    db.session.add(flight)
+    db.session.flush()
+    return flight
+
+
+def test_migrate_keeps_todays_rows(postgres_app):
+    flight = _flight()
+    now = datetime.utcnow()
+    db.session.add_all([
+        FlightPosition(flight_id=flight.id, latitude=52.2, longitude=3.9, timestamp=now - timedelta(days=3)),
+        FlightPosition(flight_id=flight.id, latitude=52.3, longitude=3.9, timestamp=now)
+    ])
+    db.session.commit()
+
+    storage = PositionPartitionManager()
+    assert storage.mode() == 'legacy'
+    assert storage.migrate_to_partitions()
+    assert storage.mode() == 'postgresql'
+    assert db.session.execute(text(
+        "SELECT relkind FROM pg_class WHERE relname = 'flight_positions'"
+    )).scalar() == 'p'
+
+    # Writes right after the migration land in a partition
+    storage.insert([{'flight_id': flight.id, 'latitude': 52.4, 'longitude': 4.0, 'timestamp': now + timedelta(seconds=5)}])
+    db.session.commit()
+
+    assert [row.latitude for row in storage.select(flight.id)] == [52.2, 52.3, 52.4]
+
+
+def test_migrate_empty_table_creates_todays_partition(postgres_app):
+    storage = PositionPartitionManager()
+    assert storage.migrate_to_partitions()
+
+    today = datetime.utcnow().date()
+    assert db.session.execute(text(
+        "SELECT 1 FROM pg_class WHERE relname = :name"
+    ), {'name': storage.partition_name(today)}).scalar() == 1
+
+
+def test_migrate_is_postgresql_only():
+    app = _app('sqlite://')
+    with app.app_context():
+        db.create_all()
+        storage = PositionPartitionManager()
+        assert not storage.migrate_to_partitions()
+        assert storage.mode() == 'sqlite'
@@ -0,0 +1,87 @@
+from app.services.sources.beast import MLATClock, parse_avr_line
+from app.services.sources.modes import modes_crc
+from app.services.sources.replay import FileReplaySource
+from app.services.state_fusion import StateFusion
+
+# Airborne position frames of 40621d at 38000 ft ("The 1090 MHz Riddle")
+POSITION_EVEN = bytes.fromhex('8D40621D58C382D690C8AC2863A7')
+POSITION_ODD = bytes.fromhex('8D40621D58C386435CC412692AD6')
+
+
+def _moved(message, lat_step, lon_step):
+    """Same frame with its CPR coordinates shifted and the parity recomputed"""
+    me = int.from_bytes(message[4:11], 'big')
+    lat_cpr = ((me >> 17) & 0x1FFFF) + lat_step
+    lon_cpr = (me & 0x1FFFF) + lon_step
+    me = (me & ~((1 << 34) - 1)) | (lat_cpr << 17) | lon_cpr
+    body = message[:4] + me.to_bytes(7, 'big')
+    return body + modes_crc(body + bytes(3)).to_bytes(3, 'big')
+
+
+def _beast_frame(ticks, message):
+    body = ticks.to_bytes(6, 'big') + b'\xc0' + message
+    return b'\x1a3' + body.replace(b'\x1a', b'\x1a\x1a')
+
+
+def _replay_through_fusion(path, fmt):
+    fusion = StateFusion(max_age=60, max_skew=30)
+    source = FileReplaySource(str(path), fmt=fmt, batch_size=2)
+    counts = []
+    positions = []
+    for states in source.normalized_batches():
+        fused, batch_counts = fusion.fuse(states)
+        counts.append(batch_counts)
+        positions.extend((state['latitude'], state['longitude']) for state in fused)
+    return counts, positions
+
+
+def test_beast_replay_keeps_every_fix(tmp_path):
+    frames = [
+        (12_000_000, POSITION_EVEN),
+        (18_000_000, POSITION_ODD),
+        (24_000_000, _moved(POSITION_EVEN, 40, 40)),
+        (30_000_000, _moved(POSITION_ODD, 40, 40)),
+    ]
+    path = tmp_path / 'capture.bin'
+    path.write_bytes(b''.join(_beast_frame(ticks, message) for ticks, message in frames))
+
+    counts, positions = _replay_through_fusion(path, 'beast')
+    assert [batch['duplicates'] for batch in counts] == [0, 0]
+    assert [batch['accepted'] + batch['merged'] for batch in counts] == [1, 1]
+    assert len(positions) == 2
+    assert positions[0] != positions[1]
+
+
+def test_avr_replay_without_timestamps_keeps_every_fix(tmp_path):
+    messages = [POSITION_EVEN, POSITION_ODD, _moved(POSITION_EVEN, 40, 40), _moved(POSITION_ODD, 40, 40)]
+    path = tmp_path / 'capture.avr'
+    path.write_text(''.join(f"*{message.hex().upper()};\n" for message in messages))
+
+    counts, positions = _replay_through_fusion(path, 'avr')
+    assert [batch['duplicates'] for batch in counts] == [0, 0]
+    assert len(positions) == 2
+    assert positions[0] != positions[1]
+
+
+def test_parse_avr_line():
+    assert parse_avr_line(f"*{POSITION_EVEN.hex()};") == (0, POSITION_EVEN)
+    assert parse_avr_line(f"@000000B71B00{POSITION_EVEN.hex()};") == (12_000_000, POSITION_EVEN)
+    assert parse_avr_line('*8D40;') is None
+    assert parse_avr_line('not a frame') is None
+
+
+def test_mlat_clock():
+    clock = MLATClock()
+    assert clock.time(12_000_000, 1000.0) == 1000.0
+    assert clock.time(18_000_000, 1000.0) == 1000.5
+    assert clock.time(0, 1001.0) == 1001.0
+    # A counter reset re-anchors the clock
+    assert clock.time(6_000_000, 1002.0) == 1002.0
+    assert clock.time(18_000_000, 1002.0) == 1003.0
+
+
+def test_mlat_clock_max_drift():
+    clock = MLATClock(max_drift=2.0)
+    clock.time(12_000_000, 1000.0)
+    assert clock.time(24_000_000, 1001.2) == 1001.0
+    assert clock.time(36_000_000, 1010.0) == 1010.0
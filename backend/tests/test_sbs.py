@@ -0,0 +1,89 @@
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+import pytest
+from app.services.sources.base import FIELD_INDEX, StateVectorTracker
+from app.services.sources.modes import FEET_TO_METERS, FPM_TO_MS, KNOTS_TO_MS
+from app.services.sources.sbs import SBSDecoder, parse_sbs_line, parse_sbs_timestamp
+
+UTC = ZoneInfo('UTC')
+
+POSITION = 'MSG,3,1,1,4840D6,1,2024/01/01,12:00:00.500,2024/01/01,12:00:00.500,,38000,,,52.25720,3.91937,,,0,0,0,0'
+VELOCITY = 'MSG,4,1,1,4840D6,1,2024/01/01,12:00:01.000,2024/01/01,12:00:01.000,,,450,182.9,,,-832,,,,,'
+IDENTITY = 'MSG,1,1,1,4840D6,1,2024/01/01,12:00:02.000,2024/01/01,12:00:02.000,KLM1023 ,,,,,,,,,,,'
+SURFACE = 'MSG,6,1,1,4840D6,1,2024/01/01,12:00:03.000,2024/01/01,12:00:03.000,,,,,,,,7700,0,0,-1,-1'
+
+
+def test_parse_timestamp_with_timezone():
+    expected = datetime(2024, 1, 1, 12, 0, 0, 500000, tzinfo=timezone.utc).timestamp()
+    assert parse_sbs_timestamp('2024/01/01', '12:00:00.500', UTC) == expected
+    assert parse_sbs_timestamp('2024/01/01', '12:00:00.500', ZoneInfo('Europe/Berlin')) == expected - 3600
+
+
+def test_parse_timestamp_defaults_to_local_time():
+    expected = datetime(2024, 1, 1, 12, 0, 0, 500000).timestamp()
+    assert parse_sbs_timestamp('2024/01/01', '12:00:00.500') == expected
+
+
+@pytest.mark.parametrize('date, time_of_day', [('', ''), ('2024/13/01', '12:00:00.000'), ('2024/01/01', '12:00')])
+def test_parse_timestamp_malformed(date, time_of_day):
+    assert parse_sbs_timestamp(date, time_of_day, UTC) is None
+
+
+def test_parse_position():
+    icao_code, timestamp, fields = parse_sbs_line(POSITION, UTC)
+    assert icao_code == '4840d6'
+    assert timestamp == datetime(2024, 1, 1, 12, 0, 0, 500000, tzinfo=timezone.utc).timestamp()
+    assert fields == {
+        'baro_altitude': pytest.approx(38000 * FEET_TO_METERS),
+        'latitude': 52.2572,
+        'longitude': 3.91937,
+        'spi': False,
+        'on_ground': False
+    }
+
+
+def test_parse_velocity():
+    fields = parse_sbs_line(VELOCITY, UTC)[2]
+    assert fields == {
+        'velocity': pytest.approx(450 * KNOTS_TO_MS),
+        'true_track': 182.9,
+        'vertical_rate': pytest.approx(-832 * FPM_TO_MS)
+    }
+
+
+def test_parse_identity_and_flags():
+    assert parse_sbs_line(IDENTITY, UTC)[2] == {'callsign': 'KLM1023'}
+    assert parse_sbs_line(SURFACE, UTC)[2] == {'squawk': '7700', 'spi': True, 'on_ground': True}
+
+
+@pytest.mark.parametrize('line', [
+    '',
+    'STA,,1,1,4840D6,1,2024/01/01,12:00:00.000,2024/01/01,12:00:00.000,RM',
+    'MSG,3,1,1,,1,2024/01/01,12:00:00.000,2024/01/01,12:00:00.000,,38000,,,52.2,3.9,,,0,0,0,0',
+    'MSG,3,1,1,4840D6'
+])
+def test_parse_rejects(line):
+    assert parse_sbs_line(line, UTC) is None
+
+
+def test_decoder_updates_tracker():
+    tracker = StateVectorTracker(max_age=60)
+    decoder = SBSDecoder(tracker, timezone='UTC')
+    timestamp = decoder.feed_line(POSITION, received_at=0)
+    decoder.feed_line(IDENTITY, received_at=0)
+
+    assert timestamp == datetime(2024, 1, 1, 12, 0, 0, 500000, tzinfo=timezone.utc).timestamp()
+    assert tracker.position('4840d6') == (52.2572, 3.91937)
+    vector = tracker.drain()[0]
+    assert vector[FIELD_INDEX['callsign']] == 'KLM1023'
+    assert vector[FIELD_INDEX['time_position']] == timestamp
+    assert vector[FIELD_INDEX['last_contact']] == timestamp + 1.5
+
+
+def test_decoder_receipt_time():
+    tracker = StateVectorTracker(max_age=60)
+    decoder = SBSDecoder(tracker, timezone='receipt')
+    assert decoder.feed_line(POSITION, received_at=1000.0) == 1000.0
+    assert decoder.feed_line('not an SBS line', received_at=1001.0) is None
+    assert decoder.messages == 2
+    assert decoder.rejected == 1
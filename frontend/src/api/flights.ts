@@ -80,14 +80,23 @@ export const flightsApi = {
   },
 
   /**
-   * Get position history for a flight identified by ICAO code
+   * Get position history for a flight identified by ICAO code,
+   * optionally simplified to a tolerance (meters) or a maximum number of points
    */
-  getFlightPositions: async (icaoCode: string) => {
+  getFlightPositions: async (icaoCode: string, params?: {
+    since?: string  // ISO 8601 timestamp
+    until?: string  // ISO 8601 timestamp
+    tolerance?: number
+    max_points?: number
+  }) => {
     const response = await apiClient.get<{ 
       flight_id: number, 
       positions: any[], 
-      count: number 
-    }>(`/flights/${icaoCode}/positions`)
+      count: number,
+      total: number
+    }>(`/flights/${icaoCode}/positions`, {
+      params
+    })
     return response.data
   }
 }
\ No newline at end of file